@@ -1,6 +1,20 @@
 from django.contrib import admin
 
-from .models import IoTData, QuizFact, QuizMood, QuizQuestion, QuizResult, QuizResultMessage, SystemSetting
+from . import quiz_analytics
+from .models import (
+    IoTAggregate,
+    IoTData,
+    IoTDataCompacted,
+    QuizFact,
+    QuizMood,
+    QuizQuestion,
+    QuizResult,
+    QuizResultMessage,
+    QuizScoreCount,
+    SensorDevice,
+    SensorState,
+    SystemSetting,
+)
 
 
 @admin.register(SystemSetting)
@@ -12,16 +26,28 @@ class SystemSettingAdmin(admin.ModelAdmin):
 
 @admin.register(QuizQuestion)
 class QuizQuestionAdmin(admin.ModelAdmin):
-    list_display = ("order", "question_preview", "correct_answer", "is_active")
+    list_display = ("order", "question_preview", "correct_answer", "is_active", "answered", "correct_rate")
     list_editable = ("order", "is_active")
     list_display_links = ("question_preview",)
     search_fields = ("question",)
 
+    def get_queryset(self, request):
+        # Totals come from the answer counters, not from the submissions
+        return quiz_analytics.annotate_questions(super().get_queryset(request))
+
     def question_preview(self, obj):
         return obj.question[:50] + "..."
 
     question_preview.short_description = "Question"
 
+    @admin.display(ordering="answered")
+    def answered(self, obj):
+        return obj.answered or 0
+
+    @admin.display(description="Correct %")
+    def correct_rate(self, obj):
+        return f"{obj.correct / obj.answered * 100:.1f}%" if obj.answered else "-"
+
 
 @admin.register(QuizResult)
 class QuizResultAdmin(admin.ModelAdmin):
@@ -34,6 +60,13 @@ class QuizResultAdmin(admin.ModelAdmin):
     user_display.short_description = "User"
 
 
+@admin.register(QuizScoreCount)
+class QuizScoreCountAdmin(admin.ModelAdmin):
+    list_display = ("total_questions", "score", "count")
+    list_filter = ("total_questions",)
+    readonly_fields = ("total_questions", "score", "count")
+
+
 @admin.register(QuizFact)
 class QuizFactAdmin(admin.ModelAdmin):
     list_display = ("text_preview", "is_active", "created_at")
@@ -60,3 +93,33 @@ class IoTDataAdmin(admin.ModelAdmin):
     list_display = ("id", "hardware_sensor_id", "cpu_usage", "ram_usage", "eco_score", "created_at")
     list_filter = ("hardware_sensor_id", "created_at")
     search_fields = ("hardware_sensor_id", "energy_sensor_id", "network_sensor_id")
+
+
+@admin.register(IoTAggregate)
+class IoTAggregateAdmin(admin.ModelAdmin):
+    list_display = ("field", "count", "total", "minimum", "maximum", "updated_at")
+    readonly_fields = ("field", "count", "total", "sum_squares", "minimum", "maximum", "updated_at")
+
+
+@admin.register(SensorState)
+class SensorStateAdmin(admin.ModelAdmin):
+    list_display = ("sensor_id", "kind", "last_seen", "readings")
+    list_filter = ("kind",)
+    search_fields = ("sensor_id",)
+    readonly_fields = ("kind", "sensor_id", "reading", "last_seen", "readings", "data")
+
+
+@admin.register(IoTDataCompacted)
+class IoTDataCompactedAdmin(admin.ModelAdmin):
+    list_display = ("sensor_id", "resolution", "bucket", "count")
+    list_filter = ("resolution",)
+    search_fields = ("sensor_id",)
+    readonly_fields = ("resolution", "bucket", "sensor_id", "count", "stats", "first_at", "last_at")
+
+
+@admin.register(SensorDevice)
+class SensorDeviceAdmin(admin.ModelAdmin):
+    list_display = ("id", "hardware_sensor_id", "energy_sensor_id", "network_sensor_id", "os", "created_at")
+    search_fields = ("hardware_sensor_id", "energy_sensor_id", "network_sensor_id")
+    # Ids are baked into device firmware: registrations are not edited
+    readonly_fields = ("hardware_sensor_id", "energy_sensor_id", "network_sensor_id", "os", "created_at")
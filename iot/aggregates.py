@@ -0,0 +1,262 @@
+"""
+Running aggregates for numeric IoTData fields
+Averages are read from IoTAggregate in O(1) instead of scanning the whole table.
+Inserted readings are added, updated ones adjusted and deleted ones removed through model
+signals; updates and deletions by raw SQL (or QuerySet.update()) bypass them: run
+rebuild_aggregates afterwards.
+"""
+
+import contextvars
+import math
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count, F, FloatField, Max, Min, Sum
+from django.utils import timezone
+
+from .models import IoTAggregate, IoTData, IoTDataCompacted
+
+NUMERIC_FIELDS = [
+    "age_years",
+    "cpu_usage",
+    "ram_usage",
+    "battery_health",
+    "power_watts",
+    "active_devices",
+    "overheating",
+    "co2_equiv_g",
+    "network_load_mbps",
+    "requests_per_min",
+    "cloud_dependency_score",
+    "eco_score",
+    "obsolescence_score",
+    "bigtech_dependency",
+    "co2_savings_kg_year",
+]
+
+
+def _batch_stats(values):
+    """Returns (count, total, sum_squares, minimum, maximum) for a list of numbers"""
+    return len(values), float(sum(values)), float(sum(v * v for v in values)), float(min(values)), float(max(values))
+
+
+# ON CONFLICT ... DO UPDATE is shared by SQLite (3.24+) and PostgreSQL.
+# Only the model's table name is interpolated (bandit B608 false positive).
+_TABLE = IoTAggregate._meta.db_table
+_UPSERT_SQL = f"""
+    INSERT INTO {_TABLE} (field, count, total, sum_squares, minimum, maximum, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (field) DO UPDATE SET
+        count = {_TABLE}.count + excluded.count,
+        total = {_TABLE}.total + excluded.total,
+        sum_squares = {_TABLE}.sum_squares + excluded.sum_squares,
+        minimum = CASE WHEN {_TABLE}.minimum IS NULL OR excluded.minimum < {_TABLE}.minimum
+            THEN excluded.minimum ELSE {_TABLE}.minimum END,
+        maximum = CASE WHEN {_TABLE}.maximum IS NULL OR excluded.maximum > {_TABLE}.maximum
+            THEN excluded.maximum ELSE {_TABLE}.maximum END,
+        updated_at = excluded.updated_at
+"""
+
+
+def record_readings(instances):
+    """
+    Updates the running aggregates with newly inserted readings (one upsert statement).
+    Must be called in the transaction that inserted them so both commit together.
+    """
+    if not instances:
+        return
+
+    updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = [
+        (field, *_batch_stats([float(getattr(instance, field)) for instance in instances]), updated_at)
+        for field in NUMERIC_FIELDS
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(_UPSERT_SQL, params)
+
+
+# Set while the retention command deletes readings whose statistics it moved to IoTDataCompacted
+_compacting = contextvars.ContextVar("aggregates_compacting", default=False)
+
+
+@contextmanager
+def compacting():
+    """Readings deleted in this block stay counted in the aggregates"""
+    token = _compacting.set(True)
+    try:
+        yield
+    finally:
+        _compacting.reset(token)
+
+
+_REMOVE_SQL = f"""
+    UPDATE {_TABLE} SET count = count - %s, total = total - %s, sum_squares = sum_squares - %s, updated_at = %s
+    WHERE field = %s
+"""  # nosec B608
+
+
+def remove_readings(readings):
+    """
+    Removes deleted readings (instances, or dicts of the previous values of updated ones) from
+    the running aggregates once the transaction commits. The readings removed in one transaction
+    (savepoint) are collected and removed together, so a bulk delete costs a few queries, not a
+    few per row.
+    """
+    if not readings or _compacting.get():
+        return
+    values = [{field: float(_value(reading, field)) for field in NUMERIC_FIELDS} for reading in readings]
+    if not connection.in_atomic_block:
+        _Removal(values)()
+        return
+
+    savepoints = set(connection.savepoint_ids)
+    for sids, callback, _ in connection.run_on_commit:
+        if isinstance(callback, _Removal) and sids == savepoints:
+            callback.values.extend(values)
+            return
+    transaction.on_commit(_Removal(values))
+
+
+def _value(reading, field):
+    return reading[field] if isinstance(reading, dict) else getattr(reading, field)
+
+
+class _Removal:
+    """
+    Readings removed from the aggregates in one go: count, total and sum of squares are
+    decremented; minimum and maximum cannot be, so they are recomputed (one scan) for the
+    fields where a removed value was an extreme
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __call__(self):
+        updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        values = {field: [reading[field] for reading in self.values] for field in NUMERIC_FIELDS}
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    _REMOVE_SQL, [(*_batch_stats(values[field])[:3], updated_at, field) for field in NUMERIC_FIELDS]
+                )
+            stale = [
+                aggregate
+                for aggregate in IoTAggregate.objects.filter(field__in=NUMERIC_FIELDS)
+                if aggregate.minimum is not None
+                and (min(values[aggregate.field]) <= aggregate.minimum or max(values[aggregate.field]) >= aggregate.maximum)
+            ]
+            if stale:
+                _refresh_extremes(stale)
+
+
+def _refresh_extremes(aggregates):
+    """Recomputes minimum and maximum of IoTAggregate rows from the raw and compacted readings"""
+    expressions = {}
+    for aggregate in aggregates:
+        expressions[f"{aggregate.field}__minimum"] = Min(aggregate.field, output_field=FloatField())
+        expressions[f"{aggregate.field}__maximum"] = Max(aggregate.field, output_field=FloatField())
+    result = IoTData.objects.aggregate(**expressions)
+    stats = {
+        aggregate.field: {
+            "total": 0,
+            "sum_squares": 0,
+            "min": result[f"{aggregate.field}__minimum"],
+            "max": result[f"{aggregate.field}__maximum"],
+        }
+        for aggregate in aggregates
+    }
+    for compacted in IoTDataCompacted.objects.values_list("stats", flat=True).iterator(chunk_size=2000):
+        for field, values in compacted.items():
+            if field in stats:
+                _fold_compacted(stats[field], values)
+    for aggregate in aggregates:
+        aggregate.minimum, aggregate.maximum = stats[aggregate.field]["min"], stats[aggregate.field]["max"]
+    IoTAggregate.objects.bulk_update(aggregates, ["minimum", "maximum"])
+
+
+def get_averages(fields):
+    """Returns {field: average rounded to 1 decimal}, 0 when there is no data"""
+    rows = IoTAggregate.objects.filter(field__in=fields).values_list("field", "count", "total")
+    averages = {field: 0 for field in fields}
+    for field, count, total in rows:
+        if count:
+            averages[field] = round(total / count, 1)
+    return averages
+
+
+def get_row_count():
+    """Number of readings recorded in the aggregates (O(1) estimate of the table size)"""
+    return IoTAggregate.objects.filter(field=NUMERIC_FIELDS[0]).values_list("count", flat=True).first() or 0
+
+
+def get_stats(fields):
+    """Returns count, mean, min, max and standard deviation for each field"""
+    stats = {field: {"count": 0, "mean": 0, "min": None, "max": None, "stddev": 0} for field in fields}
+    for aggregate in IoTAggregate.objects.filter(field__in=fields):
+        if not aggregate.count:
+            continue
+        mean = aggregate.total / aggregate.count
+        variance = max(0.0, aggregate.sum_squares / aggregate.count - mean * mean)
+        stats[aggregate.field] = {
+            "count": aggregate.count,
+            "mean": mean,
+            "min": aggregate.minimum,
+            "max": aggregate.maximum,
+            "stddev": math.sqrt(variance),
+        }
+    return stats
+
+
+def rebuild_aggregates():
+    """
+    Recomputes every aggregate from the raw IoTData table (one aggregate query),
+    plus the statistics of readings already removed by the retention command.
+    Returns the number of readings taken into account.
+    """
+    expressions = {"rows": Count("id")}
+    for field in NUMERIC_FIELDS:
+        expressions[f"{field}__total"] = Sum(field, output_field=FloatField())
+        expressions[f"{field}__sum_squares"] = Sum(F(field) * F(field), output_field=FloatField())
+        expressions[f"{field}__minimum"] = Min(field, output_field=FloatField())
+        expressions[f"{field}__maximum"] = Max(field, output_field=FloatField())
+
+    with transaction.atomic():
+        result = IoTData.objects.aggregate(**expressions)
+        rows = result["rows"]
+        stats = {
+            field: {
+                "total": result[f"{field}__total"] or 0,
+                "sum_squares": result[f"{field}__sum_squares"] or 0,
+                "min": result[f"{field}__minimum"],
+                "max": result[f"{field}__maximum"],
+            }
+            for field in NUMERIC_FIELDS
+        }
+        for count, compacted in IoTDataCompacted.objects.values_list("count", "stats").iterator(chunk_size=2000):
+            rows += count
+            for field, values in compacted.items():
+                if field in stats:
+                    _fold_compacted(stats[field], values)
+
+        IoTAggregate.objects.all().delete()
+        IoTAggregate.objects.bulk_create(
+            [
+                IoTAggregate(
+                    field=field,
+                    count=rows,
+                    total=stats[field]["total"],
+                    sum_squares=stats[field]["sum_squares"],
+                    minimum=stats[field]["min"],
+                    maximum=stats[field]["max"],
+                )
+                for field in NUMERIC_FIELDS
+            ]
+        )
+    return rows
+
+
+def _fold_compacted(current, values):
+    current["total"] += values["total"]
+    current["sum_squares"] += values["sum_squares"]
+    current["min"] = values["min"] if current["min"] is None else min(current["min"], values["min"])
+    current["max"] = values["max"] if current["max"] is None else max(current["max"], values["max"])
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class IotConfig(AppConfig):
     name = "iot"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import query_stats, signals  # noqa: F401
+
+        connection_created.connect(query_stats.install_wrapper)
@@ -0,0 +1,151 @@
+"""
+Compact binary ingestion format (application/vnd.ecotrack.iot)
+A reading is a fixed little-endian struct led by its layout version and the short id of
+a registered SensorDevice, which stands for the sensor ids and OS string. A body holds
+one or more records back to back. Version 1 (46 bytes, same order in C on the ESP32):
+
+    uint8   version (1)              uint16  active_devices
+    uint32  device_id                uint8   overheating
+    uint32  hardware_timestamp       uint32  co2_equiv_g
+    uint8   age_years                uint32  network_timestamp
+    uint8   cpu_usage                uint16  network_load_mbps
+    uint8   ram_usage                uint32  requests_per_min
+    float32 battery_health           uint8   cloud_dependency_score
+    uint8   win11_compat (0/1)       uint8   eco_score
+    uint32  energy_timestamp         uint8   obsolescence_score
+    uint16  power_watts              uint8   bigtech_dependency
+                                     uint16  co2_savings_kg_year
+"""
+
+import struct
+import threading
+
+from .models import IoTData, SensorDevice
+
+CONTENT_TYPE = "application/vnd.ecotrack.iot"
+
+# version: (struct, IoTData fields after version and device_id)
+LAYOUTS = {
+    1: (
+        struct.Struct("<BIIBBBf?IHHBIIHIBBBBH"),
+        (
+            "hardware_timestamp",
+            "age_years",
+            "cpu_usage",
+            "ram_usage",
+            "battery_health",
+            "win11_compat",
+            "energy_timestamp",
+            "power_watts",
+            "active_devices",
+            "overheating",
+            "co2_equiv_g",
+            "network_timestamp",
+            "network_load_mbps",
+            "requests_per_min",
+            "cloud_dependency_score",
+            "eco_score",
+            "obsolescence_score",
+            "bigtech_dependency",
+            "co2_savings_kg_year",
+        ),
+    ),
+}
+CURRENT_VERSION = 1
+
+DEVICE_FIELDS = ("hardware_sensor_id", "energy_sensor_id", "network_sensor_id", "os")
+
+
+class BinaryFormatError(ValueError):
+    pass
+
+
+# Registered devices never change: {device_id: {field: value}} is cached for the process lifetime
+_devices = {}
+_devices_lock = threading.Lock()
+
+
+def register_device(identity):
+    """
+    Returns (short id, created) of a device identity ({field: value} for DEVICE_FIELDS),
+    registering it on first use. Raises ValidationError for invalid values.
+    """
+    device = SensorDevice(**identity)
+    device.clean_fields()
+    device, created = SensorDevice.objects.get_or_create(**identity)
+    with _devices_lock:
+        _devices[device.id] = {field: getattr(device, field) for field in DEVICE_FIELDS}
+    return device.id, created
+
+
+def _load_devices(device_ids):
+    missing = set(device_ids) - _devices.keys()
+    if missing:
+        rows = SensorDevice.objects.filter(id__in=missing).values("id", *DEVICE_FIELDS)
+        with _devices_lock:
+            for row in rows:
+                _devices[row.pop("id")] = row
+    unknown = set(device_ids) - _devices.keys()
+    if unknown:
+        raise BinaryFormatError(f"Unknown device id(s): {', '.join(map(str, sorted(unknown)))}")
+
+
+def _unpack(body):
+    """Tuples (version, device_id, *values) of every record"""
+    if not body:
+        raise BinaryFormatError("Empty body")
+    layout = LAYOUTS.get(body[0])
+    if layout is not None and len(body) % layout[0].size == 0:
+        # Fast path: records of a single layout
+        records = list(layout[0].iter_unpack(body))
+        if all(values[0] == body[0] for values in records):
+            return records
+
+    records = []
+    offset = 0
+    while offset < len(body):
+        layout = LAYOUTS.get(body[offset])
+        if layout is None:
+            raise BinaryFormatError(f"Unsupported layout version {body[offset]} at byte {offset}")
+        if offset + layout[0].size > len(body):
+            raise BinaryFormatError(f"Truncated record at byte {offset} ({layout[0].size} bytes expected)")
+        records.append(layout[0].unpack_from(body, offset))
+        offset += layout[0].size
+    return records
+
+
+def decode(body):
+    """Decodes a body of one or more records into flat IoTData payload dicts"""
+    records = _unpack(body)
+    device_ids = {values[1] for values in records}
+    if not device_ids <= _devices.keys():
+        _load_devices(device_ids)
+
+    payloads = []
+    for values in records:
+        fields = LAYOUTS[values[0]][1]
+        payload = dict(zip(fields, values[2:]))
+        # float32 carries ~7 significant digits: 80.3 arrives as 80.30000305
+        payload["battery_health"] = round(payload["battery_health"], 2)
+        payload.update(_devices[values[1]])
+        payloads.append(payload)
+    return payloads
+
+
+_ATTNAMES = [field.attname for field in IoTData._meta.concrete_fields]
+
+
+def build_instance(payload):
+    """
+    IoTData from a decoded payload, whose keys already are model field names.
+    Positional arguments take Model.__init__'s fast path (no per-field default lookup).
+    """
+    instance = IoTData(*[payload.get(name) for name in _ATTNAMES])
+    instance.recommendations = {}
+    return instance
+
+
+def encode(payload, device_id, version=CURRENT_VERSION):
+    """Packs a flat payload into one record (device side reference; missing fields are 0)"""
+    record, fields = LAYOUTS[version]
+    return record.pack(version, device_id, *(payload.get(field, 0) for field in fields))
@@ -0,0 +1,188 @@
+"""
+Coalescing broadcast scheduler
+Ingestion marks WebSocket groups dirty; a task on the server event loop rebuilds
+each group's snapshot at most once per IOT_BROADCAST_INTERVAL, however many rows arrived.
+
+Delta messages are numbered per group (seq) and built against the previous broadcast.
+With a channel layer shared by several workers (SQLiteChannelLayer, "sequences"
+extension) the seq and that base are stored in the layer, so every worker numbers its
+messages after the last one sent by any worker and its clients get the shared seq.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import deltas, metrics, snapshots
+
+logger = logging.getLogger(__name__)
+
+# WebSocket groups and the function building their payload
+BROADCAST_GROUPS = {f"{page}_updates": partial(snapshots.get_snapshot, page) for page in snapshots.PAGE_BUILDERS}
+
+
+class BroadcastScheduler:
+    """
+    Collects dirty groups from any thread and flushes them from an asyncio task.
+    The task is attached to the event loop serving the WebSocket consumers, so
+    group_send is awaited on the loop that owns the channel layer queues.
+    """
+
+    def __init__(self, builders, interval=None):
+        self.builders = builders
+        self._interval = interval
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._task = None
+        self._wakeup = None
+        self._last_flush = 0.0
+        # Last broadcast per group: (seq, page dict), used to build deltas (single-process layers)
+        self._state = {}
+
+    @property
+    def interval(self):
+        return settings.IOT_BROADCAST_INTERVAL if self._interval is None else self._interval
+
+    def attach(self):
+        """Starts the flush task on the running event loop (idempotent)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+        if self._dirty:
+            self._wakeup.set()
+
+    def detach(self):
+        """Stops the flush task (used by tests and on shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+        self._loop = self._task = self._wakeup = None
+
+    async def current_seq(self, group):
+        """Sequence number of the last message broadcast to a group"""
+        channel_layer = get_channel_layer()
+        if _shares_sequences(channel_layer):
+            return await channel_layer.group_seq(group)
+        return self._state.get(group, (0, None))[0]
+
+    def mark_dirty(self, groups=None):
+        """Flags groups for a refresh; safe to call from any thread"""
+        with self._lock:
+            self._dirty.update(groups or self.builders)
+
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            delay = self._last_flush + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Broadcast flush failed: {e}")
+
+    async def flush(self):
+        """Rebuilds and sends every dirty group once; returns the number of groups sent"""
+        with self._lock:
+            groups, self._dirty = self._dirty, set()
+        if not groups:
+            return 0
+
+        self._last_flush = time.monotonic()
+        channel_layer = get_channel_layer()
+        shared = _shares_sequences(channel_layer)
+        sent = 0
+        with metrics.BROADCAST_FLUSH_SECONDS.time():
+            for group, builder in self.builders.items():
+                if group not in groups:
+                    continue
+                try:
+                    started = time.time()
+                    data_dict = await sync_to_async(builder)()
+                    with metrics.GROUP_SEND_SECONDS.time(group=group):
+                        if shared:
+                            build = partial(_shared_message, data_dict, started)
+                            if await channel_layer.group_send_sequenced(group, build) is None:
+                                continue
+                        else:
+                            await channel_layer.group_send(group, self._next_message(group, data_dict))
+                    sent += 1
+                except Exception as e:
+                    logger.error(f"Error sending WebSocket to group {group}: {e}")
+        return sent
+
+    def _next_message(self, group, data_dict):
+        """Builds the group event carrying both the full snapshot and the delta"""
+        seq, previous = self._state.get(group, (0, None))
+        seq += 1
+        self._state[group] = (seq, data_dict)
+        return _message(seq, previous, data_dict)
+
+
+def _shares_sequences(channel_layer):
+    return "sequences" in getattr(channel_layer, "extensions", ())
+
+
+def _message(seq, previous, data_dict):
+    return {
+        "type": "data_update",
+        "data": deltas.snapshot_message(data_dict, seq),
+        "delta": deltas.build_delta(previous, data_dict, seq),
+        # Wall clock, so consumers in other processes can measure the delivery delay
+        "sent_at": time.time(),
+    }
+
+
+def _shared_message(data_dict, started, seq, state):
+    """
+    Builds the next message of a group shared by several workers, in the channel layer transaction.
+    Nothing is sent when the last broadcast (by any worker) carries the same data, or was built
+    from a later read: every committed reading marks a group dirty, so a later flush sends it.
+    """
+    data = json.loads(json.dumps(data_dict, cls=DjangoJSONEncoder))
+    previous = None
+    if state is not None:
+        if state["started"] > started or state["data"] == data:
+            return None
+        previous = state["data"]
+    return _message(seq, previous, data), {"started": started, "data": data}
+
+
+scheduler = BroadcastScheduler(BROADCAST_GROUPS)
+
+
+class SchedulerMiddleware:
+    """
+    ASGI middleware attaching the scheduler to the server event loop on the first connection
+    (HTTP or WebSocket): a worker that ingests readings without any WebSocket client of its own
+    still flushes them to the sockets served by the other workers
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        scheduler.attach()
+        return await self.app(scope, receive, send)
@@ -0,0 +1,328 @@
+"""
+Async client of the external chatbot service
+Requests go through keep-alive connections pooled per event loop (HTTP/1.1 on asyncio
+streams), a semaphore bounds how many are in flight, and a circuit breaker makes the
+proxy answer 503 at once while the service keeps failing instead of holding a worker
+for the whole timeout. The reply body is handed over as an async iterator so the proxy
+can stream it to the browser.
+"""
+
+import asyncio
+import ssl
+import time
+import weakref
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+READ_SIZE = 64 * 1024
+
+
+class ChatbotError(Exception):
+    """Request not answered by the service; outcome labels the metrics, status the proxy response"""
+
+    outcome = "error"
+    status = 502
+    message = "Chatbot service error"
+
+
+class Unavailable(ChatbotError):
+    outcome = "unavailable"
+    status = 503
+    message = "La connexion au service IA a échoué. Veuillez vérifier si le serveur est en ligne."
+
+
+class UpstreamTimeout(ChatbotError):
+    outcome = "timeout"
+    status = 504
+    message = "Le service IA n'a pas répondu à temps."
+
+
+class Busy(ChatbotError):
+    outcome = "busy"
+    status = 503
+    message = "Trop de conversations en cours, réessayez dans un instant."
+
+
+class CircuitOpen(ChatbotError):
+    outcome = "circuit_open"
+    status = 503
+    message = "Le service IA est temporairement indisponible."
+
+    def __init__(self, retry_after):
+        super().__init__(self.message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failed calls: calls then fail fast for `reset_after`
+    seconds, after which a single trial call (half-open) closes it or opens it again.
+    """
+
+    def __init__(self, failures=5, reset_after=30.0, clock=time.monotonic):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.clock = clock
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self.retry_after() == 0 else "open"
+
+    def retry_after(self):
+        """Seconds until the next trial call"""
+        if self._opened_at is None:
+            return 0
+        return max(0.0, self.reset_after - (self.clock() - self._opened_at))
+
+    def allow(self):
+        state = self.state
+        if state == "half-open" and not self._trial:
+            self._trial = True
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self._consecutive += 1
+        if self._trial or self._consecutive >= self.failures:
+            self._opened_at = self.clock()
+        self._trial = False
+
+    def cancel(self):
+        """The allowed call was given up before reaching the service"""
+        self._trial = False
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per origin (scheme, host, port); bound to one event loop"""
+
+    def __init__(self, max_idle=10):
+        self.max_idle = max_idle
+        self._idle = {}
+
+    async def connect(self, origin, timeout):
+        """(reader, writer, reused): an idle connection when one is still open, else a new one"""
+        idle = self._idle.get(origin, [])
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = origin
+        context = ssl.create_default_context() if scheme == "https" else None
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=context), timeout)
+        return reader, writer, False
+
+    def release(self, origin, reader, writer):
+        idle = self._idle.setdefault(origin, [])
+        if len(idle) < self.max_idle and not writer.is_closing():
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle = {}
+
+
+class UpstreamResponse:
+    """Status and headers of a reply; its body must be consumed with iter_body() (or aclose() called)"""
+
+    def __init__(self, client, origin, reader, writer, status, headers):
+        self.client = client
+        self.origin = origin
+        self.reader = reader
+        self.writer = writer
+        self.status = status
+        self.headers = headers
+        self._closed = False
+
+    async def iter_body(self):
+        """Yields the body as it arrives; the connection goes back to the pool once it is complete"""
+        reusable = False
+        try:
+            if self.headers.get("transfer-encoding", "").lower() == "chunked":
+                async for chunk in self._chunks():
+                    yield chunk
+            elif "content-length" in self.headers:
+                remaining = int(self.headers["content-length"])
+                while remaining:
+                    chunk = await self._read(self.reader.read(min(remaining, READ_SIZE)))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+            else:
+                # Delimited by the end of the connection
+                while chunk := await self._read(self.reader.read(READ_SIZE)):
+                    yield chunk
+                return
+            reusable = self.headers.get("connection", "").lower() != "close"
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            self.client.breaker.record_failure()
+            raise
+        finally:
+            self._release(reusable)
+
+    async def read(self):
+        return b"".join([chunk async for chunk in self.iter_body()])
+
+    async def aclose(self):
+        """Drops the reply without reading its body"""
+        self._release(False)
+
+    async def _chunks(self):
+        while True:
+            size = int((await self._read(self.reader.readline())).split(b";")[0], 16)
+            chunk = await self._read(self.reader.readexactly(size + 2))
+            if size == 0:
+                return
+            yield chunk[:-2]
+
+    async def _read(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.client.timeout)
+
+    def _release(self, reusable):
+        if self._closed:
+            return
+        self._closed = True
+        if reusable:
+            self.client.pool.release(self.origin, self.reader, self.writer)
+        else:
+            self.writer.close()
+        self.client.semaphore.release()
+
+
+class ChatbotClient:
+    """
+    At most max_concurrency requests in flight (a request waits up to queue_timeout for a
+    slot); timeout applies to the connection, to the reply headers and to each body read.
+    """
+
+    def __init__(self, breaker, timeout=10.0, max_concurrency=20, queue_timeout=2.0, pool_size=10):
+        self.breaker = breaker
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.pool = ConnectionPool(pool_size)
+
+    async def post(self, url, body, content_type="application/json"):
+        """
+        Sends body to url and returns the UpstreamResponse once its headers arrived; it holds a
+        concurrency slot until its body is consumed. Raises a ChatbotError when there is no reply.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpen(self.breaker.retry_after())
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.breaker.cancel()
+            raise Busy(Busy.message) from None
+        except BaseException:
+            self.breaker.cancel()
+            raise
+
+        try:
+            response = await asyncio.wait_for(self._send(url, body, content_type), self.timeout)
+        except asyncio.TimeoutError:
+            self._failed()
+            raise UpstreamTimeout(UpstreamTimeout.message) from None
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            self._failed()
+            raise Unavailable(Unavailable.message) from e
+        except BaseException:
+            self.breaker.cancel()
+            self.semaphore.release()
+            raise
+
+        if response.status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _failed(self):
+        self.breaker.record_failure()
+        self.semaphore.release()
+
+    async def _send(self, url, body, content_type):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported chatbot URL: {url}")
+        origin = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode()
+
+        while True:
+            reader, writer, reused = await self.pool.connect(origin, self.timeout)
+            try:
+                writer.write(head + body)
+                await writer.drain()
+                status_line = await reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("connection closed by the chatbot service")
+                headers = await _read_headers(reader)
+                status = int(status_line.split()[1])
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    continue  # Idle connection closed by the service meanwhile: retry on a new one
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            return UpstreamResponse(self, origin, reader, writer, status, headers)
+
+
+async def _read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+breaker = CircuitBreaker(settings.CHATBOT_BREAKER_FAILURES, settings.CHATBOT_BREAKER_RESET)
+# Connections and semaphores belong to an event loop: one client per loop (a single one under Daphne)
+_clients = weakref.WeakKeyDictionary()
+
+
+def reset():
+    """New breaker and clients from the current settings"""
+    global breaker
+    breaker = CircuitBreaker(settings.CHATBOT_BREAKER_FAILURES, settings.CHATBOT_BREAKER_RESET)
+    _clients.clear()
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = ChatbotClient(
+            breaker,
+            timeout=settings.CHATBOT_TIMEOUT,
+            max_concurrency=settings.CHATBOT_MAX_CONCURRENCY,
+            queue_timeout=settings.CHATBOT_QUEUE_TIMEOUT,
+            pool_size=settings.CHATBOT_POOL_SIZE,
+        )
+    return client
@@ -0,0 +1,203 @@
+"""
+Chatbot reply cache
+During workshops most chatbot requests are the same few questions. Complete successful
+replies are kept in a bounded LRU with a TTL (SystemSettings chatbot_cache_size and
+chatbot_cache_ttl, size 0 disables it), keyed on the service URL and the normalized
+request body: JSON key order, whitespace and letter case do not matter.
+
+Each upstream request runs in a background task (a Call) that buffers the reply and
+replays it, as it arrives, to every request waiting on it: concurrent identical
+requests share one upstream call and all of them are still streamed. The cache and the
+calls in flight belong to the event loop, like the chatbot client.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from . import chatbot, metrics
+
+# Larger replies are relayed but not cached
+MAX_CACHED_BYTES = 64 * 1024
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def cache_key(url, data):
+    """Key of a decoded request body sent to url"""
+    normalized = json.dumps(_normalize(data), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return url, hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class Reply:
+    status: int
+    content_type: str
+    body: bytes
+
+
+class Call:
+    """One upstream request; its reply is replayed to every request waiting on it"""
+
+    def __init__(self):
+        self.status = None
+        self.content_type = None
+        self.chunks = []
+        self.finished = False
+        self.error = None
+        self._changed = asyncio.Condition()
+
+    async def run(self, client, url, body):
+        try:
+            upstream = await client.post(url, body)
+            self.status = upstream.status
+            self.content_type = upstream.headers.get("content-type", "application/json")
+            await self._notify()
+            if upstream.status >= 400:
+                await upstream.aclose()
+                return
+            async for chunk in upstream.iter_body():
+                self.chunks.append(chunk)
+                await self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+            await self._notify()
+
+    async def headers(self):
+        """Waits for the reply status; raises the ChatbotError of a call that got no reply"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.status is not None or self.finished)
+        if self.status is None:
+            if isinstance(self.error, chatbot.ChatbotError):
+                raise self.error
+            raise chatbot.ChatbotError(chatbot.ChatbotError.message) from self.error
+
+    async def replay(self):
+        """The reply body from its first chunk, as it arrives"""
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.chunks) > sent or self.finished)
+            chunks = self.chunks[sent:]
+            for chunk in chunks:
+                yield chunk
+            sent += len(chunks)
+            if self.finished and sent == len(self.chunks):
+                if self.error is not None:
+                    raise chatbot.ChatbotError("Chatbot reply interrupted") from self.error
+                return
+
+    def reply(self):
+        """Complete reply worth caching, else None"""
+        if not self.finished or self.error is not None or self.status is None or not 200 <= self.status < 300:
+            return None
+        body = b"".join(self.chunks)
+        return Reply(self.status, self.content_type, body) if len(body) <= MAX_CACHED_BYTES else None
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+
+class ReplyCache:
+    """LRU of complete replies with a time to live, and the calls in flight per key"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.calls = {}
+        self._entries = OrderedDict()  # key -> (expires at, Reply), least recently used first
+        self._tasks = set()  # the event loop only keeps weak references to tasks
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, reply = entry
+        if expires <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return reply
+
+    def put(self, key, reply, max_size, ttl):
+        self._entries[key] = (self.clock() + ttl, reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > max_size:
+            self._entries.popitem(last=False)
+
+    def start(self, client, url, body, key=None, max_size=0, ttl=0):
+        """New Call running in the background; with a key, it is shared until done and its reply cached"""
+        call = Call()
+        if key is not None:
+            self.calls[key] = call
+        task = asyncio.create_task(self._run(call, client, url, body, key, max_size, ttl))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return call
+
+    async def _run(self, call, client, url, body, key, max_size, ttl):
+        try:
+            await call.run(client, url, body)
+        finally:
+            if key is not None:
+                self.calls.pop(key, None)
+        reply = call.reply()
+        if key is not None and reply is not None:
+            self.put(key, reply, max_size, ttl)
+
+
+_caches = weakref.WeakKeyDictionary()
+
+
+def reset():
+    _caches.clear()
+
+
+def get_cache():
+    loop = asyncio.get_running_loop()
+    cache = _caches.get(loop)
+    if cache is None:
+        cache = _caches[loop] = ReplyCache()
+    return cache
+
+
+async def ask(url, body, data, max_size, ttl):
+    """
+    Reply to a chat request (body, decoded as data): a cached Reply, or a Call whose status
+    is known, either the one in flight for the same request or a new one (max_size 0 or
+    ttl 0: no caching nor sharing). Raises a ChatbotError when the service did not reply.
+    """
+    cache = get_cache()
+    if max_size <= 0 or ttl <= 0:
+        call = cache.start(chatbot.get_client(), url, body)
+    else:
+        key = cache_key(url, data)
+        reply = cache.get(key)
+        if reply is not None:
+            metrics.CHATBOT_CACHE_REQUESTS.inc(result="hit")
+            return reply
+        call = cache.calls.get(key)
+        if call is None:
+            metrics.CHATBOT_CACHE_REQUESTS.inc(result="miss")
+            call = cache.start(chatbot.get_client(), url, body, key, max_size, ttl)
+        else:
+            metrics.CHATBOT_CACHE_REQUESTS.inc(result="coalesced")
+    await call.headers()
+    return call
@@ -1,19 +1,36 @@
 import json
+import time
+from urllib.parse import parse_qs
 
 from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.core.serializers.json import DjangoJSONEncoder
 
-from . import data_utils
+from . import broadcast, deltas, metrics, snapshots
+from .query_stats import QueryStatsMixin
 
 
-class BaseDataConsumer(AsyncWebsocketConsumer):
+class BaseDataConsumer(QueryStatsMixin, AsyncWebsocketConsumer):
 
     group_name = None
+    # Key of the page in the snapshot cache
+    page = None
+    # Clients connecting with ?protocol=delta receive delta messages instead of full snapshots
+    delta_mode = False
+    # Whether this consumer is counted in the connections gauge
+    counted = False
+    # Per handled message: connect reads the snapshot version and builds the page on a cache miss
+    query_budget = 8
 
     async def connect(self):
+        # Broadcasts are flushed from this event loop
+        broadcast.scheduler.attach()
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.delta_mode = query.get("protocol") == ["delta"]
         if self.group_name:
             await self.channel_layer.group_add(self.group_name, self.channel_name)
+            metrics.WEBSOCKET_CONNECTIONS.inc(group=self.group_name)
+            self.counted = True
         await self.accept()
         # Envoyer les données initiales
         await self.send_initial_data()
@@ -21,51 +38,58 @@ class BaseDataConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         if self.group_name:
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.counted:
+            metrics.WEBSOCKET_CONNECTIONS.dec(group=self.group_name)
+            self.counted = False
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Handles client requests (resync after a sequence gap)"""
+        try:
+            message = json.loads(text_data or "{}")
+        except json.JSONDecodeError:
+            return
+        if isinstance(message, dict) and message.get("type") == "resync":
+            await self.send_initial_data()
 
     async def send_initial_data(self):
         """Envoie les données initiales au client"""
         data = await sync_to_async(self.get_data)()
-        await self.send(text_data=json.dumps(data, cls=DjangoJSONEncoder))
+        message = deltas.snapshot_message(data, await broadcast.scheduler.current_seq(self.group_name))
+        await self.send(text_data=json.dumps(message, cls=DjangoJSONEncoder))
 
     def get_data(self):
-        """Méthode à surcharger dans les classes filles"""
-        return {}
+        """Données de la page, partagées via le cache de snapshots"""
+        return snapshots.get_snapshot(self.page) if self.page else {}
 
     async def data_update(self, event):
         """Reçoit les mises à jour depuis le groupe"""
-        await self.send(text_data=json.dumps(event["data"], cls=DjangoJSONEncoder))
+        delta = event.get("delta")
+        payload = delta if self.delta_mode and delta is not None else event["data"]
+        await self.send(text_data=json.dumps(payload, cls=DjangoJSONEncoder))
+        if "sent_at" in event:
+            metrics.MESSAGE_LATENCY_SECONDS.observe(max(0.0, time.time() - event["sent_at"]), group=self.group_name)
 
 
 class DashboardConsumer(BaseDataConsumer):
     group_name = "dashboard_updates"
-
-    def get_data(self):
-        return data_utils.get_dashboard_data_dict()
+    page = "dashboard"
 
 
 class HardwareConsumer(BaseDataConsumer):
     group_name = "hardware_updates"
-
-    def get_data(self):
-        return data_utils.get_hardware_data_dict()
+    page = "hardware"
 
 
 class EnergyConsumer(BaseDataConsumer):
     group_name = "energy_updates"
-
-    def get_data(self):
-        return data_utils.get_energy_data_dict()
+    page = "energy"
 
 
 class NetworkConsumer(BaseDataConsumer):
     group_name = "network_updates"
-
-    def get_data(self):
-        return data_utils.get_network_data_dict()
+    page = "network"
 
 
 class ScoresConsumer(BaseDataConsumer):
     group_name = "scores_updates"
-
-    def get_data(self):
-        return data_utils.get_scores_data_dict()
+    page = "scores"
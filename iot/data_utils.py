@@ -1,5 +1,12 @@
+import base64
+import binascii
 import json
+import operator
+from datetime import datetime
 
+from django.db.models import Avg, Q
+
+from . import aggregates
 from .models import IoTData
 
 
@@ -9,16 +16,9 @@ def get_latest_iot_data(limit=8):
 
 
 def calculate_averages(all_data, fields):
-    """Calcule les moyennes pour une liste de champs"""
-    if not all_data.exists():
-        return {field: 0 for field in fields}
-
-    count = all_data.count()
-    averages = {}
-    for field in fields:
-        total = sum(getattr(data, field) for data in all_data)
-        averages[field] = round(total / count, 1)
-    return averages
+    """Calcule les moyennes pour une liste de champs (agrégation SQL, sans itérer les lignes)"""
+    result = all_data.aggregate(**{field: Avg(field) for field in fields})
+    return {field: round(value, 1) if value is not None else 0 for field, value in result.items()}
 
 
 def prepare_chart_data(latest_data, field_mappings):
@@ -73,10 +73,9 @@ def get_dashboard_data_dict():
 def get_hardware_data_dict():
     """Prépare les données pour l'interface hardware"""
     latest_data = get_latest_iot_data()
-    all_data = IoTData.objects.all()
 
     avg_fields = ["cpu_usage", "ram_usage", "battery_health", "age_years"]
-    averages = calculate_averages(all_data, avg_fields)
+    averages = aggregates.get_averages(avg_fields)
 
     field_mappings = {
         "cpu_data": "cpu_usage",
@@ -116,10 +115,9 @@ def get_hardware_data_dict():
 def get_energy_data_dict():
     """Prépare les données pour l'interface energy"""
     latest_data = get_latest_iot_data()
-    all_data = IoTData.objects.all()
 
     avg_fields = ["power_watts", "co2_equiv_g", "overheating", "active_devices"]
-    averages = calculate_averages(all_data, avg_fields)
+    averages = aggregates.get_averages(avg_fields)
 
     field_mappings = {
         "power_data": "power_watts",
@@ -159,10 +157,9 @@ def get_energy_data_dict():
 def get_network_data_dict():
     """Prépare les données pour l'interface network"""
     latest_data = get_latest_iot_data()
-    all_data = IoTData.objects.all()
 
     avg_fields = ["network_load_mbps", "requests_per_min", "cloud_dependency_score"]
-    averages = calculate_averages(all_data, avg_fields)
+    averages = aggregates.get_averages(avg_fields)
 
     field_mappings = {
         "network_load_data": "network_load_mbps",
@@ -198,10 +195,9 @@ def get_network_data_dict():
 def get_scores_data_dict():
     """Prépare les données pour l'interface scores"""
     latest_data = get_latest_iot_data()
-    all_data = IoTData.objects.all()
 
     avg_fields = ["eco_score", "obsolescence_score", "bigtech_dependency", "co2_savings_kg_year"]
-    averages = calculate_averages(all_data, avg_fields)
+    averages = aggregates.get_averages(avg_fields)
 
     field_mappings = {
         "eco_data": "eco_score",
@@ -277,6 +273,33 @@ def serialize_iot_data(data):
     }
 
 
+def serialize_history_row(data):
+    """
+    Serializes an IoTData row for the history tables.
+    Manual dict creation (faster than model_to_dict), union of the fields needed by every table.
+    """
+    return {
+        "id": data.id,
+        "hardware_sensor_id": data.hardware_sensor_id,
+        "cpu_usage": data.cpu_usage,
+        "ram_usage": data.ram_usage,
+        "power_watts": data.power_watts,
+        "eco_score": data.eco_score,
+        "co2_equiv_g": data.co2_equiv_g,
+        "battery_health": data.battery_health,
+        "age_years": data.age_years,
+        "overheating": data.overheating,
+        "active_devices": data.active_devices,
+        "network_load_mbps": data.network_load_mbps,
+        "requests_per_min": data.requests_per_min,
+        "cloud_dependency_score": data.cloud_dependency_score,
+        "obsolescence_score": data.obsolescence_score,
+        "bigtech_dependency": data.bigtech_dependency,
+        "co2_savings_kg_year": data.co2_savings_kg_year,
+        "created_at": data.created_at.isoformat(),
+    }
+
+
 def get_paginated_iot_data(page_number=1, limit=8):
     """
     Retrieves paginated IoT data.
@@ -308,35 +331,7 @@ def get_paginated_iot_data(page_number=1, limit=8):
         }
 
     # Serialize the data
-    serialized_data = []
-    for data in page_obj:
-        # We use a simplified serialization for tables to keep it lighter if needed,
-        # but for consistency we can use the full serializer or a specific one.
-        # Let's use the individual getters from existing functions logic to ensure consistency with WebSocket
-        # or just reuse the manual dict creation which is faster than model_to_dict
-        serialized_data.append(
-            {
-                "id": data.id,
-                "hardware_sensor_id": data.hardware_sensor_id,
-                "cpu_usage": data.cpu_usage,
-                "ram_usage": data.ram_usage,
-                "power_watts": data.power_watts,
-                "eco_score": data.eco_score,
-                "co2_equiv_g": data.co2_equiv_g,
-                # Add other specific fields needed for other tables (union of all needed fields)
-                "battery_health": data.battery_health,
-                "age_years": data.age_years,
-                "overheating": data.overheating,
-                "active_devices": data.active_devices,
-                "network_load_mbps": data.network_load_mbps,
-                "requests_per_min": data.requests_per_min,
-                "cloud_dependency_score": data.cloud_dependency_score,
-                "obsolescence_score": data.obsolescence_score,
-                "bigtech_dependency": data.bigtech_dependency,
-                "co2_savings_kg_year": data.co2_savings_kg_year,
-                "created_at": data.created_at.isoformat(),
-            }
-        )
+    serialized_data = [serialize_history_row(data) for data in page_obj]
 
     return {
         "data": serialized_data,
@@ -352,18 +347,79 @@ def get_paginated_iot_data(page_number=1, limit=8):
     }
 
 
-def calculate_quiz_score(answers, questions):
+def encode_cursor(data, direction):
+    """Opaque cursor pointing at a row: base64 of its (created_at, id) and the direction"""
+    payload = json.dumps({"t": data.created_at.isoformat(), "i": data.id, "d": direction})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns (created_at, id, direction), raises ValueError for a malformed cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["t"]), int(payload["i"]), direction
+    except (KeyError, TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def get_cursor_paginated_iot_data(cursor=None, limit=8, include_total=False):
     """
-    Calculates the score and percentage for a list of answers.
-    Returns a tuple (score, total, percentage).
+    Keyset pagination over (created_at, id), newest first.
+    Every page is an index range scan on iot_iotdata_created_id_idx, so deep pages cost
+    the same as the first one. The total is estimated from the running aggregates unless
+    include_total asks for an exact COUNT(*).
     """
-    score = 0
-    total = len(questions)
-    comparable_count = min(len(answers), total)
+    queryset = IoTData.objects.all()
+    direction = "next"
+
+    if cursor:
+        created_at, row_id, direction = decode_cursor(cursor)
+        # The redundant bound on created_at lets SQLite seek the index; the OR alone is a full index scan
+        if direction == "next":
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=row_id), created_at__lte=created_at
+            )
+        else:
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=row_id), created_at__gte=created_at
+            )
+
+    if direction == "next":
+        rows = list(queryset.order_by("-created_at", "-id")[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        has_next, has_previous = has_more, cursor is not None
+    else:
+        rows = list(queryset.order_by("created_at", "id")[: limit + 1])
+        has_more = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        has_next, has_previous = True, has_more
+
+    meta = {
+        "limit": limit,
+        "has_next": has_next and bool(rows),
+        "has_previous": has_previous and bool(rows),
+        "next_cursor": encode_cursor(rows[-1], "next") if has_next and rows else None,
+        "prev_cursor": encode_cursor(rows[0], "prev") if has_previous and rows else None,
+        "estimated_total": aggregates.get_row_count(),
+    }
+    if include_total:
+        meta["total_items"] = IoTData.objects.count()
 
-    for i in range(comparable_count):
-        if answers[i] == questions[i].correct_answer:
-            score += 1
+    return {"data": [serialize_history_row(data) for data in rows], "meta": meta}
 
+
+def calculate_quiz_score(answers, answer_key):
+    """
+    Calculates the score and percentage for a list of answers against the correct
+    option index of each question (extra answers are ignored).
+    Returns a tuple (score, total, percentage).
+    """
+    total = len(answer_key)
+    score = sum(map(operator.eq, answers, answer_key))
     percentage = (score / total) * 100 if total > 0 else 0
     return score, total, percentage
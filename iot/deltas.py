@@ -0,0 +1,83 @@
+"""
+Delta WebSocket protocol (opt-in with ws/<page>/?protocol=delta)
+
+Snapshot: the full page dict plus {"type": "snapshot", "version", "seq"}
+Delta:    {"type": "delta", "version", "seq", "window", "append", "evict", "aggregates"}
+          append: new chart points in chronological order, with their table row
+          evict: ids of the points that left the chart window
+          aggregates: only the avg_* values that changed
+
+A client that sees a gap in seq sends {"type": "resync"} and receives a fresh snapshot.
+"""
+
+import json
+
+PROTOCOL_VERSION = 1
+
+
+def snapshot_message(snapshot, seq):
+    """Wraps a page dict as a full snapshot message"""
+    return {**snapshot, "type": "snapshot", "version": PROTOCOL_VERSION, "seq": seq}
+
+
+def _series_keys(snapshot):
+    """Chart series of a page dict (JSON-encoded lists such as cpu_data)"""
+    return [key for key, value in snapshot.items() if key.endswith("_data") and isinstance(value, str)]
+
+
+def _points(snapshot):
+    """Returns the chart points of a page dict in chronological order, keyed by row id"""
+    labels = json.loads(snapshot["chart_labels"])
+    series = {key: json.loads(snapshot[key]) for key in _series_keys(snapshot)}
+    rows = list(reversed(snapshot["latest_data"]))
+
+    return [
+        {
+            "id": row["id"],
+            "label": labels[index],
+            "values": {key: values[index] for key, values in series.items()},
+            "row": row,
+        }
+        for index, row in enumerate(rows)
+    ]
+
+
+def build_delta(previous, current, seq):
+    """
+    Builds the delta message going from the previous to the current page dict.
+    Returns None when the change is not a plain append/evict (first message,
+    deleted rows...) and only a full snapshot can describe it.
+    """
+    if previous is None:
+        return None
+
+    try:
+        old_points = _points(previous)
+        new_points = _points(current)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+    old_ids = [point["id"] for point in old_points]
+    new_ids = [point["id"] for point in new_points]
+    known_ids = set(old_ids)
+    current_ids = set(new_ids)
+
+    evicted = [point_id for point_id in old_ids if point_id not in current_ids]
+    appended = [point for point in new_points if point["id"] not in known_ids]
+
+    # Remaining points followed by the appended ones must give the new window
+    kept = [point_id for point_id in old_ids if point_id in current_ids]
+    if kept + [point["id"] for point in appended] != new_ids:
+        return None
+
+    aggregates = {key: value for key, value in current.items() if key.startswith("avg_") and previous.get(key) != value}
+
+    return {
+        "type": "delta",
+        "version": PROTOCOL_VERSION,
+        "seq": seq,
+        "window": len(new_points),
+        "append": appended,
+        "evict": evicted,
+        "aggregates": aggregates,
+    }
@@ -0,0 +1,122 @@
+"""
+Streaming export of raw IoTData (CSV or JSON Lines, optionally gzipped)
+Rows are read in keyset chunks over the (created_at, id) index and encoded into
+~64 KB pieces, so memory stays constant whatever the number of rows exported.
+Under ASGI the pieces are produced one by one through sync_to_async (aiter_pieces):
+Django would otherwise consume a sync iterator entirely before sending anything.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import IoTData
+
+EXPORT_COLUMNS = [field.attname for field in IoTData._meta.concrete_fields]
+SENSOR_ID_FIELDS = ("hardware_sensor_id", "energy_sensor_id", "network_sensor_id")
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+# Encoded bytes buffered before a piece is handed to the response or file
+PIECE_SIZE = 64 * 1024
+
+
+def export_queryset(start=None, end=None, sensor=None):
+    """Readings of [start, end), optionally limited to one sensor id (any sensor kind)"""
+    queryset = IoTData.objects.all()
+    if start is not None:
+        queryset = queryset.filter(created_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__lt=end)
+    if sensor:
+        queryset = queryset.filter(Q(hardware_sensor_id=sensor) | Q(energy_sensor_id=sensor) | Q(network_sensor_id=sensor))
+    return queryset
+
+
+def iter_rows(queryset, columns, chunk_size=2000):
+    """
+    Yields value tuples in (created_at, id) order, one short query per chunk.
+    A keyset walk instead of one long-lived cursor: SQLite would otherwise hold its
+    read lock (and block writers' commits) for the whole export.
+    """
+    fields = list(columns) + [name for name in ("created_at", "id") if name not in columns]
+    created_index, id_index = fields.index("created_at"), fields.index("id")
+    ordered = queryset.order_by("created_at", "id")
+    last = None
+    while True:
+        page = ordered
+        if last is not None:
+            # The redundant bound lets SQLite seek to the last row; the OR alone rescans the index
+            page = page.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1]), created_at__gte=last[0])
+        rows = list(page.values_list(*fields)[:chunk_size])
+        for row in rows:
+            yield row[: len(columns)]
+        if len(rows) < chunk_size:
+            return
+        last = (rows[-1][created_index], rows[-1][id_index])
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def iter_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= PIECE_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_jsonl(rows, columns):
+    pieces = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+        pieces.append(line)
+        size += len(line)
+        if size >= PIECE_SIZE:
+            yield "".join(pieces).encode()
+            pieces, size = [], 0
+    yield "".join(pieces).encode()
+
+
+def gzip_pieces(pieces, level=6):
+    """Compresses a byte stream on the fly into a gzip file stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(fmt, columns=None, compress=False, chunk_size=2000, **filters):
+    """Byte pieces of an export; filters are passed to export_queryset"""
+    columns = columns or EXPORT_COLUMNS
+    rows = iter_rows(export_queryset(**filters), columns, chunk_size)
+    pieces = iter_csv(rows, columns) if fmt == "csv" else iter_jsonl(rows, columns)
+    return gzip_pieces(pieces) if compress else pieces
+
+
+async def aiter_pieces(pieces):
+    """Async iterator over a piece stream; each piece (and the keyset query it needs) is produced in the ORM thread"""
+    iterator = iter(pieces)
+    end = object()
+    while (piece := await sync_to_async(next)(iterator, end)) is not end:
+        yield piece
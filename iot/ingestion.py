@@ -0,0 +1,207 @@
+"""
+Ingestion pipeline for IoT readings
+Shared by the single and bulk ingestion endpoints
+"""
+
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import aggregates, broadcast, metrics, rollups, sensors, write_behind
+from .models import IoTData
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
+
+def build_iot_data(data):
+    """
+    Builds an unsaved IoTData instance from a sensor payload.
+    Each section accepts the nested format ({"hardware": {...}}) or flat root keys.
+    """
+    hardware_data = data.get("hardware", data)
+    energy_data = data.get("energy", data)
+    network_data = data.get("network", data)
+    scores_data = data.get("scores", data)
+
+    return IoTData(
+        # Hardware fields - try nested first, then root
+        hardware_sensor_id=hardware_data.get("sensor_id", data.get("hardware_sensor_id", "unknown")),
+        hardware_timestamp=hardware_data.get("timestamp", data.get("hardware_timestamp", 0)),
+        age_years=hardware_data.get("age_years", data.get("age_years", 0)),
+        cpu_usage=hardware_data.get("cpu_usage", data.get("cpu_usage", 0)),
+        ram_usage=hardware_data.get("ram_usage", data.get("ram_usage", 0)),
+        battery_health=hardware_data.get("battery_health", data.get("battery_health", 0)),
+        os=hardware_data.get("os", data.get("os", "unknown")),
+        win11_compat=hardware_data.get("win11_compat", data.get("win11_compat", False)),
+        # Energy fields
+        energy_sensor_id=energy_data.get("sensor_id", data.get("energy_sensor_id", "unknown")),
+        energy_timestamp=energy_data.get("timestamp", data.get("energy_timestamp", 0)),
+        power_watts=energy_data.get("power_watts", data.get("power_watts", 0)),
+        active_devices=energy_data.get("active_devices", data.get("active_devices", 0)),
+        overheating=energy_data.get("overheating", data.get("overheating", 0)),
+        co2_equiv_g=energy_data.get("co2_equiv_g", data.get("co2_equiv_g", 0)),
+        # Network fields
+        network_sensor_id=network_data.get("sensor_id", data.get("network_sensor_id", "unknown")),
+        network_timestamp=network_data.get("timestamp", data.get("network_timestamp", 0)),
+        network_load_mbps=network_data.get("network_load_mbps", data.get("network_load_mbps", 0)),
+        requests_per_min=network_data.get("requests_per_min", data.get("requests_per_min", 0)),
+        cloud_dependency_score=network_data.get("cloud_dependency_score", data.get("cloud_dependency_score", 0)),
+        # Scores from nested object or root
+        eco_score=scores_data.get("eco_score", 0),
+        obsolescence_score=scores_data.get("obsolescence_score", 0),
+        bigtech_dependency=scores_data.get("bigtech_dependency", 0),
+        co2_savings_kg_year=scores_data.get("co2_savings_kg_year", 0),
+        recommendations=scores_data.get("recommendations", {}),
+    )
+
+
+def _parse_ndjson(text):
+    """Decodes one JSON document per non-empty line, keeping per-line errors"""
+    items = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append((json.loads(line), None))
+        except json.JSONDecodeError as e:
+            items.append((None, f"Invalid JSON: {e.msg}"))
+    return items
+
+
+def parse_batch(body, content_type=""):
+    """
+    Parses a batch body (JSON array or newline-delimited JSON).
+    Returns a list of (payload, error) tuples, one per item.
+    Raises json.JSONDecodeError when the body is neither.
+    """
+    text = body.decode("utf-8") if isinstance(body, bytes) else body
+
+    if content_type.split(";")[0].strip() in NDJSON_CONTENT_TYPES:
+        return _parse_ndjson(text)
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # NDJSON sent without the proper content type
+        if "\n" in text.strip():
+            return _parse_ndjson(text)
+        raise
+
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise json.JSONDecodeError("Expected a JSON array or object", text, 0)
+    return [(item, None) for item in data]
+
+
+def validate_item(payload):
+    """Builds and validates one batch item, returns (instance, error)"""
+    if not isinstance(payload, dict):
+        return None, "Item must be a JSON object"
+
+    try:
+        instance = build_iot_data(payload)
+        instance.clean_fields()
+    except ValidationError as e:
+        return None, "; ".join(f"{field}: {', '.join(errors)}" for field, errors in e.message_dict.items())
+    except (AttributeError, TypeError, ValueError) as e:
+        return None, str(e)
+    return instance, None
+
+
+def validate_batch(items):
+    """
+    Validates parsed batch items.
+    Returns (instances, results): the instances to save and one status dict per item.
+    Created items keep a reference to their instance until the ids are known.
+    """
+    instances = []
+    results = []
+    for index, (payload, error) in enumerate(items):
+        instance = None
+        if error is None:
+            instance, error = validate_item(payload)
+        if error is None:
+            instances.append(instance)
+            results.append({"index": index, "status": "created", "instance": instance})
+        else:
+            results.append({"index": index, "status": "error", "error": error})
+    return instances, results
+
+
+def persist_readings(instances):
+    """
+    Saves IoTData instances with chunked bulk_create inside one transaction.
+    Running aggregates, time rollups and sensor states are updated in the same transaction.
+    Returns the saved instances (with their ids).
+    """
+    if not instances:
+        return []
+
+    with metrics.INGEST_INSERT_SECONDS.time(), transaction.atomic():
+        created = IoTData.objects.bulk_create(instances, batch_size=settings.IOT_BULK_CHUNK_SIZE)
+        aggregates.record_readings(created)
+        rollups.record_readings(created)
+        sensors.record_readings(created)
+    metrics.INGEST_READINGS.inc(len(created))
+    return created
+
+
+def broadcast_updates():
+    """
+    Schedules a refresh of every WebSocket group once the current transaction commits.
+    The broadcast scheduler coalesces refreshes, so callers never wait for the snapshots.
+    """
+    transaction.on_commit(broadcast.scheduler.mark_dirty)
+
+
+async def apersist_readings(instances):
+    """
+    Async counterpart of persist_readings + broadcast_updates for async views.
+    The inserts run in a single thread hop (a transaction cannot span several async ORM calls),
+    then the broadcast scheduler is woken directly on the running event loop.
+    """
+    created = await sync_to_async(persist_readings)(instances)
+    if created:
+        broadcast.scheduler.attach()
+        broadcast.scheduler.mark_dirty()
+    return created
+
+
+def _write_payloads(payloads):
+    """Write-behind flush: saves queued payloads as one batch and schedules a broadcast"""
+    persist_readings([build_iot_data(payload) for payload in payloads])
+    broadcast_updates()
+
+
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind():
+    """Process-wide journaled writer, started (and its leftover journals replayed) on first use"""
+    global _write_behind
+    with _write_behind_lock:
+        if _write_behind is None:
+            _write_behind = write_behind.JournaledWriter(
+                _write_payloads,
+                settings.IOT_WRITE_BEHIND_DIR,
+                fsync=settings.IOT_WRITE_BEHIND_FSYNC,
+                interval=settings.IOT_WRITE_BEHIND_INTERVAL,
+                max_items=settings.IOT_WRITE_BEHIND_MAX_ROWS,
+                name="iot-write-behind",
+            )
+            _write_behind.start()
+        return _write_behind
+
+
+def enqueue_readings(payloads):
+    """
+    Write-behind mode (IOT_WRITE_BEHIND): journals validated payloads and returns immediately.
+    They are saved with bulk_create by the background flusher within IOT_WRITE_BEHIND_INTERVAL.
+    """
+    get_write_behind().submit(payloads)
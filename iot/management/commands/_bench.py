@@ -0,0 +1,122 @@
+"""
+Shared helpers for the benchmark commands
+Benchmarks run against a throw-away test database, never the configured one.
+"""
+
+import math
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from iot import ingestion
+from iot.models import IoTData
+
+
+@contextmanager
+def temporary_database(verbosity=0):
+    """
+    Creates a migrated test database for the duration of the block, then destroys it.
+    The test environment is set up too, so the in-process test clients are accepted (ALLOWED_HOSTS).
+    """
+    old_name = connection.settings_dict["NAME"]
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def sample_payload(index):
+    """Deterministic flat sensor payload"""
+    return {
+        "hardware_sensor_id": f"BENCH_{index % 16:02d}",
+        "hardware_timestamp": 1700000000 + index,
+        "cpu_usage": index % 100,
+        "ram_usage": (index * 7) % 100,
+        "battery_health": 80.5,
+        "power_watts": 100 + index % 150,
+        "active_devices": index % 12,
+        "co2_equiv_g": 200 + index % 300,
+        "network_load_mbps": index % 500,
+        "requests_per_min": index % 1000,
+        "eco_score": 100 - index % 80,
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (ms) of a run"""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+def timing_stats(durations):
+    """min/median/mean/max (ms) of repeated runs"""
+    return {
+        "runs": len(durations),
+        "min_ms": round(min(durations) * 1000, 3),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3),
+    }
+
+
+def time_calls(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return timing_stats(durations)
+
+
+@contextmanager
+def explicit_created_at():
+    """Lets seeded rows keep the created_at they were given instead of auto_now_add"""
+    field = IoTData._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed_readings(target, batch_size=5000):
+    """
+    Adds synthetic readings (one per second, ending now) through the ingestion pipeline
+    until the table holds `target` rows. Returns the number of rows added.
+    """
+    existing = IoTData.objects.count()
+    missing = max(0, target - existing)
+    first = timezone.now() - timedelta(seconds=target)
+    with explicit_created_at():
+        for start in range(existing, existing + missing, batch_size):
+            instances = []
+            for index in range(start, min(start + batch_size, existing + missing)):
+                instance = ingestion.build_iot_data(sample_payload(index))
+                instance.created_at = first + timedelta(seconds=index)
+                instances.append(instance)
+            ingestion.persist_readings(instances)
+    return missing
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from iot.rollups import RESOLUTIONS, backfill_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the minute/hour/day rollups of IoTData from the raw table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resolution",
+            action="append",
+            choices=list(RESOLUTIONS),
+            help="Resolution to rebuild (repeatable, all by default)",
+        )
+        parser.add_argument("--since", help="Only rebuild buckets from this ISO 8601 datetime onwards")
+        parser.add_argument("--batch-size", type=int, default=500, help="Buckets written per INSERT batch")
+
+    def handle(self, *args, **kwargs):
+        since = None
+        if kwargs["since"]:
+            since = parse_datetime(kwargs["since"])
+            if since is None:
+                raise CommandError(f"Invalid --since datetime: {kwargs['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        written = backfill_rollups(kwargs["resolution"], since, kwargs["batch_size"])
+        for resolution, buckets in written.items():
+            self.stdout.write(self.style.SUCCESS(f"{resolution}: {buckets} buckets rebuilt"))
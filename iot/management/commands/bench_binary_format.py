@@ -0,0 +1,124 @@
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from iot import binary_format, ingestion
+
+from ._bench import sample_payload, temporary_database, time_calls
+
+
+def per_call_us(func, number):
+    """Best of 5 runs of `number` calls, in microseconds per call"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def nested_payload(index):
+    """The nested JSON document the ESP32 firmware sends (every IoTData field)"""
+    flat = sample_payload(index)
+    return {
+        "hardware": {
+            "sensor_id": flat["hardware_sensor_id"],
+            "timestamp": flat["hardware_timestamp"],
+            "age_years": 3,
+            "cpu_usage": flat["cpu_usage"],
+            "ram_usage": flat["ram_usage"],
+            "battery_health": flat["battery_health"],
+            "os": "Windows 10",
+            "win11_compat": False,
+        },
+        "energy": {
+            "sensor_id": "ENERGY_01",
+            "timestamp": flat["hardware_timestamp"],
+            "power_watts": flat["power_watts"],
+            "active_devices": flat["active_devices"],
+            "overheating": 0,
+            "co2_equiv_g": flat["co2_equiv_g"],
+        },
+        "network": {
+            "sensor_id": "NETWORK_01",
+            "timestamp": flat["hardware_timestamp"],
+            "network_load_mbps": flat["network_load_mbps"],
+            "requests_per_min": flat["requests_per_min"],
+            "cloud_dependency_score": 60,
+        },
+        "scores": {
+            "eco_score": flat["eco_score"],
+            "obsolescence_score": 40,
+            "bigtech_dependency": 70,
+            "co2_savings_kg_year": 12,
+        },
+    }
+
+
+def flatten(nested):
+    """Flat IoTData values of a nested payload (what the device packs into a binary record)"""
+    instance = ingestion.build_iot_data(nested)
+    return {field: getattr(instance, field) for field in binary_format.LAYOUTS[binary_format.CURRENT_VERSION][1]}
+
+
+class Command(BaseCommand):
+    help = "Compare parse cost and bytes on the wire of the JSON and binary ingestion formats (temporary database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=2000, help="Decodes timed per format and batch size")
+        parser.add_argument("--batch", type=int, default=100, help="Readings per bulk body")
+        parser.add_argument("--posts", type=int, default=200, help="POSTs sent to /api/iot-data/ per format")
+
+    def handle(self, *args, **kwargs):
+        with temporary_database():
+            device_id, _ = binary_format.register_device(
+                {
+                    "hardware_sensor_id": "BENCH_00",
+                    "energy_sensor_id": "ENERGY_01",
+                    "network_sensor_id": "NETWORK_01",
+                    "os": "Windows 10",
+                }
+            )
+            documents = [nested_payload(index) for index in range(kwargs["batch"])]
+            bodies = {
+                "json": [json.dumps(document, separators=(",", ":")).encode() for document in documents],
+                "binary": [binary_format.encode(flatten(document), device_id) for document in documents],
+            }
+            batches = {
+                "json": json.dumps(documents, separators=(",", ":")).encode(),
+                "binary": b"".join(bodies["binary"]),
+            }
+            # (decode only, decode + IoTData instances)
+            parsers = {
+                "json": (json.loads, lambda body: [ingestion.build_iot_data(item) for item in _as_list(json.loads(body))]),
+                "binary": (
+                    binary_format.decode,
+                    lambda body: [binary_format.build_instance(item) for item in binary_format.decode(body)],
+                ),
+            }
+
+            self.stdout.write(
+                f"{'format':>6} {'bytes/reading':>14} {'decode (us)':>12} {'decode+build (us)':>18} "
+                f"{'batch decode/reading (us)':>26} {'batch decode+build/reading (us)':>32}"
+            )
+            batch_repeat = max(1, kwargs["repeat"] // kwargs["batch"])
+            for name, (decode, parse) in parsers.items():
+                timings = [
+                    per_call_us(lambda: decode(bodies[name][0]), kwargs["repeat"]),
+                    per_call_us(lambda: parse(bodies[name][0]), kwargs["repeat"]),
+                    per_call_us(lambda: decode(batches[name]), batch_repeat) / kwargs["batch"],
+                    per_call_us(lambda: parse(batches[name]), batch_repeat) / kwargs["batch"],
+                ]
+                self.stdout.write(
+                    f"{name:>6} {len(bodies[name][0]):>14} {timings[0]:>12.2f} {timings[1]:>18.2f} "
+                    f"{timings[2]:>26.2f} {timings[3]:>32.2f}"
+                )
+
+            client = Client()
+            url = reverse("iot_data_post")
+            content_types = {"json": "application/json", "binary": binary_format.CONTENT_TYPE}
+            for name, content_type in content_types.items():
+                posts = time_calls(lambda: client.post(url, bodies[name][0], content_type=content_type), kwargs["posts"])
+                self.stdout.write(f"{name:>6} POST /api/iot-data/: median {posts['median_ms']} ms, max {posts['max_ms']} ms")
+
+
+def _as_list(data):
+    return data if isinstance(data, list) else [data]
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.urls import reverse
+
+from iot import broadcast
+
+from ._bench import sample_payload, summarize, temporary_database
+
+
+class Command(BaseCommand):
+    help = "Compare the sync and async ingestion views through the ASGI handler (uses a temporary database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="POSTs sent to each endpoint")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at the same time")
+
+    def handle(self, *args, **kwargs):
+        with temporary_database():
+            for name, url_name in (("sync", "iot_data_post"), ("async", "iot_data_post_async")):
+                result = async_to_sync(self.run_endpoint)(reverse(url_name), kwargs["requests"], kwargs["concurrency"])
+                self.stdout.write(
+                    f"{name:>5}: {result['requests']} req in {result['elapsed_s']}s "
+                    f"({result['throughput_rps']} req/s) p50={result['p50_ms']}ms "
+                    f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}"
+                )
+
+    async def run_endpoint(self, path, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def post(index):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(path, json.dumps(sample_payload(index)), content_type="application/json")
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 201
+
+        # Both paths pay for the coalesced WebSocket refreshes
+        broadcast.scheduler.attach()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(post(index) for index in range(requests)))
+        finally:
+            elapsed = time.perf_counter() - started
+            broadcast.scheduler.detach()
+
+        return {**summarize(latencies, elapsed), "errors": errors}
@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from iot.retention import RESOLUTIONS, compact_readings, plan_compaction, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Compact raw IoTData older than the retention period into per-sensor buckets, then delete it in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Retention period in days (default: IOT_RETENTION_DAYS)")
+        parser.add_argument("--bucket", choices=RESOLUTIONS, default="hour", help="Size of the compacted buckets")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows compacted and deleted per transaction")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to wait between chunks")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be compacted")
+
+    def handle(self, *args, **kwargs):
+        days = settings.IOT_RETENTION_DAYS if kwargs["days"] is None else kwargs["days"]
+        if days < 0 or kwargs["chunk_size"] < 1:
+            raise CommandError("--days must be positive and --chunk-size at least 1")
+
+        cutoff = retention_cutoff(days, kwargs["bucket"])
+        self.stdout.write(f"Compacting readings created before {cutoff.isoformat()} into {kwargs['bucket']} buckets")
+
+        if kwargs["dry_run"]:
+            plan = plan_compaction(cutoff, kwargs["bucket"])
+            self.stdout.write(
+                f"Dry run: {plan['rows']} rows from {plan['sensors']} sensors would become {plan['buckets']} "
+                f"compacted buckets (oldest {plan['oldest']}, newest {plan['newest']})"
+            )
+            return
+
+        self._last_report = 0.0
+        result = compact_readings(
+            cutoff,
+            resolution=kwargs["bucket"],
+            chunk_size=kwargs["chunk_size"],
+            pause=kwargs["pause"],
+            progress=self.report_progress if kwargs["verbosity"] > 0 else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['rows']} rows compacted into {result['buckets']} buckets in {result['elapsed']:.2f}s "
+                f"({result['rows_per_second']:.0f} rows/s)"
+            )
+        )
+
+    def report_progress(self, done, total, elapsed):
+        """At most one line per second, plus the last chunk"""
+        now = time.monotonic()
+        if done < total and now - self._last_report < 1:
+            return
+        self._last_report = now
+        percent = 100 * done / total if total else 100
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(f"  {done}/{total} rows ({percent:.1f}%), {rate:.0f} rows/s")
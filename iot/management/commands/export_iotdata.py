@@ -0,0 +1,61 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from iot.export import CONTENT_TYPES, EXPORT_COLUMNS, export_stream
+
+
+class Command(BaseCommand):
+    help = "Stream raw IoTData as CSV or JSON Lines (optionally gzipped) with constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(CONTENT_TYPES), default="csv")
+        parser.add_argument("--output", "-o", help="Output file (default: standard output)")
+        parser.add_argument("--start", help="Only readings created at or after this ISO 8601 datetime")
+        parser.add_argument("--end", help="Only readings created before this ISO 8601 datetime")
+        parser.add_argument("--sensor", help="Only readings of this sensor id")
+        parser.add_argument("--columns", help="Comma-separated columns (default: all)")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output")
+        parser.add_argument("--chunk-size", type=int, default=settings.IOT_EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **kwargs):
+        columns = [column for column in (kwargs["columns"] or "").split(",") if column] or None
+        unknown = set(columns or []) - set(EXPORT_COLUMNS)
+        if unknown:
+            raise CommandError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+        stream = export_stream(
+            kwargs["format"],
+            columns=columns,
+            compress=kwargs["gzip"],
+            chunk_size=kwargs["chunk_size"],
+            start=self.parse_time(kwargs["start"]),
+            end=self.parse_time(kwargs["end"]),
+            sensor=kwargs["sensor"],
+        )
+
+        output = open(kwargs["output"], "wb") if kwargs["output"] else sys.stdout.buffer
+        written = 0
+        try:
+            for piece in stream:
+                output.write(piece)
+                written += len(piece)
+        finally:
+            if kwargs["output"]:
+                output.close()
+            else:
+                output.flush()
+
+        if kwargs["output"]:
+            self.stdout.write(self.style.SUCCESS(f"{written} bytes written to {kwargs['output']}"))
+
+    def parse_time(self, value):
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            raise CommandError(f"Invalid datetime: {value}")
+        return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from iot.aggregates import NUMERIC_FIELDS, get_stats, rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuild the running IoTData aggregates (count, sum, min, max, sum of squares) from the raw table"
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"Aggregates rebuilt from {rows} rows"))
+
+        if kwargs["verbosity"] > 1:
+            for field, stats in get_stats(NUMERIC_FIELDS).items():
+                self.stdout.write(
+                    f"  {field}: mean={stats['mean']:.2f} min={stats['min']} max={stats['max']} stddev={stats['stddev']:.2f}"
+                )
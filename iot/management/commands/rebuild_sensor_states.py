@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from iot.sensors import rebuild_sensor_states
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-sensor latest state table (SensorState) from the raw IoTData table"
+
+    def handle(self, *args, **kwargs):
+        sensors = rebuild_sensor_states()
+        self.stdout.write(self.style.SUCCESS(f"{sensors} sensor states rebuilt"))
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import math
+import platform
+import sqlite3
+import time
+
+import django
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from iot import broadcast, data_utils, snapshots
+from iot.consumers import DashboardConsumer
+from iot.models import IoTData
+
+from ._bench import sample_payload, seed_readings, temporary_database, time_calls, timing_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Time data_utils page builders, history pagination, iot_data_post and WebSocket fan-out "
+        "on synthetic data sets (temporary database) and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="Row counts to seed")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+        parser.add_argument("--posts", type=int, default=50, help="iot_data_post requests per data set")
+        parser.add_argument("--clients", type=int, default=50, help="WebSocket clients for the fan-out measurement")
+        parser.add_argument("--label", default="", help="Free text stored with the results (release, branch...)")
+        parser.add_argument("--output", "-o", default="benchmark-results.json", help="JSON results file")
+
+    def handle(self, *args, **kwargs):
+        results = {}
+        with temporary_database():
+            for size in sorted(kwargs["sizes"]):
+                started = time.perf_counter()
+                seed_readings(size)
+                self.stdout.write(f"Seeded {size} rows in {time.perf_counter() - started:.1f}s")
+                results[str(size)] = self.run_size(kwargs["repeat"], kwargs["posts"], kwargs["clients"])
+                for name, stats in results[str(size)].items():
+                    self.stdout.write(f"  {name:<40} median {stats['median_ms']:>10.3f} ms  max {stats['max_ms']:>10.3f} ms")
+
+        report = {
+            "meta": {
+                "label": kwargs["label"],
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "repeat": kwargs["repeat"],
+                "posts": kwargs["posts"],
+                "clients": kwargs["clients"],
+            },
+            "results": results,
+        }
+        with open(kwargs["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {kwargs['output']}"))
+
+    def run_size(self, repeat, posts, clients):
+        timings = {}
+        for builder in snapshots.PAGE_BUILDERS.values():
+            timings[builder.__name__] = time_calls(builder, repeat)
+
+        last_page = max(1, math.ceil(IoTData.objects.count() / 8))
+        timings["get_paginated_iot_data[first]"] = time_calls(lambda: data_utils.get_paginated_iot_data(1, 8), repeat)
+        timings["get_paginated_iot_data[last]"] = time_calls(lambda: data_utils.get_paginated_iot_data(last_page, 8), repeat)
+        timings["iot_data_post"] = self.time_posts(posts)
+        timings[f"consumer_fanout[{clients}]"] = async_to_sync(self.time_fanout)(clients, repeat)
+        return timings
+
+    def time_posts(self, posts):
+        client = Client()
+        url = reverse("iot_data_post")
+        durations = []
+        for index in range(posts):
+            body = json.dumps(sample_payload(index))
+            started = time.perf_counter()
+            client.post(url, body, content_type="application/json")
+            durations.append(time.perf_counter() - started)
+        return timing_stats(durations)
+
+    async def time_fanout(self, clients, repeat):
+        """Snapshot rebuild + group_send + delivery to every connected dashboard client"""
+        communicators = [WebsocketCommunicator(DashboardConsumer.as_asgi(), "/ws/dashboard/") for _ in range(clients)]
+        for communicator in communicators:
+            await communicator.connect()
+            await communicator.receive_json_from(timeout=30)
+        # Consumers attach the scheduler on connect; flushes are driven by hand here
+        broadcast.scheduler.detach()
+
+        durations = []
+        for _ in range(repeat):
+            snapshots.cache.invalidate("dashboard")
+            started = time.perf_counter()
+            broadcast.scheduler.mark_dirty(["dashboard_updates"])
+            await broadcast.scheduler.flush()
+            await asyncio.gather(*(communicator.receive_json_from(timeout=30) for communicator in communicators))
+            durations.append(time.perf_counter() - started)
+
+        for communicator in communicators:
+            await communicator.disconnect()
+        broadcast.scheduler.detach()
+        return timing_stats(durations)
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 
+from iot import system_settings
 from iot.models import QuizFact, QuizMood, QuizQuestion, QuizResultMessage, SystemSetting
 
 
@@ -274,17 +275,10 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f"Successfully seeded {len(results)} result messages"))
 
-        # 5. System Settings
-        settings = [
-            {"key": "chatbot_url", "value": "http://37.59.116.54:8000/chat", "description": "URL of the external AI service"},
-            {"key": "cpu_threshold", "value": "80", "description": "CPU usage threshold for warnings (%)"},
-            {"key": "ram_threshold", "value": "85", "description": "RAM usage threshold for warnings (%)"},
-            {"key": "power_threshold", "value": "250", "description": "Power consumption threshold for warnings (W)"},
-            {"key": "co2_threshold", "value": "150", "description": "CO2 emissions threshold for warnings (g)"},
-            {"key": "eco_threshold", "value": "50", "description": "Minimum eco-score before alert"},
-        ]
+        # 5. System Settings (declared with their defaults in iot.system_settings)
+        settings = system_settings.DEFINITIONS
 
         for s in settings:
-            SystemSetting.objects.get_or_create(key=s["key"], defaults={"value": s["value"], "description": s["description"]})
+            SystemSetting.objects.get_or_create(key=s.key, defaults={"value": str(s.default), "description": s.description})
 
         self.stdout.write(self.style.SUCCESS(f"Successfully seeded {len(settings)} system settings"))
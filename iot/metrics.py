@@ -0,0 +1,199 @@
+"""
+In-process metrics (counters, gauges, fixed-bucket histograms)
+Rendered in the Prometheus text format by the /metrics endpoint. Recording is a lock,
+a dict lookup and a bisect, cheap enough to stay on in production. Values are per
+process: with several workers, Prometheus scrapes each one (or sums them).
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; suits request handlers and database writes
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self):
+        """(suffix, label pairs, value) of every series"""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield "", list(zip(self.labelnames, key)), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, pairs, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(pairs)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Bucket upper bounds are inclusive (le)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the with block, even when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", pairs + [("le", _format_value(float(bound)))], cumulative
+            yield "_sum", pairs, total
+            yield "_count", pairs, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Ingestion
+INGEST_PARSE_SECONDS = histogram(
+    "iot_ingest_parse_seconds", "Time spent decoding and validating ingestion payloads", ["endpoint"]
+)
+INGEST_INSERT_SECONDS = histogram(
+    "iot_ingest_insert_seconds", "Time spent saving readings with their aggregates, rollups and sensor states"
+)
+INGEST_READINGS = counter("iot_ingest_readings_total", "Readings saved")
+
+# Page snapshots and broadcast
+PAGE_BUILD_SECONDS = histogram("iot_page_build_seconds", "Duration of the get_*_data_dict page builders", ["page"])
+SNAPSHOT_REQUESTS = counter("iot_snapshot_requests_total", "Snapshot cache lookups", ["page", "result"])
+BROADCAST_FLUSH_SECONDS = histogram("iot_broadcast_flush_seconds", "Duration of a broadcast flush (all dirty groups)")
+GROUP_SEND_SECONDS = histogram("iot_group_send_seconds", "Duration of channel layer group_send calls", ["group"])
+MESSAGE_LATENCY_SECONDS = histogram(
+    "iot_websocket_message_latency_seconds", "Delay between a broadcast and its delivery to a consumer", ["group"]
+)
+WEBSOCKET_CONNECTIONS = gauge("iot_websocket_connections", "Connected WebSocket consumers", ["group"])
+
+# Chatbot
+CHATBOT_PROXY_SECONDS = histogram(
+    "iot_chatbot_proxy_seconds",
+    "Duration of chatbot proxy requests",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+CHATBOT_CACHE_REQUESTS = counter(
+    "iot_chatbot_cache_requests_total", "Chatbot reply cache lookups (hit, miss, coalesced with a call in flight)", ["result"]
+)
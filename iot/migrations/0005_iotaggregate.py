@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iot", "0004_quizfact_quizmood_quizquestion_quizresultmessage_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IoTAggregate",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("field", models.CharField(help_text="IoTData field name", max_length=50, unique=True)),
+                ("count", models.BigIntegerField(default=0)),
+                ("total", models.FloatField(default=0, help_text="Sum of all values")),
+                ("sum_squares", models.FloatField(default=0, help_text="Sum of squared values (for variance)")),
+                ("minimum", models.FloatField(blank=True, null=True)),
+                ("maximum", models.FloatField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["field"],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iot", "0005_iotaggregate"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="iotdata",
+            index=models.Index(fields=["created_at", "id"], name="iot_iotdata_created_id_idx"),
+        ),
+    ]
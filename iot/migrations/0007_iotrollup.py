@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iot", "0006_iotdata_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IoTRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "resolution",
+                    models.CharField(choices=[("minute", "Minute"), ("hour", "Hour"), ("day", "Day")], max_length=10),
+                ),
+                ("bucket", models.DateTimeField(help_text="Start of the bucket (UTC)")),
+                ("field", models.CharField(help_text="IoTData field name", max_length=50)),
+                ("count", models.BigIntegerField(default=0)),
+                ("total", models.FloatField(default=0)),
+                ("minimum", models.FloatField()),
+                ("maximum", models.FloatField()),
+                ("last", models.FloatField(help_text="Value of the most recent reading in the bucket")),
+                ("last_at", models.DateTimeField()),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("resolution", "field", "bucket"), name="iot_rollup_unique_bucket")
+                ],
+            },
+        ),
+    ]
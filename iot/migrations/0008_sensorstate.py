@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iot", "0007_iotrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("hardware", "Hardware"), ("energy", "Energy"), ("network", "Network")], max_length=10
+                    ),
+                ),
+                ("sensor_id", models.CharField(max_length=50)),
+                ("last_seen", models.DateTimeField(db_index=True)),
+                ("readings", models.BigIntegerField(default=0, help_text="Number of readings received")),
+                ("data", models.JSONField(default=dict, help_text="Sensor section of the latest reading")),
+                (
+                    "reading",
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="iot.iotdata"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["kind", "sensor_id"],
+                "constraints": [models.UniqueConstraint(fields=("kind", "sensor_id"), name="iot_sensorstate_unique_sensor")],
+            },
+        ),
+    ]
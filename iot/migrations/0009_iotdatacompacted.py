@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iot", "0008_sensorstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IoTDataCompacted",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("resolution", models.CharField(choices=[("hour", "Hour"), ("day", "Day")], max_length=10)),
+                ("bucket", models.DateTimeField(help_text="Start of the bucket (UTC)")),
+                ("sensor_id", models.CharField(help_text="hardware_sensor_id of the readings", max_length=50)),
+                ("count", models.BigIntegerField(default=0)),
+                ("stats", models.JSONField(default=dict, help_text="{field: {total, sum_squares, min, max}}")),
+                ("first_at", models.DateTimeField()),
+                ("last_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name_plural": "IoT data compacted",
+                "indexes": [models.Index(fields=["bucket"], name="iot_compacted_bucket_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("resolution", "sensor_id", "bucket"), name="iot_compacted_unique_bucket")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iot", "0009_iotdatacompacted"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorDevice",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hardware_sensor_id", models.CharField(max_length=50)),
+                ("energy_sensor_id", models.CharField(max_length=50)),
+                ("network_sensor_id", models.CharField(max_length=50)),
+                ("os", models.CharField(max_length=20)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("hardware_sensor_id", "energy_sensor_id", "network_sensor_id", "os"),
+                        name="iot_sensordevice_unique_identity",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("iot", "0010_sensordevice"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quizresult",
+            name="answers",
+            field=models.BinaryField(
+                blank=True,
+                default=bytes,
+                help_text="Chosen option index per question in quiz order, one byte each (255 = invalid)",
+            ),
+        ),
+        migrations.CreateModel(
+            name="QuizScoreCount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("total_questions", models.IntegerField()),
+                ("score", models.IntegerField()),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["total_questions", "score"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("total_questions", "score"), name="iot_quizscorecount_unique_score")
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="QuizAnswerStat",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("option", models.SmallIntegerField()),
+                ("answers", models.BigIntegerField(default=0)),
+                (
+                    "correct",
+                    models.BigIntegerField(default=0, help_text="Answers that matched the correct answer when submitted"),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="answer_stats", to="iot.quizquestion"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["question", "option"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("question", "option"), name="iot_quizanswerstat_unique_option")
+                ],
+            },
+        ),
+    ]
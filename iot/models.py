@@ -42,10 +42,128 @@ class IoTData(models.Model):
     # ---------- TIMESTAMP ENREGISTREMENT ----------
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination and time-range scans: ORDER BY created_at, id
+            models.Index(fields=["created_at", "id"], name="iot_iotdata_created_id_idx"),
+        ]
+
     def __str__(self):
         return f"IoT Data {self.id} - {self.created_at}"
 
 
+class IoTAggregate(models.Model):
+    """Running aggregates of a numeric IoTData field, maintained on every insert"""
+
+    field = models.CharField(max_length=50, unique=True, help_text="IoTData field name")
+    count = models.BigIntegerField(default=0)
+    total = models.FloatField(default=0, help_text="Sum of all values")
+    sum_squares = models.FloatField(default=0, help_text="Sum of squared values (for variance)")
+    minimum = models.FloatField(null=True, blank=True)
+    maximum = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["field"]
+
+    def __str__(self):
+        return f"{self.field}: n={self.count}"
+
+
+class IoTRollup(models.Model):
+    """Per-bucket statistics of a numeric IoTData field (minute, hour and day resolutions)"""
+
+    RESOLUTION_CHOICES = [("minute", "Minute"), ("hour", "Hour"), ("day", "Day")]
+
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the bucket (UTC)")
+    field = models.CharField(max_length=50, help_text="IoTData field name")
+    count = models.BigIntegerField(default=0)
+    total = models.FloatField(default=0)
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+    last = models.FloatField(help_text="Value of the most recent reading in the bucket")
+    last_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["resolution", "field", "bucket"], name="iot_rollup_unique_bucket"),
+        ]
+
+    def __str__(self):
+        return f"{self.resolution} {self.field} @ {self.bucket}: n={self.count}"
+
+
+class IoTDataCompacted(models.Model):
+    """Statistics of raw IoTData rows removed by the retention command, per sensor and time bucket"""
+
+    RESOLUTION_CHOICES = [("hour", "Hour"), ("day", "Day")]
+
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the bucket (UTC)")
+    sensor_id = models.CharField(max_length=50, help_text="hardware_sensor_id of the readings")
+    count = models.BigIntegerField(default=0)
+    stats = models.JSONField(default=dict, help_text="{field: {total, sum_squares, min, max}}")
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "IoT data compacted"
+        constraints = [
+            models.UniqueConstraint(fields=["resolution", "sensor_id", "bucket"], name="iot_compacted_unique_bucket"),
+        ]
+        indexes = [models.Index(fields=["bucket"], name="iot_compacted_bucket_idx")]
+
+    def __str__(self):
+        return f"{self.sensor_id} {self.resolution} @ {self.bucket}: n={self.count}"
+
+
+class SensorState(models.Model):
+    """Latest reading of each sensor, maintained on ingest (one row per sensor kind and id)"""
+
+    KIND_CHOICES = [("hardware", "Hardware"), ("energy", "Energy"), ("network", "Network")]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    sensor_id = models.CharField(max_length=50)
+    reading = models.ForeignKey(IoTData, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    last_seen = models.DateTimeField(db_index=True)
+    readings = models.BigIntegerField(default=0, help_text="Number of readings received")
+    data = models.JSONField(default=dict, help_text="Sensor section of the latest reading")
+
+    class Meta:
+        ordering = ["kind", "sensor_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "sensor_id"], name="iot_sensorstate_unique_sensor"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.sensor_id} @ {self.last_seen}"
+
+
+class SensorDevice(models.Model):
+    """
+    Registered device: its id is the short id sent in binary readings instead of the
+    sensor id strings (see binary_format.py)
+    """
+
+    hardware_sensor_id = models.CharField(max_length=50)
+    energy_sensor_id = models.CharField(max_length=50)
+    network_sensor_id = models.CharField(max_length=50)
+    os = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hardware_sensor_id", "energy_sensor_id", "network_sensor_id", "os"],
+                name="iot_sensordevice_unique_identity",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Device {self.id} ({self.hardware_sensor_id})"
+
+
 class QuizQuestion(models.Model):
     """Model for storing quiz questions in the database"""
 
@@ -74,6 +192,9 @@ class QuizResult(models.Model):
     score = models.IntegerField(help_text="Number of correct answers")
     total_questions = models.IntegerField(help_text="Total questions answered")
     percentage = models.FloatField(help_text="Score as percentage")
+    answers = models.BinaryField(
+        default=bytes, blank=True, help_text="Chosen option index per question in quiz order, one byte each (255 = invalid)"
+    )
     completed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -83,6 +204,41 @@ class QuizResult(models.Model):
         return f"{self.user.username if self.user else 'Anonymous'}: {self.score}/{self.total_questions}"
 
 
+class QuizAnswerStat(models.Model):
+    """Number of submissions that chose an option of a question, maintained on submit (option -1 = invalid answer)"""
+
+    question = models.ForeignKey(QuizQuestion, on_delete=models.CASCADE, related_name="answer_stats")
+    option = models.SmallIntegerField()
+    answers = models.BigIntegerField(default=0)
+    correct = models.BigIntegerField(default=0, help_text="Answers that matched the correct answer when submitted")
+
+    class Meta:
+        ordering = ["question", "option"]
+        constraints = [
+            models.UniqueConstraint(fields=["question", "option"], name="iot_quizanswerstat_unique_option"),
+        ]
+
+    def __str__(self):
+        return f"Q{self.question_id} option {self.option}: {self.answers}"
+
+
+class QuizScoreCount(models.Model):
+    """Score histogram: number of submissions per (quiz length, score), maintained on submit"""
+
+    total_questions = models.IntegerField()
+    score = models.IntegerField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["total_questions", "score"]
+        constraints = [
+            models.UniqueConstraint(fields=["total_questions", "score"], name="iot_quizscorecount_unique_score"),
+        ]
+
+    def __str__(self):
+        return f"{self.score}/{self.total_questions}: {self.count}"
+
+
 class QuizFact(models.Model):
     """Model for storing random quiz facts"""
 
@@ -0,0 +1,153 @@
+"""
+Per-request SQL instrumentation
+Every database connection gets one execute wrapper reporting to the recorder of the
+current context. The recorder lives in a ContextVar, so it follows sync_to_async hops
+and concurrent consumers never mix their counts. QueryStatsMiddleware (HTTP) and
+QueryStatsMixin (Channels consumers) open one recorder per request or message, log slow
+queries with their call site and check the optional query budget of the view or consumer.
+"""
+
+import contextvars
+import logging
+import os
+import time
+import traceback
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("query_stats", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised instead of a warning when QUERY_BUDGET_ENFORCE is set (test suite)"""
+
+
+class QueryStats:
+    def __init__(self, label):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+
+    def record(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        if duration * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning(f"Slow query ({duration * 1000:.1f} ms) in {self.label} at {call_site()}: {sql[:500]}")
+
+
+def call_site():
+    """Innermost project frame (outside this module and installed packages) of the current stack"""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        filename = frame.filename
+        if filename.startswith(base_dir) and "site-packages" not in filename and filename != __file__:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - started)
+
+
+def install_wrapper(sender, connection, **kwargs):
+    """connection_created receiver: adds the execute wrapper once per connection object"""
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+@contextmanager
+def recording(label):
+    """Records the queries run in this context (and the sync_to_async calls it makes)"""
+    stats = QueryStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def query_budget(max_queries):
+    """Declares the maximum number of queries a view may run per request"""
+
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+
+    return decorator
+
+
+def check_budget(stats, budget):
+    if budget is None or stats.count <= budget:
+        return
+    message = f"{stats.label} ran {stats.count} queries (budget {budget})"
+    if settings.QUERY_BUDGET_ENFORCE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts queries and SQL time per request, checks the view's query budget and adds a
+    Server-Timing header (db / app / total) readable in the browser dev tools.
+    Queries run while a streaming response is consumed are not counted.
+    Works in both modes, so async views (iot_data_post_async) are not run in a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        request.query_budget = None
+        with recording(f"{request.method} {request.path}") as stats:
+            response = self.get_response(request)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        request.query_budget = None
+        with recording(f"{request.method} {request.path}") as stats:
+            response = await self.get_response(request)
+        return self._finish(request, response, stats, started)
+
+    def _finish(self, request, response, stats, started):
+        total = time.perf_counter() - started
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = (
+                f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                f"app;dur={(total - stats.duration) * 1000:.1f}, total;dur={total * 1000:.1f}"
+            )
+        check_budget(stats, request.query_budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, "query_budget", None)
+
+
+class QueryStatsMixin:
+    """Channels consumer mixin: records the queries of each handled message against query_budget"""
+
+    query_budget = None
+
+    async def dispatch(self, message):
+        with recording(f"{type(self).__name__} {message['type']}") as stats:
+            await super().dispatch(message)
+        check_budget(stats, self.query_budget)
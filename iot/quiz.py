@@ -0,0 +1,197 @@
+"""
+Quiz content cache
+The quiz bundle (questions, facts, moods, result messages) changes only through the
+admin or seed_quiz, while every participant loads and submits it at the same moment
+during events. It is serialized once into bytes with a content ETag, alongside the
+answer key and result thresholds used for scoring, and rebuilt when its version changes.
+
+Submissions are scored against the cached answer key and saved with their answer
+vector and analytics counters (iot.quiz_analytics); with QUIZ_RESULT_WRITE_BEHIND
+they are written in batches, off the request path.
+
+A save/delete of a quiz model invalidates the bundle of the saving process and, once
+committed, bumps QUIZ_VERSION_FILE (iot.version_file): the other workers of the host
+rebuild theirs on their next read, so every worker scores against the same answer key.
+QuerySet.update() and raw SQL bypass signals, call bundle_cache.bump() after them.
+"""
+
+import bisect
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+
+from . import data_utils, quiz_analytics, version_file, write_behind
+from .models import QuizFact, QuizMood, QuizQuestion, QuizResult, QuizResultMessage
+
+
+def build_bundle():
+    """Quiz payload served by /api/quiz/questions/ (four queries)"""
+    return {
+        "questions": [
+            {
+                "id": q.id,
+                "q": q.question,
+                "options": q.options,
+                "answer": q.correct_answer,
+                "reactions": {"correct": q.reactions_correct, "wrong": q.reactions_wrong},
+                "funFact": q.fun_fact,
+            }
+            for q in QuizQuestion.objects.filter(is_active=True).order_by("order")
+        ],
+        "facts": [f.text for f in QuizFact.objects.filter(is_active=True)],
+        "moods": [
+            {"emoji": m.emoji, "text": m.text, "color": m.color, "min_percentage": m.min_percentage}
+            for m in QuizMood.objects.all()
+        ],
+        "results": [
+            {
+                "min_percentage": r.min_percentage,
+                "title": r.title,
+                "message": r.message,
+                "emoji": r.emoji,
+                "color_class": r.color_class,
+                "badge_text": r.badge_text,
+            }
+            for r in QuizResultMessage.objects.all()
+        ],
+    }
+
+
+@dataclass(frozen=True)
+class Bundle:
+    version: tuple  # (local version, version file) it was built for
+    body: bytes
+    etag: str
+    question_ids: tuple  # active questions, in display order
+    answer_key: tuple  # correct option index of each active question
+    option_counts: tuple  # number of options of each active question
+    thresholds: tuple  # ascending min_percentage of the result messages
+    results: tuple  # result message dicts, in threshold order
+
+
+def _encode(data, version):
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    results = sorted(data["results"], key=lambda result: result["min_percentage"])
+    return Bundle(
+        version,
+        body,
+        # Content hash: identical content gives the same ETag in every worker and after restarts
+        f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"',
+        tuple(question["id"] for question in data["questions"]),
+        tuple(question["answer"] for question in data["questions"]),
+        tuple(len(question["options"]) for question in data["questions"]),
+        tuple(result["min_percentage"] for result in results),
+        tuple(results),
+    )
+
+
+class QuizBundleCache:
+    """Process-local encoded bundle; concurrent misses are single-flighted"""
+
+    def __init__(self, version_path):
+        self.version_path = str(version_path)
+        self.version = 0
+        self._bundle = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self._current_version()
+        bundle = self._bundle
+        if bundle is not None and bundle.version == version:
+            return bundle
+        with self._lock:
+            # Read before querying: a save during the build leaves the result stale, not current
+            version = self._current_version()
+            bundle = self._bundle
+            if bundle is not None and bundle.version == version:
+                return bundle
+            self._bundle = _encode(build_bundle(), version)
+            return self._bundle
+
+    def invalidate(self):
+        """Rebuilds on next read (this process only)"""
+        self.version += 1
+
+    def bump(self):
+        """Makes every worker rebuild: invalidates here and bumps the version file"""
+        self.invalidate()
+        version_file.bump(self.version_path)
+
+    def _current_version(self):
+        return self.version, version_file.read(self.version_path)
+
+
+bundle_cache = QuizBundleCache(settings.QUIZ_VERSION_FILE)
+
+
+def get_bundle():
+    """Encoded quiz bundle of the current content version"""
+    return bundle_cache.get()
+
+
+def score_answers(answers, bundle=None):
+    """
+    Scores answers against the cached answer key without any query.
+    Returns (score, total, percentage, result message dict or None).
+    """
+    bundle = bundle or get_bundle()
+    score, total, percentage = data_utils.calculate_quiz_score(answers, bundle.answer_key)
+    # Highest threshold <= percentage
+    index = bisect.bisect_right(bundle.thresholds, percentage) - 1
+    return score, total, percentage, bundle.results[index] if index >= 0 else None
+
+
+def _write_results(items):
+    """Saves (QuizResult fields, answer rows) submissions with one bulk_create and their analytics counters"""
+    with transaction.atomic():
+        QuizResult.objects.bulk_create([QuizResult(**fields) for fields, _ in items])
+        quiz_analytics.record_submissions([(fields["score"], fields["total_questions"], rows) for fields, rows in items])
+
+
+_result_writer = None
+_result_writer_lock = threading.Lock()
+
+
+def get_result_writer():
+    """Process-wide writer of quiz results, started on first use and flushed at exit"""
+    global _result_writer
+    with _result_writer_lock:
+        if _result_writer is None:
+            _result_writer = write_behind.BatchedWriter(
+                _write_results,
+                interval=settings.QUIZ_RESULT_FLUSH_INTERVAL,
+                max_items=settings.QUIZ_RESULT_BATCH_SIZE,
+                name="quiz-result-writer",
+            )
+            _result_writer.start()
+        return _result_writer
+
+
+def submit(user, answers):
+    """
+    Scores a submission and records it; returns score_answers' tuple.
+    In write-behind mode (QUIZ_RESULT_WRITE_BEHIND) it is queued in memory and saved within
+    QUIZ_RESULT_FLUSH_INTERVAL (completed_at is the flush time); the queue is written on a
+    clean shutdown, not if the process is killed.
+    """
+    bundle = get_bundle()
+    scored = score_answers(answers, bundle)
+    score, total, percentage, _ = scored
+    vector = quiz_analytics.encode_answers(answers, bundle.option_counts)
+    fields = {
+        "user_id": user.id if user else None,
+        "score": score,
+        "total_questions": total,
+        "percentage": percentage,
+        "answers": vector,
+    }
+    item = (fields, quiz_analytics.answer_rows(vector, bundle.question_ids, bundle.answer_key))
+    if settings.QUIZ_RESULT_WRITE_BEHIND:
+        get_result_writer().submit([item])
+    else:
+        _write_results([item])
+    return scored
@@ -0,0 +1,122 @@
+"""
+Per-question quiz analytics
+Each submission stores its answer vector (one byte per question) and bumps per-option
+and score counters in the transaction that saves it, so the analytics endpoint and the
+admin read O(questions) counter rows instead of replaying every QuizResult.
+"""
+
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Sum
+
+from .models import QuizAnswerStat, QuizQuestion, QuizScoreCount
+
+# Answers that are not one of the question's options
+INVALID_OPTION = -1
+_INVALID_BYTE = 255
+
+
+def encode_answers(answers, option_counts):
+    """
+    Compact answer vector of a submission: the chosen option index of each answered
+    question in quiz order (option_counts: number of options per question), 255 when invalid.
+    """
+    return bytes(
+        answer if type(answer) is int and 0 <= answer < options else _INVALID_BYTE
+        for answer, options in zip(answers, option_counts)
+    )
+
+
+def answer_rows(vector, question_ids, answer_key):
+    """(question id, option, correct) of each answer of an encoded vector"""
+    return [
+        (question_id, INVALID_OPTION if option == _INVALID_BYTE else option, option == correct)
+        for option, question_id, correct in zip(vector, question_ids, answer_key)
+    ]
+
+
+# Only model table names are interpolated (bandit B608 false positive).
+# Answers to a question deleted since the submission are dropped by the EXISTS guard.
+_ANSWERS_TABLE = QuizAnswerStat._meta.db_table
+_ANSWERS_UPSERT_SQL = f"""
+    INSERT INTO {_ANSWERS_TABLE} (question_id, option, answers, correct)
+    SELECT %s, %s, %s, %s WHERE EXISTS (SELECT 1 FROM {QuizQuestion._meta.db_table} WHERE id = %s)
+    ON CONFLICT (question_id, option) DO UPDATE SET
+        answers = {_ANSWERS_TABLE}.answers + excluded.answers,
+        correct = {_ANSWERS_TABLE}.correct + excluded.correct
+"""  # nosec B608
+_SCORES_TABLE = QuizScoreCount._meta.db_table
+_SCORES_UPSERT_SQL = f"""
+    INSERT INTO {_SCORES_TABLE} (total_questions, score, count) VALUES (%s, %s, %s)
+    ON CONFLICT (total_questions, score) DO UPDATE SET count = {_SCORES_TABLE}.count + excluded.count
+"""  # nosec B608
+
+
+def record_submissions(submissions):
+    """
+    Adds a batch of submissions, (score, total_questions, answer_rows) each, to the counters
+    (one upsert per distinct option and per distinct score).
+    Must be called in the transaction that saved the results so both commit together.
+    """
+    if not submissions:
+        return
+
+    answers = Counter()
+    correct = Counter()
+    scores = Counter()
+    for score, total, rows in submissions:
+        scores[total, score] += 1
+        for question_id, option, is_correct in rows:
+            answers[question_id, option] += 1
+            correct[question_id, option] += is_correct
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            _ANSWERS_UPSERT_SQL,
+            [
+                (question_id, option, count, correct[question_id, option], question_id)
+                for (question_id, option), count in answers.items()
+            ],
+        )
+        cursor.executemany(_SCORES_UPSERT_SQL, [(total, score, count) for (total, score), count in scores.items()])
+
+
+def get_analytics():
+    """Per-question answer statistics of the active questions and the score histogram (three queries)"""
+    questions = list(QuizQuestion.objects.filter(is_active=True).order_by("order"))
+    counts = {}
+    for question_id, option, answers, correct in QuizAnswerStat.objects.filter(question__in=questions).values_list(
+        "question_id", "option", "answers", "correct"
+    ):
+        counts[question_id, option] = (answers, correct)
+
+    report = []
+    for question in questions:
+        stats = [counts.get((question.id, option), (0, 0)) for option in [*range(len(question.options)), INVALID_OPTION]]
+        answered = sum(answers for answers, _ in stats)
+        correct = sum(correct for _, correct in stats)
+        report.append(
+            {
+                "id": question.id,
+                "order": question.order,
+                "question": question.question,
+                "answered": answered,
+                "correct": correct,
+                "incorrect": answered - correct,
+                "correct_rate": round(correct / answered * 100, 1) if answered else None,
+                "options": [
+                    {"text": text, "count": count, "is_correct": index == question.correct_answer}
+                    for index, (text, (count, _)) in enumerate(zip(question.options, stats))
+                ],
+                "invalid": stats[-1][0],
+            }
+        )
+
+    scores = list(QuizScoreCount.objects.values("total_questions", "score", "count"))
+    return {"submissions": sum(row["count"] for row in scores), "questions": report, "scores": scores}
+
+
+def annotate_questions(queryset):
+    """Adds `answered` and `correct` totals from the counters to a QuizQuestion queryset"""
+    return queryset.annotate(answered=Sum("answer_stats__answers"), correct=Sum("answer_stats__correct"))
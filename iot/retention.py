@@ -0,0 +1,140 @@
+"""
+Retention of raw IoTData
+Readings older than the retention period are folded into IoTDataCompacted rows (per sensor
+and time bucket), then deleted in short index-driven chunks. Each chunk is compacted and
+deleted in its own transaction, so an interrupted run never counts a reading twice.
+"""
+
+import time
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .aggregates import NUMERIC_FIELDS, compacting
+from .models import IoTData, IoTDataCompacted
+from .rollups import bucket_start
+
+RESOLUTIONS = ("hour", "day")
+
+
+def retention_cutoff(days, resolution, now=None):
+    """Start of the bucket containing now - days: only complete buckets are compacted"""
+    return bucket_start((now or timezone.now()) - timedelta(days=days), resolution)
+
+
+def plan_compaction(cutoff, resolution):
+    """Dry run: what a compaction up to cutoff would remove and create, without writing"""
+    expired = IoTData.objects.filter(created_at__lt=cutoff)
+    summary = expired.aggregate(rows=Count("id"), oldest=Min("created_at"), newest=Max("created_at"))
+    summary["buckets"] = (
+        expired.annotate(bucket=Trunc("created_at", resolution, tzinfo=dt_timezone.utc))
+        .values("hardware_sensor_id", "bucket")
+        .annotate(rows=Count("id"))
+        .order_by()
+        .count()
+    )
+    summary["sensors"] = expired.values("hardware_sensor_id").distinct().count()
+    return summary
+
+
+def _merge_values(stats, field, total, sum_squares, minimum, maximum):
+    current = stats.get(field)
+    if current is None:
+        stats[field] = {"total": total, "sum_squares": sum_squares, "min": minimum, "max": maximum}
+        return
+    current["total"] += total
+    current["sum_squares"] += sum_squares
+    current["min"] = minimum if current["min"] is None else min(current["min"], minimum)
+    current["max"] = maximum if current["max"] is None else max(current["max"], maximum)
+
+
+def _group_rows(rows, resolution):
+    """{(sensor_id, bucket): IoTDataCompacted} for a chunk of raw rows"""
+    groups = {}
+    for row in rows:
+        key = (row["hardware_sensor_id"], bucket_start(row["created_at"], resolution))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = IoTDataCompacted(
+                resolution=resolution,
+                sensor_id=key[0],
+                bucket=key[1],
+                count=0,
+                stats={},
+                first_at=row["created_at"],
+                last_at=row["created_at"],
+            )
+        group.count += 1
+        group.first_at = min(group.first_at, row["created_at"])
+        group.last_at = max(group.last_at, row["created_at"])
+        for field in NUMERIC_FIELDS:
+            value = float(row[field])
+            _merge_values(group.stats, field, value, value * value, value, value)
+    return groups
+
+
+def _save_groups(groups, resolution):
+    """Adds chunk groups to existing compacted rows (created when missing)"""
+    existing = IoTDataCompacted.objects.select_for_update().filter(
+        resolution=resolution,
+        sensor_id__in={sensor_id for sensor_id, _ in groups},
+        bucket__in={bucket for _, bucket in groups},
+    )
+    updated = []
+    for row in existing:
+        group = groups.pop((row.sensor_id, row.bucket), None)
+        if group is None:
+            continue
+        row.count += group.count
+        row.first_at = min(row.first_at, group.first_at)
+        row.last_at = max(row.last_at, group.last_at)
+        for field, values in group.stats.items():
+            _merge_values(row.stats, field, values["total"], values["sum_squares"], values["min"], values["max"])
+        updated.append(row)
+
+    IoTDataCompacted.objects.bulk_update(updated, ["count", "stats", "first_at", "last_at"])
+    IoTDataCompacted.objects.bulk_create(groups.values())
+
+
+def compact_readings(cutoff, resolution="hour", chunk_size=1000, pause=0.0, progress=None):
+    """
+    Compacts and deletes raw readings created before cutoff, oldest first.
+    progress(done, total, elapsed) is called after every chunk. Returns run statistics.
+    """
+    expired = IoTData.objects.filter(created_at__lt=cutoff)
+    total = expired.count()
+    started = time.monotonic()
+    done = 0
+    buckets = set()
+
+    while True:
+        with transaction.atomic():
+            # Served by the (created_at, id) index; deleted rows are never seen again
+            chunk = expired.order_by("created_at", "id").values("id", "hardware_sensor_id", "created_at", *NUMERIC_FIELDS)
+            rows = list(chunk[:chunk_size])
+            if not rows:
+                break
+            groups = _group_rows(rows, resolution)
+            buckets.update(groups)
+            _save_groups(groups, resolution)
+            with compacting():
+                IoTData.objects.filter(id__in=[row["id"] for row in rows]).delete()
+
+        done += len(rows)
+        if progress is not None:
+            progress(done, total, time.monotonic() - started)
+        if pause:
+            # Leaves the database to the writers between chunks
+            time.sleep(pause)
+
+    elapsed = time.monotonic() - started
+    return {
+        "rows": done,
+        "buckets": len(buckets),
+        "elapsed": elapsed,
+        "rows_per_second": done / elapsed if elapsed else 0.0,
+    }
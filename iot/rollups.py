@@ -0,0 +1,204 @@
+"""
+Time-bucketed rollups of numeric IoTData fields
+Each (resolution, bucket, field) row keeps count, sum, min, max and the last value,
+so long-range charts read a few hundred rollup rows instead of the raw table.
+"""
+
+import math
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import Count, FloatField, Max, Min, Sum
+from django.db.models.functions import Trunc
+
+from .aggregates import NUMERIC_FIELDS
+from .models import IoTData, IoTDataCompacted, IoTRollup
+
+# Finest first; buckets are aligned on the Unix epoch (UTC days)
+RESOLUTIONS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def bucket_start(moment, resolution):
+    """Start of the bucket containing moment"""
+    step = int(RESOLUTIONS[resolution].total_seconds())
+    return datetime.fromtimestamp(int(moment.timestamp()) // step * step, tz=dt_timezone.utc)
+
+
+def _bucket_stats(instances):
+    """Returns (last_at, {field: (total, minimum, maximum, last)}) for readings of one bucket"""
+    newest = max(enumerate(instances), key=lambda item: (item[1].created_at, item[0]))[1]
+    stats = {}
+    for field in NUMERIC_FIELDS:
+        values = [float(getattr(instance, field)) for instance in instances]
+        stats[field] = (sum(values), min(values), max(values), float(getattr(newest, field)))
+    return newest.created_at, stats
+
+
+# One statement per batch; ON CONFLICT ... DO UPDATE is shared by SQLite (3.24+) and PostgreSQL.
+# Only the model's table name is interpolated (bandit B608 false positive).
+_TABLE = IoTRollup._meta.db_table
+_UPSERT_SQL = f"""
+    INSERT INTO {_TABLE} (resolution, bucket, field, count, total, minimum, maximum, last, last_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (resolution, field, bucket) DO UPDATE SET
+        count = {_TABLE}.count + excluded.count,
+        total = {_TABLE}.total + excluded.total,
+        minimum = CASE WHEN excluded.minimum < {_TABLE}.minimum THEN excluded.minimum ELSE {_TABLE}.minimum END,
+        maximum = CASE WHEN excluded.maximum > {_TABLE}.maximum THEN excluded.maximum ELSE {_TABLE}.maximum END,
+        last = CASE WHEN excluded.last_at >= {_TABLE}.last_at THEN excluded.last ELSE {_TABLE}.last END,
+        last_at = CASE WHEN excluded.last_at >= {_TABLE}.last_at THEN excluded.last_at ELSE {_TABLE}.last_at END
+"""
+
+
+def record_readings(instances):
+    """
+    Adds newly inserted readings to the minute, hour and day rollups (one upsert statement).
+    Must be called in the transaction that inserted them so both commit together.
+    """
+    if not instances:
+        return
+
+    adapt = connection.ops.adapt_datetimefield_value
+    params = []
+    for resolution in RESOLUTIONS:
+        buckets = {}
+        for instance in instances:
+            buckets.setdefault(bucket_start(instance.created_at, resolution), []).append(instance)
+        for bucket, items in buckets.items():
+            last_at, stats = _bucket_stats(items)
+            for field, (total, minimum, maximum, last) in stats.items():
+                params.append((resolution, adapt(bucket), field, len(items), total, minimum, maximum, last, adapt(last_at)))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(_UPSERT_SQL, params)
+
+
+def choose_resolution(start, end, max_points):
+    """Finest resolution whose number of buckets over [start, end) fits the point budget (day otherwise)"""
+    for resolution, step in RESOLUTIONS.items():
+        if math.ceil((end - start) / step) <= max_points:
+            return resolution
+    return resolution
+
+
+def get_series(fields, start, end, max_points, resolution=None):
+    """
+    Downsampled series for [start, end): one point per bucket with count, avg, min, max and last.
+    Buckets without readings are omitted.
+    """
+    resolution = resolution or choose_resolution(start, end, max_points)
+    rows = (
+        IoTRollup.objects.filter(
+            resolution=resolution,
+            field__in=fields,
+            bucket__gte=bucket_start(start, resolution),
+            bucket__lt=end,
+        )
+        .order_by("bucket")
+        .values_list("bucket", "field", "count", "total", "minimum", "maximum", "last")
+    )
+
+    buckets = {}
+    for bucket, field, count, total, minimum, maximum, last in rows:
+        buckets.setdefault(bucket, {})[field] = (count, total, minimum, maximum, last)
+
+    series = {field: {"avg": [], "min": [], "max": [], "last": []} for field in fields}
+    counts = []
+    for values in buckets.values():
+        counts.append(max(row[0] for row in values.values()))
+        for field in fields:
+            count, total, minimum, maximum, last = values.get(field, (0, 0, None, None, None))
+            series[field]["avg"].append(round(total / count, 2) if count else None)
+            series[field]["min"].append(minimum)
+            series[field]["max"].append(maximum)
+            series[field]["last"].append(last)
+
+    return {
+        "resolution": resolution,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": [bucket.isoformat() for bucket in buckets],
+        "counts": counts,
+        "series": series,
+    }
+
+
+def _backfill_resolution(resolution, since, batch_size):
+    """Recomputes one resolution from the raw table with a single GROUP BY; returns the number of buckets"""
+    readings = IoTData.objects.all()
+    stale = IoTRollup.objects.filter(resolution=resolution)
+    # Buckets holding compacted readings cannot be rebuilt from the raw table
+    compacted_until = IoTDataCompacted.objects.aggregate(last=Max("last_at"))["last"]
+    if compacted_until is not None:
+        floor = bucket_start(compacted_until, resolution) + RESOLUTIONS[resolution]
+        since = floor if since is None else max(since, floor)
+    if since is not None:
+        start = bucket_start(since, resolution)
+        readings = readings.filter(created_at__gte=start)
+        stale = stale.filter(bucket__gte=start)
+
+    expressions = {"rows": Count("id"), "last_id": Max("id"), "last_at": Max("created_at")}
+    for field in NUMERIC_FIELDS:
+        expressions[f"{field}__total"] = Sum(field, output_field=FloatField())
+        expressions[f"{field}__minimum"] = Min(field, output_field=FloatField())
+        expressions[f"{field}__maximum"] = Max(field, output_field=FloatField())
+    groups = (
+        readings.annotate(bucket=Trunc("created_at", resolution, tzinfo=dt_timezone.utc))
+        .values("bucket")
+        .annotate(**expressions)
+        .order_by("bucket")
+    )
+
+    stale.delete()
+    written = 0
+    batch = []
+    for group in groups.iterator(chunk_size=batch_size):
+        batch.append(group)
+        if len(batch) >= batch_size:
+            written += _write_backfill_batch(resolution, batch)
+            batch = []
+    if batch:
+        written += _write_backfill_batch(resolution, batch)
+    return written
+
+
+def _write_backfill_batch(resolution, groups):
+    """Creates the rollup rows of a batch of GROUP BY results; last values come from the newest row of each bucket"""
+    last_rows = IoTData.objects.filter(id__in=[group["last_id"] for group in groups]).values("id", *NUMERIC_FIELDS)
+    last_values = {row["id"]: row for row in last_rows}
+    IoTRollup.objects.bulk_create(
+        [
+            IoTRollup(
+                resolution=resolution,
+                bucket=group["bucket"],
+                field=field,
+                count=group["rows"],
+                total=group[f"{field}__total"],
+                minimum=group[f"{field}__minimum"],
+                maximum=group[f"{field}__maximum"],
+                last=float(last_values[group["last_id"]][field]),
+                last_at=group["last_at"],
+            )
+            for group in groups
+            for field in NUMERIC_FIELDS
+        ]
+    )
+    return len(groups)
+
+
+def backfill_rollups(resolutions=None, since=None, batch_size=500):
+    """
+    Rebuilds rollups from the raw IoTData table, entirely or from `since` onwards.
+    Rollups of periods already compacted by the retention command are kept.
+    Returns {resolution: number of buckets written}.
+    """
+    written = {}
+    with transaction.atomic():
+        for resolution in resolutions or RESOLUTIONS:
+            written[resolution] = _backfill_resolution(resolution, since, batch_size)
+    return written
@@ -0,0 +1,67 @@
+"""
+Model signal handlers
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import aggregates, quiz, rollups, sensors, system_settings
+from .models import IoTData, QuizFact, QuizMood, QuizQuestion, QuizResultMessage, SystemSetting
+
+
+@receiver(pre_save, sender=IoTData)
+def remember_previous_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keeps the stored values of an updated reading, to adjust the aggregates after the save"""
+    instance._aggregate_previous = None
+    fields = aggregates.NUMERIC_FIELDS
+    if instance._state.adding or raw or (update_fields is not None and not set(update_fields) & set(fields)):
+        return
+    instance._aggregate_previous = IoTData.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=IoTData)
+def update_aggregates_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keeps running aggregates, rollups and sensor states in sync for rows created outside the ingestion
+    pipeline (admin, shell). An updated reading replaces its previous values in the running aggregates;
+    rollups and sensor states keep them (run backfill_rollups after correcting readings).
+    """
+    if raw:
+        return
+    if created:
+        aggregates.record_readings([instance])
+        rollups.record_readings([instance])
+        sensors.record_readings([instance])
+    elif getattr(instance, "_aggregate_previous", None) is not None:
+        aggregates.record_readings([instance])
+        aggregates.remove_readings([instance._aggregate_previous])
+
+
+@receiver(post_delete, sender=IoTData)
+def update_aggregates_on_delete(sender, instance, **kwargs):
+    """
+    Removes deleted readings (admin, shell, QuerySet.delete()) from the running aggregates, once per
+    transaction. Raw SQL deletes send no signal: run rebuild_aggregates after them.
+    """
+    aggregates.remove_readings([instance])
+
+
+@receiver([post_save, post_delete], sender=QuizQuestion)
+@receiver([post_save, post_delete], sender=QuizFact)
+@receiver([post_save, post_delete], sender=QuizMood)
+@receiver([post_save, post_delete], sender=QuizResultMessage)
+def invalidate_quiz_bundle(sender, **kwargs):
+    """
+    Quiz content changed: the cached bundle is rebuilt on next request, and again in every
+    worker once the change is committed (a bundle built meanwhile read the previous rows)
+    """
+    quiz.bundle_cache.invalidate()
+    transaction.on_commit(quiz.bundle_cache.bump)
+
+
+@receiver([post_save, post_delete], sender=SystemSetting)
+def reload_system_settings(sender, **kwargs):
+    """Reloads the settings registry here now, and in every worker once the change is committed"""
+    system_settings.registry.invalidate()
+    transaction.on_commit(system_settings.registry.bump)
@@ -0,0 +1,69 @@
+"""
+Shared snapshot cache for page data
+Page dicts are cached per page and versioned by the latest IoTData row, so WebSocket
+connects, page renders and the JSON APIs reuse one computation per new reading.
+Concurrent misses for the same page are single-flighted.
+"""
+
+import threading
+
+from . import data_utils, metrics
+from .models import IoTData
+
+PAGE_BUILDERS = {
+    "dashboard": data_utils.get_dashboard_data_dict,
+    "hardware": data_utils.get_hardware_data_dict,
+    "energy": data_utils.get_energy_data_dict,
+    "network": data_utils.get_network_data_dict,
+    "scores": data_utils.get_scores_data_dict,
+}
+
+
+class SnapshotCache:
+    """Process-local cache of page dicts; callers must treat returned dicts as read-only"""
+
+    def __init__(self, builders):
+        self.builders = builders
+        self._entries = {}
+        self._locks = {page: threading.Lock() for page in builders}
+
+    def current_version(self):
+        """
+        (id, created_at) of the latest IoTData row, found through the primary key.
+        created_at guards against ids reused after rows were deleted.
+        """
+        return IoTData.objects.order_by("-id").values_list("id", "created_at").first()
+
+    def get(self, page):
+        version = self.current_version()
+        entry = self._entries.get(page)
+        if entry is not None and entry[0] == version:
+            metrics.SNAPSHOT_REQUESTS.inc(page=page, result="hit")
+            return entry[1]
+
+        metrics.SNAPSHOT_REQUESTS.inc(page=page, result="miss")
+        with self._locks[page]:
+            # Another thread may have built it while we were waiting
+            entry = self._entries.get(page)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+            with metrics.PAGE_BUILD_SECONDS.time(page=page):
+                data = self.builders[page]()
+            self._entries[page] = (version, data)
+            return data
+
+    def invalidate(self, page=None):
+        """Drops one page (or every page) from the cache"""
+        if page is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(page, None)
+
+
+cache = SnapshotCache(PAGE_BUILDERS)
+
+
+def get_snapshot(page):
+    """Returns the cached page dict for the current data version"""
+    return cache.get(page)
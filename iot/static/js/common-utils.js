@@ -63,6 +63,61 @@ const DOMUtils = {
     }
 };
 
+// ==================== DELTA PROTOCOL UTILITIES ====================
+
+/**
+ * Helpers for the delta WebSocket protocol (ws/<page>/?protocol=delta)
+ * A snapshot is decoded once, then each delta appends/evicts points by id
+ */
+const DeltaUtils = {
+    // Chart series keys of a page payload (cpu_data, power_data...)
+    seriesKeys(state) {
+        return Object.keys(state).filter(key => key.endsWith('_data') && key !== 'latest_data');
+    },
+
+    // Decode a snapshot message: JSON-encoded series become arrays
+    decodeSnapshot(message) {
+        const parseIfString = (val) => typeof val === 'string' ? JSON.parse(val) : (val || []);
+        const state = { ...message, chart_labels: parseIfString(message.chart_labels) };
+        this.seriesKeys(state).forEach(key => {
+            state[key] = parseIfString(state[key]);
+        });
+        return state;
+    },
+
+    // Apply a delta to a decoded snapshot (idempotent: points are keyed by id)
+    applyDelta(state, delta) {
+        const seriesKeys = this.seriesKeys(state);
+        const rows = [...(state.latest_data || [])].reverse();
+        let points = rows.map((row, i) => ({
+            id: row.id,
+            label: state.chart_labels[i],
+            row: row,
+            values: Object.fromEntries(seriesKeys.map(key => [key, state[key][i]]))
+        }));
+
+        const evicted = new Set(delta.evict || []);
+        const known = new Set(points.map(point => point.id));
+        points = points.filter(point => !evicted.has(point.id));
+        (delta.append || []).forEach(point => {
+            if (!known.has(point.id)) points.push(point);
+        });
+        points.sort((a, b) => a.id - b.id);
+        if (delta.window !== undefined) {
+            points = points.slice(Math.max(0, points.length - delta.window));
+        }
+
+        state.chart_labels = points.map(point => point.label);
+        seriesKeys.forEach(key => {
+            state[key] = points.map(point => point.values[key]);
+        });
+        state.latest_data = points.map(point => point.row).reverse();
+        Object.assign(state, delta.aggregates || {});
+        state.seq = delta.seq;
+        return state;
+    }
+};
+
 // ==================== SIDEBAR MANAGEMENT ====================
 
 const SidebarManager = {
@@ -216,6 +216,18 @@
             }], { labels: this.chartLabels, scales: { y: { min: 0 } } });
         }
 
+        /**
+         * Override getChartDataKeys: the CPU chart carries CPU and RAM datasets
+         */
+        getChartDataKeys() {
+            return {
+                cpuRamChart: ['cpu', 'ram'],
+                energyChart: ['power'],
+                ecoChart: ['eco'],
+                co2Chart: ['co2']
+            };
+        }
+
         /**
          * Override parseWebSocketData to map dashboard specific keys
          */
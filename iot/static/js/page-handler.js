@@ -87,6 +87,10 @@ class PageDataHandler {
         this.chartLabels = [];
         this.socket = null;
         this.serverAverages = {};
+        // Delta protocol state
+        this.state = null;
+        this.lastSeq = null;
+        this.resyncPending = false;
     }
 
     /**
@@ -238,18 +242,20 @@ class PageDataHandler {
      */
     connectWebSocket() {
         const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${wsProtocol}//${window.location.host}${this.config.endpoint}`;
+        const wsUrl = `${wsProtocol}//${window.location.host}${this.config.endpoint}?protocol=delta`;
 
         try {
             this.socket = new WebSocket(wsUrl);
 
             this.socket.onopen = () => {
                 console.log(`${this.config.pageName}: WebSocket connected`);
+                this.lastSeq = null;
+                this.resyncPending = false;
             };
 
             this.socket.onmessage = (event) => {
                 const data = JSON.parse(event.data);
-                this.handleWebSocketData(data);
+                this.handleSocketMessage(data);
             };
 
             this.socket.onerror = (error) => {
@@ -265,10 +271,88 @@ class PageDataHandler {
         }
     }
 
+    /**
+     * Dispatch a WebSocket message (full snapshot or delta)
+     */
+    handleSocketMessage(message) {
+        if (message.type === 'delta') {
+            this.applyDelta(message);
+            return;
+        }
+
+        this.state = DeltaUtils.decodeSnapshot(message);
+        this.lastSeq = message.seq !== undefined ? message.seq : null;
+        this.resyncPending = false;
+        this.handleWebSocketData(message);
+    }
+
+    /**
+     * Apply a delta message, or ask for a full snapshot when a message was missed
+     */
+    applyDelta(delta) {
+        if (this.resyncPending) return;
+
+        if (!this.state || this.lastSeq === null || delta.seq !== this.lastSeq + 1) {
+            console.warn(`${this.config.pageName}: sequence gap (${this.lastSeq} -> ${delta.seq}), resyncing`);
+            this.requestResync();
+            return;
+        }
+
+        DeltaUtils.applyDelta(this.state, delta);
+        this.lastSeq = delta.seq;
+        this.handleWebSocketData(this.state, { incremental: true });
+    }
+
+    /**
+     * Ask the server for a full snapshot
+     */
+    requestResync() {
+        this.resyncPending = true;
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify({ type: 'resync' }));
+        }
+    }
+
+    /**
+     * Chart datasets fed by each data key, used to update charts in place
+     */
+    getChartDataKeys() {
+        const keys = {};
+        (this.config.charts || []).forEach(chartConfig => {
+            keys[chartConfig.canvasId] = [chartConfig.dataKey];
+        });
+        return keys;
+    }
+
+    /**
+     * Update existing charts without recreating them
+     * Returns false when charts must be (re)built
+     */
+    updateChartsInPlace() {
+        const chartDataKeys = this.getChartDataKeys();
+        const chartIds = Object.keys(this.charts);
+        if (!chartIds.length) return false;
+
+        chartIds.forEach(chartId => {
+            const chart = this.charts[chartId];
+            const dataKeys = chartDataKeys[chartId];
+            if (!chart || !dataKeys) return;
+
+            chart.data.labels = this.chartLabels;
+            dataKeys.forEach((dataKey, index) => {
+                if (chart.data.datasets[index]) {
+                    chart.data.datasets[index].data = this.data[dataKey] || [];
+                }
+            });
+            chart.update('none');
+        });
+        return true;
+    }
+
     /**
      * Handle incoming WebSocket data
      */
-    handleWebSocketData(data) {
+    handleWebSocketData(data, options = {}) {
         console.log(`${this.config.pageName}: Received WebSocket data`, data);
 
         // Parse chart labels
@@ -285,7 +369,10 @@ class PageDataHandler {
         this.parseWebSocketData(data);
 
         // Update charts and metrics (Always update these)
-        this.initializeCharts();
+        // Deltas update the existing charts instead of rebuilding them
+        if (!options.incremental || !this.updateChartsInPlace()) {
+            this.initializeCharts();
+        }
         this.updateMetrics();
 
         // Update table ONLY if we are on the first page
@@ -436,11 +523,11 @@ class PageDataHandler {
         const prevBtn = this.paginationContainer.querySelector('#prevPageBtn');
         const nextBtn = this.paginationContainer.querySelector('#nextPageBtn');
 
-        if (prevBtn) prevBtn.addEventListener('click', () => this.loadPage(this.currentPage - 1));
-        if (nextBtn) nextBtn.addEventListener('click', () => this.loadPage(this.currentPage + 1));
+        if (prevBtn) prevBtn.addEventListener('click', () => this.loadPage(this.currentPage - 1, meta.prev_cursor));
+        if (nextBtn) nextBtn.addEventListener('click', () => this.loadPage(this.currentPage + 1, meta.next_cursor));
     }
 
-    async loadPage(page) {
+    async loadPage(page, cursor = null) {
         if (page < 1) return;
 
         // Show loading state (optional, but good UX)
@@ -448,12 +535,15 @@ class PageDataHandler {
         if (tbody) tbody.style.opacity = '0.5';
 
         try {
-            const data = await APIUtils.fetchData(`/api/history/?page=${page}&limit=${this.itemsPerPage}`);
+            // Keyset cursors: deep pages cost the same as the first one
+            const query = page === 1 || !cursor ? 'pagination=cursor' : `cursor=${encodeURIComponent(cursor)}`;
+            const data = await APIUtils.fetchData(`/api/history/?${query}&limit=${this.itemsPerPage}`);
 
             if (data && data.data) {
-                this.currentPage = page;
+                this.currentPage = page === 1 || cursor ? page : 1;
                 this.updateTable(data.data);
-                this.renderPaginationControls(data.meta);
+                const totalPages = Math.max(1, Math.ceil((data.meta.estimated_total || 0) / this.itemsPerPage));
+                this.renderPaginationControls({ ...data.meta, total_pages: Math.max(totalPages, this.currentPage) });
             }
         } catch (error) {
             console.error('Error loading page:', error);
@@ -0,0 +1,112 @@
+"""
+Typed SystemSetting registry
+Settings editable in the admin (thresholds, chatbot URL) are declared here with a type
+and a default, loaded in one query and served from memory afterwards.
+
+A save/delete of a SystemSetting reloads the registry of the saving process and, once
+committed, bumps a version file (SYSTEM_SETTINGS_VERSION_FILE, see iot.version_file)
+that makes the other workers of the host reload, so configuration reads never query
+the database.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from . import version_file
+from .models import SystemSetting
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Setting:
+    key: str
+    cast: type
+    default: object
+    description: str = ""
+    public: bool = False  # Returned by /api/settings/
+
+
+DEFINITIONS = [
+    Setting("chatbot_url", str, settings.CHATBOT_URL, "URL of the external AI service"),
+    Setting("chatbot_cache_size", int, 256, "Chatbot replies kept in cache per worker (0 disables the cache)"),
+    Setting("chatbot_cache_ttl", int, 600, "Lifetime of a cached chatbot reply (s)"),
+    Setting("cpu_threshold", int, 80, "CPU usage threshold for warnings (%)", public=True),
+    Setting("ram_threshold", int, 85, "RAM usage threshold for warnings (%)", public=True),
+    Setting("power_threshold", int, 250, "Power consumption threshold for warnings (W)", public=True),
+    Setting("co2_threshold", int, 150, "CO2 emissions threshold for warnings (g)", public=True),
+    Setting("eco_threshold", int, 50, "Minimum eco-score before alert", public=True),
+]
+
+
+class SettingsRegistry:
+    """Process-local typed values of the declared settings (database value, else default)"""
+
+    def __init__(self, definitions, version_path):
+        self.definitions = {setting.key: setting for setting in definitions}
+        self.version_path = str(version_path)
+        self._values = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Typed value of a declared setting; KeyError for undeclared keys"""
+        return self._current()[key]
+
+    def values(self, keys):
+        current = self._current()
+        return {key: current[key] for key in keys}
+
+    def loaded_values(self, keys):
+        """Like values() but never queries: None when the registry must be (re)loaded first"""
+        values = self._values
+        if values is None or version_file.read(self.version_path) != self._version:
+            return None
+        return {key: values[key] for key in keys}
+
+    def public_values(self):
+        return self.values([key for key, setting in self.definitions.items() if setting.public])
+
+    def invalidate(self):
+        """Reloads on next read (this process only)"""
+        self._values = None
+
+    def bump(self):
+        """Makes every process reload: atomically replaces the version file"""
+        self.invalidate()
+        version_file.bump(self.version_path)
+
+    def _current(self):
+        values = self._values
+        version = version_file.read(self.version_path)
+        if values is not None and version == self._version:
+            return values
+        with self._lock:
+            if self._values is None or version != self._version:
+                # Version read before the query: a change during the load triggers another one
+                self._values = self._load()
+                self._version = version
+            return self._values
+
+    def _load(self):
+        stored = dict(SystemSetting.objects.filter(key__in=self.definitions).values_list("key", "value"))
+        values = {}
+        for key, setting in self.definitions.items():
+            values[key] = setting.default
+            if key in stored:
+                try:
+                    values[key] = setting.cast(stored[key])
+                except ValueError:
+                    logger.warning(f"Invalid value {stored[key]!r} for setting {key}, using default {setting.default!r}")
+        return values
+
+
+registry = SettingsRegistry(DEFINITIONS, settings.SYSTEM_SETTINGS_VERSION_FILE)
+
+
+def get(key):
+    """Typed value of a declared setting, without database access once loaded"""
+    return registry.get(key)
@@ -0,0 +1,22 @@
+import pytest
+
+from iot import quiz, system_settings
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """Views and consumers exceeding their query budget fail the test instead of logging a warning"""
+    settings.QUERY_BUDGET_ENFORCE = True
+
+
+@pytest.fixture(autouse=True)
+def fresh_quiz_bundle(tmp_path, monkeypatch):
+    """Test rollbacks send no signals: the cached quiz could outlive the rows it was built from"""
+    monkeypatch.setattr(quiz.bundle_cache, "version_path", str(tmp_path / "quiz.version"))
+    quiz.bundle_cache.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def fresh_system_settings():
+    """Same for the settings registry"""
+    system_settings.registry.invalidate()
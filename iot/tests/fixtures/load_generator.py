@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+ECOTRACK IOT - GÉNÉRATEUR DE CHARGE ASYNCHRONE
+================================================================================
+Simule une flotte de capteurs (des milliers d'identifiants distincts) qui envoient
+leurs mesures en parallèle à un débit cible, contre une instance Daphne locale.
+Les données reprennent les motifs de IoTDataSimulator.generate_realistic_data.
+
+Les requêtes sont planifiées en boucle ouverte : la latence est mesurée depuis l'heure
+d'envoi prévue, donc un serveur saturé apparaît dans les percentiles au lieu de
+ralentir silencieusement le générateur.
+
+Usage:
+    daphne -b 127.0.0.1 -p 8000 nuit_info.asgi:application
+    python load_generator.py --sensors 5000 --rate 500 --duration 30 --connections 100
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from send_test_iot_data import IoTDataSimulator
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets
+HISTOGRAM_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class HttpConnection:
+    """Connexion HTTP/1.1 keep-alive minimale sur asyncio (POST JSON uniquement)"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def post_json(self, path, body):
+        """Envoie body (bytes) et retourne le code HTTP; la connexion est réutilisée tant que possible"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        )
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            await self._read_chunks()
+        else:
+            await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection") == "close":
+            await self.close()
+        return status
+
+    async def _read_chunks(self):
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            await self.reader.readexactly(size + 2)
+            if size == 0:
+                return
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+class LoadGenerator:
+    """Générateur de charge : une flotte de simulateurs, un débit cible, un pool de connexions"""
+
+    def __init__(self, base_url="http://127.0.0.1:8000", path="/api/iot-data/", sensors=1000, rate=100.0, connections=50):
+        url = urlsplit(base_url)
+        if url.scheme != "http":
+            raise ValueError("Seul http:// est supporté (instance Daphne locale)")
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.path = path
+        self.rate = rate
+        self.connections = connections
+        self.fleet = [IoTDataSimulator(base_url, sensor_id=f"LOAD_{index:05d}") for index in range(sensors)]
+        self.latencies = []
+        self.outcomes = Counter()
+
+    async def run(self, duration, timeout=5.0):
+        """Envoie rate * duration requêtes; retourne les statistiques"""
+        total = int(self.rate * duration)
+        queue = asyncio.Queue()
+        started = time.perf_counter()
+        workers = [asyncio.create_task(self._worker(queue, timeout)) for _ in range(self.connections)]
+
+        for index in range(total):
+            scheduled = started + index / self.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            queue.put_nowait((scheduled, self.make_body(index)))
+
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        return self.report(total, time.perf_counter() - started)
+
+    def make_body(self, index):
+        """Corps de la requête numéro index"""
+        # Sensors take turns, so every id of the fleet reports at rate / sensors Hz
+        data = self.fleet[index % len(self.fleet)].generate_realistic_data()
+        return json.dumps(data).encode()
+
+    async def _worker(self, queue, timeout):
+        connection = HttpConnection(self.host, self.port)
+        try:
+            while True:
+                scheduled, body = await queue.get()
+                try:
+                    status = await asyncio.wait_for(connection.post_json(self.path, body), timeout)
+                    self.outcomes["ok" if status < 400 else f"HTTP {status}"] += 1
+                except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                    self.outcomes[type(e).__name__] += 1
+                    await connection.close()
+                except Exception as e:
+                    # Réponse inattendue (ligne de statut tronquée...) : comptée, le worker continue
+                    logger.exception("Erreur inattendue pendant une requête")
+                    self.outcomes[type(e).__name__] += 1
+                    await connection.close()
+                finally:
+                    # Sinon queue.join() attendrait indéfiniment
+                    self.latencies.append(time.perf_counter() - scheduled)
+                    queue.task_done()
+        finally:
+            await connection.close()
+
+    def report(self, total, elapsed):
+        latencies = sorted(self.latencies)
+        return {
+            "requests": total,
+            "sensors": len(self.fleet),
+            "elapsed_s": round(elapsed, 3),
+            "target_rps": self.rate,
+            "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+            "ok": self.outcomes["ok"],
+            "errors": {name: count for name, count in self.outcomes.items() if name != "ok"},
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            "histogram": histogram(latencies),
+        }
+
+
+def percentile(sorted_values, pct):
+    """Percentile (rang le plus proche) d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def histogram(latencies):
+    """{"<= N ms": nombre de requêtes} sur HISTOGRAM_BOUNDS, plus "> 5000 ms" """
+    counts = Counter()
+    for latency in latencies:
+        ms = latency * 1000
+        bound = next((bound for bound in HISTOGRAM_BOUNDS if ms <= bound), None)
+        counts[f"<= {bound} ms" if bound is not None else f"> {HISTOGRAM_BOUNDS[-1]} ms"] += 1
+    labels = [f"<= {bound} ms" for bound in HISTOGRAM_BOUNDS] + [f"> {HISTOGRAM_BOUNDS[-1]} ms"]
+    return {label: counts[label] for label in labels if counts[label]}
+
+
+def print_report(report, title="RÉSULTATS DE LA CHARGE"):
+    print(f"\n{'=' * 70}")
+    print(f"📊 {title}")
+    print(f"{'=' * 70}")
+    if report["sensors"]:
+        print(f"📡 Capteurs simulés: {report['sensors']}")
+    print(f"✉️  Requêtes: {report['requests']} en {report['elapsed_s']}s")
+    print(f"📈 Débit: {report['throughput_rps']} req/s (cible {report['target_rps']})")
+    print(f"✅ Succès: {report['ok']}")
+    for name, count in sorted(report["errors"].items()):
+        print(f"❌ {name}: {count}")
+    print(f"⏱️  p50 {report['p50_ms']} ms | p95 {report['p95_ms']} ms | p99 {report['p99_ms']} ms | max {report['max_ms']} ms")
+    largest = max(report["histogram"].values(), default=1)
+    for label, count in report["histogram"].items():
+        print(f"   {label:>10} {'█' * max(1, round(40 * count / largest))} {count}")
+    print(f"{'=' * 70}\n")
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Générateur de charge IoT asynchrone (flotte de capteurs)")
+    parser.add_argument(
+        "--url", default="http://127.0.0.1:8000", help="URL de base du serveur (défaut: http://127.0.0.1:8000)"
+    )
+    parser.add_argument("--path", default="/api/iot-data/", help="Endpoint d'ingestion (défaut: /api/iot-data/)")
+    parser.add_argument("--sensors", type=int, default=1000, help="Nombre d'identifiants de capteurs distincts (défaut: 1000)")
+    parser.add_argument("--rate", type=float, default=100, help="Débit cible total en requêtes/s (défaut: 100)")
+    parser.add_argument("--duration", type=float, default=10, help="Durée de l'envoi en secondes (défaut: 10)")
+    parser.add_argument("--connections", type=int, default=50, help="Connexions keep-alive simultanées (défaut: 50)")
+    parser.add_argument("--timeout", type=float, default=5, help="Timeout par requête en secondes (défaut: 5)")
+    parser.add_argument("--json", dest="json_output", help="Écrit aussi le rapport dans ce fichier JSON")
+
+    args = parser.parse_args()
+
+    generator = LoadGenerator(
+        base_url=args.url, path=args.path, sensors=args.sensors, rate=args.rate, connections=args.connections
+    )
+    try:
+        report = asyncio.run(generator.run(args.duration, timeout=args.timeout))
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interruption par l'utilisateur")
+        return 1
+
+    print_report(report)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
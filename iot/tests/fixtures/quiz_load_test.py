@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+ECOTRACK IOT - TEST DE CHARGE DU QUIZ PENDANT L'INGESTION
+================================================================================
+Envoie des soumissions de quiz (/api/quiz/submit/) pendant qu'une flotte de capteurs
+alimente l'ingestion, et rapporte les percentiles de latence des deux flux. Les deux
+écrivent dans la même base SQLite : comparer le p99 des soumissions avec
+QUIZ_RESULT_WRITE_BEHIND=False (un INSERT par soumission) et True (bulk_create groupés).
+
+Usage:
+    python manage.py seed_quiz
+    QUIZ_RESULT_WRITE_BEHIND=True daphne -b 127.0.0.1 -p 8000 nuit_info.asgi:application
+    python quiz_load_test.py --quiz-rate 200 --iot-rate 300 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+from load_generator import LoadGenerator, print_report
+
+
+class QuizLoadGenerator(LoadGenerator):
+    """Joueurs qui terminent le quiz au débit cible, avec des réponses aléatoires"""
+
+    def __init__(self, base_url, questions=10, rate=100.0, connections=50):
+        super().__init__(base_url, path="/api/quiz/submit/", sensors=0, rate=rate, connections=connections)
+        self.questions = questions
+
+    def make_body(self, index):
+        answers = [random.randrange(4) for _ in range(self.questions)]  # nosec B311 - test data
+        return json.dumps({"answers": answers}).encode()
+
+
+async def run(args):
+    quiz = QuizLoadGenerator(args.url, questions=args.questions, rate=args.quiz_rate, connections=args.connections)
+    tasks = [quiz.run(args.duration, timeout=args.timeout)]
+    if args.iot_rate:
+        ingestion = LoadGenerator(args.url, sensors=args.sensors, rate=args.iot_rate, connections=args.connections)
+        tasks.append(ingestion.run(args.duration, timeout=args.timeout))
+    return await asyncio.gather(*tasks)
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Latence des soumissions de quiz pendant l'ingestion IoT")
+    parser.add_argument(
+        "--url", default="http://127.0.0.1:8000", help="URL de base du serveur (défaut: http://127.0.0.1:8000)"
+    )
+    parser.add_argument("--quiz-rate", type=float, default=100, help="Soumissions de quiz par seconde (défaut: 100)")
+    parser.add_argument("--questions", type=int, default=10, help="Réponses par soumission (défaut: 10)")
+    parser.add_argument(
+        "--iot-rate", type=float, default=200, help="Mesures IoT par seconde en parallèle, 0 = aucune (défaut: 200)"
+    )
+    parser.add_argument("--sensors", type=int, default=1000, help="Nombre d'identifiants de capteurs distincts (défaut: 1000)")
+    parser.add_argument("--duration", type=float, default=10, help="Durée de l'envoi en secondes (défaut: 10)")
+    parser.add_argument("--connections", type=int, default=50, help="Connexions keep-alive par flux (défaut: 50)")
+    parser.add_argument("--timeout", type=float, default=5, help="Timeout par requête en secondes (défaut: 5)")
+    parser.add_argument("--json", dest="json_output", help="Écrit aussi les rapports dans ce fichier JSON")
+
+    args = parser.parse_args()
+
+    try:
+        reports = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interruption par l'utilisateur")
+        return 1
+
+    print_report(reports[0], "SOUMISSIONS DE QUIZ")
+    if len(reports) > 1:
+        print_report(reports[1], "INGESTION IOT (EN PARALLÈLE)")
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as output:
+            json.dump({"quiz": reports[0], "ingestion": reports[1] if len(reports) > 1 else None}, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,146 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Avg
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from iot import aggregates, data_utils, ingestion
+from iot.models import IoTAggregate, IoTData
+
+
+def make_reading(**overrides):
+    payload = {"hardware_sensor_id": "ESP32_AGG", "cpu_usage": 50, "ram_usage": 60, "battery_health": 80.5}
+    payload.update(overrides)
+    return ingestion.build_iot_data(payload)
+
+
+class AggregateTests(TestCase):
+    def test_bulk_insert_updates_aggregates(self):
+        ingestion.persist_readings([make_reading(cpu_usage=v) for v in (10, 20, 60)])
+
+        aggregate = IoTAggregate.objects.get(field="cpu_usage")
+        self.assertEqual(aggregate.count, 3)
+        self.assertEqual(aggregate.total, 90)
+        self.assertEqual(aggregate.sum_squares, 100 + 400 + 3600)
+        self.assertEqual(aggregate.minimum, 10)
+        self.assertEqual(aggregate.maximum, 60)
+
+        ingestion.persist_readings([make_reading(cpu_usage=5), make_reading(cpu_usage=95)])
+
+        aggregate.refresh_from_db()
+        self.assertEqual(aggregate.count, 5)
+        self.assertEqual(aggregate.minimum, 5)
+        self.assertEqual(aggregate.maximum, 95)
+
+    def test_model_create_updates_aggregates(self):
+        """Rows created outside the pipeline (admin, shell) are counted through post_save"""
+        make_reading(cpu_usage=42).save()
+
+        self.assertEqual(aggregates.get_averages(["cpu_usage"]), {"cpu_usage": 42})
+
+    @patch("iot.views.api_views.ingestion.broadcast_updates")
+    def test_ingestion_endpoints_update_aggregates(self, mock_broadcast):
+        client = Client()
+        client.post(reverse("iot_data_post"), data=json.dumps({"cpu_usage": 30}), content_type="application/json")
+        client.post(
+            reverse("iot_data_bulk_post"),
+            data=json.dumps([{"cpu_usage": 50}, {"cpu_usage": 70}]),
+            content_type="application/json",
+        )
+
+        self.assertEqual(IoTAggregate.objects.get(field="cpu_usage").count, 3)
+        self.assertEqual(data_utils.get_hardware_data_dict()["avg_cpu"], 50)
+
+    def test_averages_without_data(self):
+        self.assertEqual(aggregates.get_averages(["cpu_usage", "eco_score"]), {"cpu_usage": 0, "eco_score": 0})
+        self.assertEqual(data_utils.get_energy_data_dict()["avg_power"], 0)
+
+    def test_stats_include_stddev(self):
+        ingestion.persist_readings([make_reading(cpu_usage=v) for v in (2, 4, 4, 4, 5, 5, 7, 9)])
+
+        stats = aggregates.get_stats(["cpu_usage"])["cpu_usage"]
+        self.assertEqual(stats["mean"], 5)
+        self.assertAlmostEqual(stats["stddev"], 2.0)
+
+    def test_rebuild_command_matches_raw_table(self):
+        IoTData.objects.bulk_create([make_reading(cpu_usage=v, battery_health=v / 3) for v in range(1, 11)])
+        self.assertFalse(IoTAggregate.objects.exists())
+
+        out = StringIO()
+        call_command("rebuild_aggregates", stdout=out)
+
+        self.assertIn("10 rows", out.getvalue())
+        raw = IoTData.objects.aggregate(cpu=Avg("cpu_usage"), battery=Avg("battery_health"))
+        averages = aggregates.get_averages(["cpu_usage", "battery_health"])
+        self.assertEqual(averages["cpu_usage"], round(raw["cpu"], 1))
+        self.assertEqual(averages["battery_health"], round(raw["battery"], 1))
+        self.assertEqual(IoTAggregate.objects.get(field="cpu_usage").maximum, 10)
+
+    def test_deleted_readings_are_removed(self):
+        """Rows deleted outside the pipeline (admin, shell) are removed through post_delete"""
+        ingestion.persist_readings([make_reading(cpu_usage=v) for v in (10, 20, 60)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            IoTData.objects.get(cpu_usage=60).delete()
+
+        aggregate = IoTAggregate.objects.get(field="cpu_usage")
+        self.assertEqual((aggregate.count, aggregate.total, aggregate.sum_squares), (2, 30, 500))
+        self.assertEqual((aggregate.minimum, aggregate.maximum), (10, 20))
+        self.assertEqual(aggregates.get_averages(["cpu_usage"]), {"cpu_usage": 15})
+
+    def test_queryset_delete_removes_readings(self):
+        ingestion.persist_readings([make_reading(cpu_usage=v) for v in (10, 20, 60)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            IoTData.objects.filter(cpu_usage__lt=30).delete()
+
+        stats = aggregates.get_stats(["cpu_usage"])["cpu_usage"]
+        self.assertEqual((stats["count"], stats["mean"], stats["min"], stats["max"]), (1, 60, 60, 60))
+        self.assertEqual(stats["stddev"], 0)
+
+    def test_bulk_delete_removes_readings_in_one_batch(self):
+        """The aggregates cost the same few queries however many rows are deleted"""
+        ingestion.persist_readings([make_reading(cpu_usage=v % 100) for v in range(400)])
+
+        with self.captureOnCommitCallbacks() as callbacks, CaptureQueriesContext(connection) as deleted:
+            IoTData.objects.all().delete()
+        self.assertEqual(len(callbacks), 1)
+        with CaptureQueriesContext(connection) as removed:
+            callbacks[0]()
+
+        # Collector: SELECT, SET NULL, 4 DELETE batches; removal: UPDATE, SELECT of the aggregates,
+        # MIN/MAX, compacted rows, bulk_update (and a savepoint)
+        self.assertLessEqual(len(deleted), 6)
+        self.assertLessEqual(len(removed), 7)
+        self.assertEqual(aggregates.get_stats(["cpu_usage"])["cpu_usage"]["count"], 0)
+
+    def test_rolled_back_deletes_are_not_removed(self):
+        ingestion.persist_readings([make_reading(cpu_usage=v) for v in (10, 20)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    IoTData.objects.get(cpu_usage=20).delete()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            IoTData.objects.get(cpu_usage=10).delete()
+
+        aggregate = IoTAggregate.objects.get(field="cpu_usage")
+        self.assertEqual((aggregate.count, aggregate.total, aggregate.minimum, aggregate.maximum), (1, 20, 20, 20))
+
+    def test_updated_reading_replaces_its_values(self):
+        reading = make_reading(cpu_usage=10)
+        reading.save()
+
+        reading.cpu_usage = 90
+        with self.captureOnCommitCallbacks(execute=True):
+            reading.save()
+
+        aggregate = IoTAggregate.objects.get(field="cpu_usage")
+        self.assertEqual((aggregate.count, aggregate.total, aggregate.minimum, aggregate.maximum), (1, 90, 90, 90))
@@ -0,0 +1,34 @@
+import json
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from iot import broadcast
+from iot.models import IoTAggregate, IoTData
+
+
+class AsyncIngestionTests(TestCase):
+    def tearDown(self):
+        broadcast.scheduler.detach()
+
+    async def test_creates_reading_and_wakes_scheduler(self):
+        payload = {"hardware": {"sensor_id": "ESP32_ASYNC", "cpu_usage": 42}}
+
+        with patch.object(broadcast.scheduler, "mark_dirty") as mark_dirty:
+            response = await self.async_client.post(
+                reverse("iot_data_post_async"), json.dumps(payload), content_type="application/json"
+            )
+
+        self.assertEqual(response.status_code, 201)
+        reading = await IoTData.objects.aget(id=response.json()["id"])
+        self.assertEqual((reading.hardware_sensor_id, reading.cpu_usage), ("ESP32_ASYNC", 42))
+        aggregate = await IoTAggregate.objects.aget(field="cpu_usage")
+        self.assertEqual(aggregate.count, 1)
+        mark_dirty.assert_called_once_with()
+
+    async def test_invalid_json(self):
+        response = await self.async_client.post(reverse("iot_data_post_async"), "{oops", content_type="application/json")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(await IoTData.objects.acount(), 0)
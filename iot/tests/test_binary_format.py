@@ -0,0 +1,79 @@
+import json
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from iot import binary_format
+from iot.models import IoTData, SensorState
+
+IDENTITY = {"hardware_sensor_id": "ESP32_BIN", "energy_sensor_id": "ENERGY_BIN", "network_sensor_id": "NET_BIN", "os": "Linux"}
+VALUES = {
+    "hardware_timestamp": 1760000000,
+    "age_years": 4,
+    "cpu_usage": 55,
+    "ram_usage": 61,
+    "battery_health": 80.3,
+    "win11_compat": True,
+    "power_watts": 180,
+    "co2_equiv_g": 320,
+    "requests_per_min": 900,
+    "eco_score": 72,
+}
+
+
+class BinaryIngestionTests(TestCase):
+    def setUp(self):
+        binary_format._devices.clear()
+        self.client = Client()
+        response = self.client.post(reverse("api_register_device"), json.dumps(IDENTITY), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.device_id = response.json()["device_id"]
+
+    def post(self, url_name, body):
+        return self.client.post(reverse(url_name), body, content_type=binary_format.CONTENT_TYPE)
+
+    def test_registration_is_idempotent(self):
+        response = self.client.post(reverse("api_register_device"), json.dumps(IDENTITY), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["device_id"], self.device_id)
+        self.assertEqual(response.json()["record_size"], 46)
+
+    def test_single_record(self):
+        response = self.post("iot_data_post", binary_format.encode(VALUES, self.device_id))
+
+        self.assertEqual(response.status_code, 201)
+        reading = IoTData.objects.get(id=response.json()["id"])
+        self.assertEqual(reading.hardware_sensor_id, "ESP32_BIN")
+        self.assertEqual(reading.network_sensor_id, "NET_BIN")
+        self.assertEqual(reading.os, "Linux")
+        self.assertEqual(reading.cpu_usage, 55)
+        self.assertEqual(reading.battery_health, 80.3)
+        self.assertTrue(reading.win11_compat)
+        self.assertEqual(reading.recommendations, {})
+        # Same pipeline as JSON readings
+        self.assertTrue(SensorState.objects.filter(kind="energy", sensor_id="ENERGY_BIN").exists())
+
+    def test_bulk_records(self):
+        body = b"".join(binary_format.encode({**VALUES, "cpu_usage": cpu}, self.device_id) for cpu in (10, 20, 30))
+
+        response = self.post("iot_data_bulk_post", body)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 3)
+        self.assertEqual(sorted(IoTData.objects.values_list("cpu_usage", flat=True)), [10, 20, 30])
+
+    def test_invalid_bodies_are_rejected(self):
+        record = binary_format.encode(VALUES, self.device_id)
+        cases = {
+            "Unknown device id(s): 9999": binary_format.encode(VALUES, 9999),
+            "Truncated record at byte 46": record + record[:10],
+            "Unsupported layout version 7 at byte 0": b"\x07" + record[1:],
+            "Expected one record": record + record,
+        }
+        for message, body in cases.items():
+            with self.subTest(message=message):
+                response = self.post("iot_data_post", body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.json()["error"])
+        self.assertEqual(IoTData.objects.count(), 0)
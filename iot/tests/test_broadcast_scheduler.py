@@ -0,0 +1,184 @@
+import asyncio
+import importlib
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import HttpCommunicator
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from iot import broadcast
+from iot.broadcast import BroadcastScheduler
+from iot.channel_layer import SQLiteChannelLayer
+from iot.models import IoTData
+
+
+class BroadcastSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = {"group_a": 0, "group_b": 0}
+
+        def builder(group):
+            def build():
+                self.calls[group] += 1
+                return {"group": group, "calls": self.calls[group]}
+
+            return build
+
+        self.scheduler = BroadcastScheduler({group: builder(group) for group in self.calls}, interval=0.05)
+
+    def tearDown(self):
+        self.scheduler.detach()
+
+    async def test_burst_is_coalesced(self):
+        """100 dirty marks within one interval produce one rebuild per group"""
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add("group_a", channel)
+
+        self.scheduler.attach()
+        for _ in range(100):
+            self.scheduler.mark_dirty()
+
+        message = await asyncio.wait_for(channel_layer.receive(channel), timeout=1)
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(message["type"], "data_update")
+        self.assertEqual(message["data"], {"group": "group_a", "calls": 1, "type": "snapshot", "version": 1, "seq": 1})
+        self.assertEqual(self.calls, {"group_a": 1, "group_b": 1})
+        await channel_layer.group_discard("group_a", channel)
+
+    async def test_rebuilds_are_spaced_by_interval(self):
+        self.scheduler.attach()
+        self.scheduler.mark_dirty(["group_a"])
+        await asyncio.sleep(0.01)
+        self.scheduler.mark_dirty(["group_a"])
+        await asyncio.sleep(0.01)
+
+        # Second refresh waits for the interval to elapse
+        self.assertEqual(self.calls["group_a"], 1)
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.calls, {"group_a": 2, "group_b": 0})
+
+    async def test_marks_before_attach_are_kept(self):
+        self.scheduler.mark_dirty(["group_b"])
+        self.scheduler.attach()
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.calls, {"group_a": 0, "group_b": 1})
+
+
+def page(*ids):
+    """Page dict whose chart shows the readings with these ids"""
+    return {
+        "chart_labels": json.dumps([f"t{point_id}" for point_id in ids]),
+        "cpu_data": json.dumps([point_id * 10 for point_id in ids]),
+        "latest_data": [{"id": point_id} for point_id in reversed(ids)],
+        "avg_cpu": sum(ids) * 10 / len(ids),
+    }
+
+
+class SharedSequenceTests(SimpleTestCase):
+    """Two workers broadcasting to the same groups through the SQLite channel layer"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = str(Path(directory.name) / "channels.sqlite3")
+        self.pages = {"a": page(1, 2), "b": page(1, 2)}
+        self.layers = {worker: SQLiteChannelLayer(path, poll_interval=0.005) for worker in self.pages}
+        self.schedulers = {
+            worker: BroadcastScheduler({"group_a": lambda worker=worker: self.pages[worker]}) for worker in self.pages
+        }
+
+    async def asyncTearDown(self):
+        for layer in self.layers.values():
+            await layer.close()
+
+    async def flush(self, worker):
+        self.schedulers[worker].mark_dirty()
+        with patch("iot.broadcast.get_channel_layer", return_value=self.layers[worker]):
+            return await self.schedulers[worker].flush()
+
+    async def current_seq(self, worker):
+        with patch("iot.broadcast.get_channel_layer", return_value=self.layers[worker]):
+            return await self.schedulers[worker].current_seq("group_a")
+
+    async def test_workers_share_seq_and_delta_base(self):
+        client = self.layers["b"]
+        channel = await client.new_channel()
+        await client.group_add("group_a", channel)
+
+        self.assertEqual(await self.flush("a"), 1)
+        self.pages["b"] = page(1, 2, 3)
+        self.assertEqual(await self.flush("b"), 1)
+        self.pages["a"] = page(2, 3, 4)
+        self.assertEqual(await self.flush("a"), 1)
+
+        messages = [await asyncio.wait_for(client.receive(channel), 5) for _ in range(3)]
+        self.assertEqual([message["data"]["seq"] for message in messages], [1, 2, 3])
+        # Each delta is built against the previous broadcast, whichever worker sent it
+        self.assertEqual([point["id"] for point in messages[1]["delta"]["append"]], [3])
+        self.assertEqual(messages[2]["delta"]["append"][0]["id"], 4)
+        self.assertEqual(messages[2]["delta"]["evict"], [1])
+        # A client connecting to either worker starts from the shared seq
+        self.assertEqual(await self.current_seq("a"), 3)
+        self.assertEqual(await self.current_seq("b"), 3)
+
+    async def test_unchanged_or_older_data_is_not_sent(self):
+        self.assertEqual(await self.flush("a"), 1)
+        # Worker b read the same readings
+        self.assertEqual(await self.flush("b"), 0)
+
+        self.pages["b"] = page(1, 2, 3)
+        with patch("iot.broadcast.time.time", return_value=0):
+            # Built from a read older than the last broadcast
+            self.assertEqual(await self.flush("b"), 0)
+        self.assertEqual(await self.current_seq("b"), 1)
+
+
+class IngestionSchedulingTests(TestCase):
+    @patch("iot.ingestion.broadcast.scheduler.mark_dirty")
+    def test_post_schedules_broadcast_after_commit(self, mock_mark_dirty):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = Client().post(
+                reverse("iot_data_post"), data=json.dumps({"cpu_usage": 10}), content_type="application/json"
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(IoTData.objects.count(), 1)
+        self.assertEqual(len(callbacks), 1)
+        mock_mark_dirty.assert_called_once_with()
+
+
+class WorkerWithoutConsumerTests(TransactionTestCase):
+    def tearDown(self):
+        broadcast.scheduler.detach()
+
+    async def test_ingestion_reaches_sockets_of_other_workers(self):
+        """A worker serving no WebSocket client still flushes the readings it ingests"""
+        # The module loads the settings registry on import
+        application = (await sync_to_async(importlib.import_module)("nuit_info.asgi")).application
+        broadcast.scheduler.detach()
+        channel_layer = get_channel_layer()
+        # A dashboard socket served by another worker
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add("dashboard_updates", channel)
+
+        communicator = HttpCommunicator(
+            application,
+            "POST",
+            reverse("iot_data_post"),
+            body=json.dumps({"cpu_usage": 10}).encode(),
+            headers=[(b"host", b"testserver"), (b"content-type", b"application/json")],
+        )
+        response = await communicator.get_response(timeout=5)
+
+        self.assertEqual(response["status"], 201)
+        message = await asyncio.wait_for(channel_layer.receive(channel), timeout=5)
+        self.assertEqual(message["type"], "data_update")
+        self.assertEqual(message["data"]["latest_data"][0]["cpu_usage"], 10)
+        await channel_layer.group_discard("dashboard_updates", channel)
@@ -0,0 +1,67 @@
+import json
+from unittest.mock import patch
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from iot.models import IoTData
+
+
+@patch("iot.views.api_views.ingestion.broadcast_updates")
+class BulkIngestionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("iot_data_bulk_post")
+
+    def test_json_array_creates_all_rows(self, mock_broadcast):
+        """A JSON array is saved in one go and broadcast once"""
+        payload = [{"hardware": {"sensor_id": f"ESP32_{i}", "cpu_usage": 40 + i}} for i in range(3)]
+
+        response = self.client.post(self.url, data=json.dumps(payload), content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data["created"], 3)
+        self.assertEqual(data["failed"], 0)
+        self.assertEqual(IoTData.objects.count(), 3)
+        self.assertEqual([r["id"] for r in data["results"]], list(IoTData.objects.order_by("id").values_list("id", flat=True)))
+        mock_broadcast.assert_called_once()
+
+    def test_ndjson_with_invalid_lines(self, mock_broadcast):
+        """Bad lines are reported by index without rejecting the valid ones"""
+        body = "\n".join(
+            [
+                json.dumps({"hardware_sensor_id": "A", "cpu_usage": 10}),
+                "{not json",
+                json.dumps({"hardware_sensor_id": "B", "cpu_usage": "high"}),
+                json.dumps([1, 2]),
+                json.dumps({"hardware_sensor_id": "C", "cpu_usage": 30}),
+            ]
+        )
+
+        response = self.client.post(self.url, data=body, content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], ["created", "error", "error", "error", "created"])
+        self.assertIn("cpu_usage", results[2]["error"])
+        self.assertEqual(list(IoTData.objects.order_by("id").values_list("hardware_sensor_id", flat=True)), ["A", "C"])
+        mock_broadcast.assert_called_once()
+
+    def test_all_items_invalid(self, mock_broadcast):
+        response = self.client.post(self.url, data=json.dumps(["a", "b"]), content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["failed"], 2)
+        mock_broadcast.assert_not_called()
+
+    def test_invalid_body(self, mock_broadcast):
+        response = self.client.post(self.url, data="garbage", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(IOT_BULK_MAX_ITEMS=2)
+    def test_batch_too_large(self, mock_broadcast):
+        response = self.client.post(self.url, data=json.dumps([{}, {}, {}]), content_type="application/json")
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(IoTData.objects.count(), 0)
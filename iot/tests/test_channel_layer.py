@@ -0,0 +1,103 @@
+import asyncio
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from channels.exceptions import ChannelFull
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from iot.channel_layer import INBOX_TIMEOUT, SQLiteChannelLayer
+
+GROUP_SEND_SCRIPT = """
+import asyncio, sys
+from iot.channel_layer import SQLiteChannelLayer
+asyncio.run(SQLiteChannelLayer(sys.argv[1]).group_send("updates", {"type": "data_update", "value": 42}))
+"""
+
+
+class SQLiteChannelLayerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "channels.sqlite3")
+        self.layers = []
+
+    def layer(self, **kwargs):
+        """One layer per simulated worker process (each has its own inbox)"""
+        layer = SQLiteChannelLayer(self.path, poll_interval=0.005, **kwargs)
+        self.layers.append(layer)
+        return layer
+
+    async def asyncTearDown(self):
+        for layer in self.layers:
+            await layer.close()
+
+    async def test_group_send_reaches_every_worker(self):
+        worker_a, worker_b = self.layer(), self.layer()
+        channel_a = await worker_a.new_channel()
+        channel_b = await worker_b.new_channel()
+        await worker_a.group_add("updates", channel_a)
+        await worker_b.group_add("updates", channel_b)
+
+        # Sent from another OS process
+        subprocess.run(  # nosec B603
+            [sys.executable, "-c", GROUP_SEND_SCRIPT, self.path], check=True, cwd=settings.BASE_DIR, timeout=30
+        )
+
+        expected = {"type": "data_update", "value": 42}
+        self.assertEqual(await asyncio.wait_for(worker_a.receive(channel_a), 5), expected)
+        self.assertEqual(await asyncio.wait_for(worker_b.receive(channel_b), 5), expected)
+
+    async def test_worker_receives_its_own_group_sends(self):
+        # The ingesting worker broadcasts to its own sockets; with a single executor thread the
+        # sends and the polls share one connection, whose own commits leave data_version unchanged
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=False)
+        asyncio.get_running_loop().set_default_executor(executor)
+        worker = self.layer()
+        channel = await worker.new_channel()
+        await worker.group_add("updates", channel)
+
+        for seq in range(3):
+            await worker.group_send("updates", {"type": "data_update", "seq": seq})
+            self.assertEqual(await asyncio.wait_for(worker.receive(channel), 1), {"type": "data_update", "seq": seq})
+
+    async def test_discarded_channels_stop_receiving(self):
+        sender, worker = self.layer(), self.layer()
+        kept, dropped = await worker.new_channel(), await worker.new_channel()
+        await worker.group_add("updates", kept)
+        await worker.group_add("updates", dropped)
+        await worker.group_discard("updates", dropped)
+
+        await sender.group_send("updates", {"type": "data_update", "seq": 1})
+
+        self.assertEqual(await asyncio.wait_for(worker.receive(kept), 5), {"type": "data_update", "seq": 1})
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(worker.receive(dropped), 0.2)
+
+    async def test_send_respects_capacity_and_expiry(self):
+        sender, worker = self.layer(capacity=2, expiry=0.1), self.layer()
+        channel = await worker.new_channel()
+        await sender.send(channel, {"type": "a"})
+        await sender.send(channel, {"type": "b"})
+        with self.assertRaises(ChannelFull):
+            await sender.send(channel, {"type": "c"})
+
+        await asyncio.sleep(0.2)
+        await sender.send(channel, {"type": "fresh"})
+        self.assertEqual(await asyncio.wait_for(worker.receive(channel), 5), {"type": "fresh"})
+
+    async def test_dead_workers_leave_their_groups(self):
+        live, dead = self.layer(), self.layer()
+        channel = await dead.new_channel()
+        await dead.group_add("updates", channel)
+
+        # A worker that stopped heartbeating for longer than INBOX_TIMEOUT
+        await live._run(live._heartbeat, [], time.time() + INBOX_TIMEOUT + 1)
+
+        rows = await live._run(lambda: live._connection().execute("SELECT COUNT(*) FROM channel_groups").fetchone())
+        self.assertEqual(rows, (0,))
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import socket
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from iot import chatbot, chatbot_cache, metrics, system_settings
+from iot.models import SystemSetting
+
+
+class StubChatbot:
+    """Local HTTP/1.1 chatbot service: replies per path, keeps connections alive"""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while request_line := await reader.readline():
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+                await self.reply(request_line.split()[1].decode(), body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def reply(self, path, body, writer):
+        if path in ("/chat", "/think"):
+            if path == "/think":
+                await asyncio.sleep(0.1)
+            reply = json.dumps({"reply": json.loads(body)["message"].upper()}).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s" % (len(reply), reply)
+            )
+        elif path == "/stream":
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for word in (b"Bonjour", b" le", b" monde"):
+                writer.write(b"%x\r\n%s\r\n" % (len(word), word))
+                await writer.drain()
+                await asyncio.sleep(0.01)
+            writer.write(b"0\r\n\r\n")
+        elif path == "/slow":
+            await asyncio.sleep(1)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+        else:
+            writer.write(b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+
+
+@override_settings(CHATBOT_TIMEOUT=0.5, CHATBOT_MAX_CONCURRENCY=1, CHATBOT_QUEUE_TIMEOUT=0.1, CHATBOT_BREAKER_FAILURES=2)
+class ChatbotProxyTests(TestCase):
+    def setUp(self):
+        chatbot.reset()
+        chatbot_cache.reset()
+        self.stub = StubChatbot()
+
+    async def chat(self, url, message="hello"):
+        await SystemSetting.objects.aupdate_or_create(key="chatbot_url", defaults={"value": url})
+        # Loaded here, like asgi.py does at startup: the proxy then reads it without a query
+        await sync_to_async(system_settings.registry.values)(["chatbot_url"])
+        response = await self.async_client.post(
+            reverse("api_chatbot_proxy"), json.dumps({"message": message}), content_type="application/json"
+        )
+        content = b"".join([chunk async for chunk in response.streaming_content]) if response.streaming else response.content
+        return response, content
+
+    async def test_reply_is_relayed_over_a_pooled_connection(self):
+        async with self.stub as url:
+            for message in ("hello", "again"):
+                response, content = await self.chat(url + "/chat", message)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(content), {"reply": message.upper()})
+
+        self.assertEqual((self.stub.requests, self.stub.connections), (2, 1))
+
+    async def test_chunked_reply_is_streamed(self):
+        async with self.stub as url:
+            response, content = await self.chat(url + "/stream")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/plain")
+        self.assertEqual(content, b"Bonjour le monde")
+
+    async def test_circuit_opens_after_failures(self):
+        async with self.stub as url:
+            for _ in range(2):
+                response, _ = await self.chat(url + "/fail")
+                self.assertEqual(response.status_code, 502)
+
+            response, content = await self.chat(url + "/chat")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("temporairement indisponible", json.loads(content)["error"])
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(self.stub.requests, 2)
+
+    async def test_concurrency_is_bounded(self):
+        async with self.stub as url:
+            slow = asyncio.create_task(self.chat(url + "/slow"))
+            await asyncio.sleep(0.1)
+
+            response, content = await self.chat(url + "/chat")
+            self.assertEqual(response.status_code, 503)
+            self.assertIn("Trop de conversations", json.loads(content)["error"])
+
+            # The slow reply exceeds CHATBOT_TIMEOUT
+            response, _ = await slow
+            self.assertEqual(response.status_code, 504)
+
+    async def test_unreachable_service(self):
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+
+        response, content = await self.chat(f"http://127.0.0.1:{port}/chat")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("La connexion au service IA a échoué", json.loads(content)["error"])
+
+    async def test_invalid_json(self):
+        response = await self.async_client.post(reverse("api_chatbot_proxy"), "{oops", content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_repeated_message_is_served_from_cache(self):
+        hits = metrics.CHATBOT_CACHE_REQUESTS.value(result="hit")
+        async with self.stub as url:
+            _, content = await self.chat(url + "/chat", "Qu'est-ce que l'eco score ?")
+            response, cached = await self.chat(url + "/chat", "  qu'est-ce que   l'ECO score ? ")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(cached, content)
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(metrics.CHATBOT_CACHE_REQUESTS.value(result="hit"), hits + 1)
+
+    async def test_concurrent_identical_messages_share_one_call(self):
+        coalesced = metrics.CHATBOT_CACHE_REQUESTS.value(result="coalesced")
+        async with self.stub as url:
+            # A single concurrency slot (CHATBOT_MAX_CONCURRENCY=1) serves all three
+            replies = await asyncio.gather(*[self.chat(url + "/think", "eco score") for _ in range(3)])
+
+        for response, content in replies:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(content), {"reply": "ECO SCORE"})
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(metrics.CHATBOT_CACHE_REQUESTS.value(result="coalesced"), coalesced + 2)
+
+    async def test_cache_can_be_disabled(self):
+        await SystemSetting.objects.acreate(key="chatbot_cache_size", value="0")
+        async with self.stub as url:
+            for _ in range(2):
+                response, _ = await self.chat(url + "/chat")
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.stub.requests, 2)
+
+
+class ReplyCacheTests(TestCase):
+    def test_least_recently_used_and_expired_replies_are_dropped(self):
+        now = 0.0
+        cache = chatbot_cache.ReplyCache(clock=lambda: now)
+        reply = chatbot_cache.Reply(200, "application/json", b"{}")
+        cache.put("a", reply, max_size=2, ttl=60)
+        cache.put("b", reply, max_size=2, ttl=60)
+        cache.get("a")
+        cache.put("c", reply, max_size=2, ttl=60)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), reply)
+        now = 60.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 1)
+
+    def test_key_ignores_case_whitespace_and_key_order(self):
+        self.assertEqual(
+            chatbot_cache.cache_key("http://ia/chat", {"message": " Eco  Score", "lang": "fr"}),
+            chatbot_cache.cache_key("http://ia/chat", {"lang": "FR", "message": "eco score"}),
+        )
+        self.assertNotEqual(
+            chatbot_cache.cache_key("http://ia/chat", {"message": "eco score"}),
+            chatbot_cache.cache_key("http://other/chat", {"message": "eco score"}),
+        )
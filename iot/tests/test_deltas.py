@@ -0,0 +1,116 @@
+import json
+
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase
+
+from iot import broadcast, deltas
+from iot.broadcast import BroadcastScheduler
+from iot.consumers import BaseDataConsumer
+
+
+def page_dict(ids, avg_cpu=50.0):
+    """Page dict shaped like data_utils output for readings with the given ids (oldest first)"""
+    rows = [{"id": i, "cpu_usage": i * 10, "created_at": f"2026-01-01T00:00:{i:02d}"} for i in ids]
+    return {
+        "chart_labels": json.dumps([f"00:00:{i:02d}" for i in ids]),
+        "cpu_data": json.dumps([i * 10 for i in ids]),
+        "latest_data": list(reversed(rows)),
+        "avg_cpu": avg_cpu,
+        "avg_ram": 40.0,
+    }
+
+
+class BuildDeltaTests(SimpleTestCase):
+    def test_append_and_evict(self):
+        delta = deltas.build_delta(page_dict([1, 2, 3]), page_dict([2, 3, 4], avg_cpu=51.0), seq=7)
+
+        self.assertEqual(delta["type"], "delta")
+        self.assertEqual(delta["seq"], 7)
+        self.assertEqual(delta["window"], 3)
+        self.assertEqual(delta["evict"], [1])
+        self.assertEqual(
+            delta["append"],
+            [
+                {
+                    "id": 4,
+                    "label": "00:00:04",
+                    "values": {"cpu_data": 40},
+                    "row": {"id": 4, "cpu_usage": 40, "created_at": "2026-01-01T00:00:04"},
+                }
+            ],
+        )
+        # Only changed aggregates are sent
+        self.assertEqual(delta["aggregates"], {"avg_cpu": 51.0})
+
+    def test_delta_is_smaller_than_snapshot(self):
+        previous = page_dict(range(1, 9))
+        current = page_dict(range(2, 10))
+
+        delta = deltas.build_delta(previous, current, seq=2)
+
+        self.assertLess(len(json.dumps(delta)), len(json.dumps(current)) / 2)
+
+    def test_full_snapshot_needed(self):
+        self.assertIsNone(deltas.build_delta(None, page_dict([1]), seq=1))
+        # Newest row deleted: the window refills with an older row, which cannot be appended
+        self.assertIsNone(deltas.build_delta(page_dict([5, 6, 7]), page_dict([4, 5, 6]), seq=2))
+
+
+class FakeConsumer(BaseDataConsumer):
+    group_name = "delta_test_updates"
+    ids = [1, 2, 3]
+
+    def get_data(self):
+        return page_dict(self.ids)
+
+
+class DeltaConsumerTests(SimpleTestCase):
+    def setUp(self):
+        self.scheduler = BroadcastScheduler({"delta_test_updates": lambda: page_dict(FakeConsumer.ids)}, interval=0)
+
+    def tearDown(self):
+        self.scheduler.detach()
+        # Consumers attach the shared scheduler to the test event loop
+        broadcast.scheduler.detach()
+
+    async def connect(self, path):
+        communicator = WebsocketCommunicator(FakeConsumer.as_asgi(), path)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator, await communicator.receive_json_from()
+
+    async def test_delta_and_legacy_clients(self):
+        delta_client, snapshot = await self.connect("/ws/test/?protocol=delta")
+        legacy_client, _ = await self.connect("/ws/test/")
+        self.assertEqual(snapshot["type"], "snapshot")
+        self.assertEqual(snapshot["cpu_data"], "[10, 20, 30]")
+
+        self.scheduler.mark_dirty()
+        await self.scheduler.flush()
+        FakeConsumer.ids = [2, 3, 4]
+        self.scheduler.mark_dirty()
+        await self.scheduler.flush()
+
+        # First broadcast has no previous state: both clients get a snapshot
+        first = await delta_client.receive_json_from()
+        self.assertEqual((first["type"], first["seq"]), ("snapshot", 1))
+        second = await delta_client.receive_json_from()
+        self.assertEqual((second["type"], second["seq"], second["evict"]), ("delta", 2, [1]))
+
+        await legacy_client.receive_json_from()
+        legacy = await legacy_client.receive_json_from()
+        self.assertEqual(legacy["cpu_data"], "[20, 30, 40]")
+
+        await delta_client.disconnect()
+        await legacy_client.disconnect()
+        FakeConsumer.ids = [1, 2, 3]
+
+    async def test_resync_request(self):
+        client, _ = await self.connect("/ws/test/?protocol=delta")
+
+        await client.send_json_to({"type": "resync"})
+        resync = await client.receive_json_from()
+
+        self.assertEqual(resync["type"], "snapshot")
+        self.assertIn("latest_data", resync)
+        await client.disconnect()
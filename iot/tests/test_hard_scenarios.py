@@ -1,12 +1,10 @@
 import json
-from unittest.mock import Mock, patch
 
-import requests
 from django.contrib.auth.models import User
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from iot.models import IoTData, QuizQuestion, QuizResult, QuizResultMessage, SystemSetting
+from iot.models import IoTData, QuizQuestion, QuizResult, QuizResultMessage
 
 
 class HardScenarioTests(TestCase):
@@ -87,48 +85,6 @@ class HardScenarioTests(TestCase):
         response = self.client.post(reverse("api_quiz_submit"), data="Not valid json", content_type="application/json")
         self.assertEqual(response.status_code, 400)
 
-    # ==================== CHATBOT PROXY HARD TESTS ====================
-
-    # We used side_effect on the mocked object logic below
-    @patch("iot.views.api_views.requests.post")
-    def test_chatbot_proxy_connection_error(self, mock_post):
-        """Test graceful handling of downstream absolute failure"""
-        mock_post.side_effect = requests.exceptions.ConnectionError("Connection refused")
-
-        response = self.client.post(
-            reverse("api_chatbot_proxy"), data=json.dumps({"message": "hello"}), content_type="application/json"
-        )
-
-        self.assertEqual(response.status_code, 503)
-        self.assertIn("La connexion au service IA a échoué", response.json()["error"])
-
-    @patch("iot.views.api_views.requests.post")
-    def test_chatbot_proxy_timeout(self, mock_post):
-        """Test graceful handling of timeout"""
-        mock_post.side_effect = requests.exceptions.Timeout("Read timeout")
-
-        response = self.client.post(
-            reverse("api_chatbot_proxy"), data=json.dumps({"message": "hello"}), content_type="application/json"
-        )
-
-        self.assertEqual(response.status_code, 500)  # Generic exception in view caught as 500
-
-    @patch("iot.views.api_views.requests.post")
-    def test_chatbot_proxy_dynamic_url(self, mock_post):
-        """Test that the proxy uses the URL from SystemSettings if present"""
-        SystemSetting.objects.create(key="chatbot_url", value="http://custom-ai.local/api")
-
-        mock_response = Mock()
-        mock_response.ok = True
-        mock_response.json.return_value = {"reply": "Custom AI"}
-        mock_post.return_value = mock_response
-
-        self.client.post(reverse("api_chatbot_proxy"), data=json.dumps({"message": "hello"}), content_type="application/json")
-
-        # Verify calls
-        args, kwargs = mock_post.call_args
-        self.assertEqual(args[0], "http://custom-ai.local/api")
-
     # ==================== IOT DATA INGESTION HARD TESTS ====================
 
     def test_data_ingestion_partial_payload(self):
@@ -0,0 +1,98 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from iot import ingestion
+from iot.models import IoTData
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        ingestion.persist_readings([ingestion.build_iot_data({"cpu_usage": i}) for i in range(25)])
+        self.expected_ids = list(IoTData.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def get_page(self, **params):
+        response = self.client.get(reverse("api_history"), {"pagination": "cursor", "limit": 10, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk_forward(self):
+        pages = [self.get_page()]
+        while pages[-1]["meta"]["has_next"]:
+            pages.append(self.get_page(cursor=pages[-1]["meta"]["next_cursor"]))
+        return pages
+
+    def test_walk_all_pages(self):
+        pages = self.walk_forward()
+
+        self.assertEqual([len(page["data"]) for page in pages], [10, 10, 5])
+        self.assertEqual([row["id"] for page in pages for row in page["data"]], self.expected_ids)
+        self.assertFalse(pages[0]["meta"]["has_previous"])
+        self.assertIsNone(pages[-1]["meta"]["next_cursor"])
+
+    def test_previous_cursor(self):
+        pages = self.walk_forward()
+
+        previous = self.get_page(cursor=pages[2]["meta"]["prev_cursor"])
+        self.assertEqual(previous["data"], pages[1]["data"])
+        first = self.get_page(cursor=previous["meta"]["prev_cursor"])
+        self.assertEqual(first["data"], pages[0]["data"])
+        self.assertFalse(first["meta"]["has_previous"])
+
+    def test_identical_timestamps_use_id_tie_breaker(self):
+        IoTData.objects.update(created_at=timezone.now())
+        self.expected_ids = sorted(self.expected_ids, reverse=True)
+
+        pages = self.walk_forward()
+
+        self.assertEqual([row["id"] for page in pages for row in page["data"]], self.expected_ids)
+
+    def test_totals(self):
+        meta = self.get_page()["meta"]
+        self.assertEqual(meta["estimated_total"], 25)
+        self.assertNotIn("total_items", meta)
+
+        self.assertEqual(self.get_page(total="exact")["meta"]["total_items"], 25)
+
+    def test_deep_page_has_constant_query_count(self):
+        last_cursor = self.walk_forward()[-2]["meta"]["next_cursor"]
+
+        # Rows + estimated total, no COUNT(*) nor OFFSET
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("api_history"), {"cursor": last_cursor, "limit": 10})
+        self.assertEqual(response.json()["data"][-1]["id"], self.expected_ids[-1])
+
+    def test_pages_seek_the_index(self):
+        """Deep pages start at the cursor in the (created_at, id) index instead of scanning it"""
+        pages = self.walk_forward()
+        with connection.cursor() as cursor:
+            # With statistics, SQLite plans an OR of keyset terms as a full index scan
+            cursor.execute("ANALYZE")
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        for cursor in (pages[1]["meta"]["next_cursor"], pages[2]["meta"]["prev_cursor"]):
+            queries.clear()
+            with connection.execute_wrapper(record):
+                self.client.get(reverse("api_history"), {"limit": 10, "cursor": cursor})
+            sql, params = next(query for query in queries if 'FROM "iot_iotdata"' in query[0])
+            with connection.cursor() as db_cursor:
+                db_cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [row[-1] for row in db_cursor.fetchall()]
+            self.assertEqual(len(plan), 1, plan)
+            self.assertTrue(plan[0].startswith("SEARCH iot_iotdata USING INDEX iot_iotdata_created_id_idx"), plan)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("api_history"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_page_number_pagination_still_supported(self):
+        response = self.client.get(reverse("api_history"), {"page": 2, "limit": 10})
+
+        self.assertEqual(response.json()["meta"]["current_page"], 2)
+        self.assertEqual([row["id"] for row in response.json()["data"]], self.expected_ids[10:20])
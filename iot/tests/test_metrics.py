@@ -0,0 +1,92 @@
+import json
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from iot import broadcast, metrics
+from iot.consumers import DashboardConsumer
+
+
+class RegistryTests(SimpleTestCase):
+    def test_prometheus_text_format(self):
+        registry = metrics.Registry()
+        requests = registry.register(metrics.Counter("test_requests_total", "Requests", ["path"]))
+        latency = registry.register(metrics.Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0)))
+        requests.inc(path='/a"b')
+        requests.inc(2, path='/a"b')
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        text = registry.render()
+
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{path="/a\\"b"} 3', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("test_latency_seconds_sum 3.65", text)
+        self.assertIn("test_latency_seconds_count 4", text)
+
+    def test_duplicate_names_are_rejected(self):
+        registry = metrics.Registry()
+        registry.register(metrics.Gauge("test_gauge", "Gauge"))
+        with self.assertRaises(ValueError):
+            registry.register(metrics.Gauge("test_gauge", "Gauge"))
+
+
+class MetricsEndpointTests(TestCase):
+    def test_ingestion_is_instrumented(self):
+        parsed = metrics.INGEST_PARSE_SECONDS.count(endpoint="single")
+        inserted = metrics.INGEST_INSERT_SECONDS.count()
+        client = Client()
+        client.post(reverse("iot_data_post"), json.dumps({"cpu_usage": 10}), content_type="application/json")
+
+        self.assertEqual(metrics.INGEST_PARSE_SECONDS.count(endpoint="single"), parsed + 1)
+        self.assertEqual(metrics.INGEST_INSERT_SECONDS.count(), inserted + 1)
+
+        client.get(reverse("get_dashboard_data"))
+        client.force_login(User.objects.create_user("ops", is_staff=True))
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('iot_page_build_seconds_count{page="dashboard"}', response.content.decode())
+
+    @override_settings(METRICS_TOKEN="scrape-secret")  # nosec B106
+    def test_token(self):
+        self.assertEqual(Client().get("/metrics").status_code, 401)
+        response = Client().get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Client().get("/metrics", HTTP_AUTHORIZATION="Bearer scrape").status_code, 401)
+
+    def test_staff_only_without_token(self):
+        client = Client()
+        self.assertEqual(client.get("/metrics").status_code, 401)
+        client.force_login(User.objects.create_user("visitor"))
+        self.assertEqual(client.get("/metrics").status_code, 403)
+        client.force_login(User.objects.create_user("ops", is_staff=True))
+        self.assertEqual(client.get("/metrics").status_code, 200)
+
+
+class ConsumerMetricsTests(TransactionTestCase):
+    def tearDown(self):
+        broadcast.scheduler.detach()
+
+    async def test_connections_gauge_and_delivery_latency(self):
+        gauge = metrics.WEBSOCKET_CONNECTIONS
+        connected = gauge.value(group="dashboard_updates")
+        delivered = metrics.MESSAGE_LATENCY_SECONDS.count(group="dashboard_updates")
+        communicator = WebsocketCommunicator(DashboardConsumer.as_asgi(), "/ws/dashboard/")
+        await communicator.connect()
+        await communicator.receive_json_from()
+        self.assertEqual(gauge.value(group="dashboard_updates"), connected + 1)
+
+        broadcast.scheduler.detach()
+        broadcast.scheduler.mark_dirty(["dashboard_updates"])
+        await broadcast.scheduler.flush()
+        await communicator.receive_json_from()
+        self.assertEqual(metrics.MESSAGE_LATENCY_SECONDS.count(group="dashboard_updates"), delivered + 1)
+
+        await communicator.disconnect()
+        self.assertEqual(gauge.value(group="dashboard_updates"), connected)
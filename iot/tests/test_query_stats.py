@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from iot import query_stats
+from iot.models import SystemSetting
+
+
+@query_stats.query_budget(1)
+def chatty_view(request):
+    """N+1 pattern: one query per key"""
+    return JsonResponse({key: SystemSetting.objects.filter(key=key).exists() for key in ("a", "b", "c")})
+
+
+class QueryStatsMiddlewareTests(TestCase):
+    def call(self, view):
+        request = RequestFactory().get("/chatty/")
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = query_stats.QueryStatsMiddleware(get_response)
+        return middleware(request)
+
+    def test_server_timing_header(self):
+        User.objects.create_user(username="timer", password="password123")  # nosec B106
+        client = Client()
+        client.login(username="timer", password="password123")  # nosec B106
+
+        timing = client.get(reverse("dashboard"))["Server-Timing"]
+
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_budget_is_enforced(self):
+        with self.assertRaisesMessage(query_stats.QueryBudgetExceeded, "GET /chatty/ ran 3 queries (budget 1)"):
+            self.call(chatty_view)
+
+    @override_settings(QUERY_BUDGET_ENFORCE=False)
+    def test_budget_is_logged_outside_tests(self):
+        with self.assertLogs("iot.query_stats", "WARNING") as logs:
+            response = self.call(chatty_view)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ran 3 queries (budget 1)", logs.output[0])
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged_with_call_site(self):
+        with self.assertLogs("iot.query_stats", "WARNING") as logs:
+            with query_stats.recording("check"):
+                SystemSetting.objects.filter(key="a").exists()
+        self.assertIn("in check at iot/tests/test_query_stats.py:", logs.output[0])
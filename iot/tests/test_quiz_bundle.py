@@ -0,0 +1,193 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from iot import quiz
+from iot.models import QuizFact, QuizMood, QuizQuestion, QuizResult, QuizResultMessage
+from iot.write_behind import BatchedWriter
+
+
+class QuizBundleTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.question = QuizQuestion.objects.create(question="Combien ?", options=["1", "2", "3", "4"], correct_answer=2)
+        QuizFact.objects.create(text="Un fait")
+        self.mood = QuizMood.objects.create(emoji="🙂", text="Bien", color="green", min_percentage=50)
+
+    def get(self, **headers):
+        return self.client.get(reverse("api_quiz_questions"), headers=headers)
+
+    def test_bundle_is_built_once(self):
+        with self.assertNumQueries(4):
+            first = self.get()
+        with self.assertNumQueries(0):
+            second = self.get()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        data = first.json()
+        self.assertEqual(data["questions"][0]["options"], ["1", "2", "3", "4"])
+        self.assertEqual(data["facts"], ["Un fait"])
+        self.assertEqual(data["moods"][0]["emoji"], "🙂")
+
+    def test_if_none_match(self):
+        etag = self.get()["ETag"]
+
+        response = self.get(if_none_match=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(self.get(if_none_match='"stale"').status_code, 200)
+
+    def test_save_and_delete_invalidate(self):
+        etag = self.get()["ETag"]
+
+        self.question.question = "Combien exactement ?"
+        self.question.save()
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["questions"][0]["q"], "Combien exactement ?")
+
+        self.mood.delete()
+        self.assertEqual(self.get().json()["moods"], [])
+
+    def test_bundle_built_before_commit_is_replaced(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.question.question = "Combien exactement ?"
+            self.question.save()
+            # Built by a concurrent request while the edit is not committed yet
+            stale = quiz.get_bundle()
+
+        self.assertIs(quiz.get_bundle(), stale)
+        for callback in callbacks:
+            callback()
+        self.assertIsNot(quiz.get_bundle(), stale)
+
+
+class QuizScoringTests(TestCase):
+    def setUp(self):
+        for order, answer in enumerate((0, 1, 2, 3)):
+            QuizQuestion.objects.create(question=f"Q{order}", options=["a", "b", "c", "d"], correct_answer=answer, order=order)
+        for threshold, title in ((0, "Débutant"), (50, "Moyen"), (100, "Parfait")):
+            QuizResultMessage.objects.create(
+                min_percentage=threshold, title=title, message=title, emoji="🌱", color_class="info", badge_text=title
+            )
+        quiz.get_bundle()
+
+    def submit(self, answers):
+        return self.client.post(reverse("api_quiz_submit"), json.dumps({"answers": answers}), content_type="application/json")
+
+    def test_scoring_reads_nothing(self):
+        # Transaction, result insert, answer and score counters
+        with self.assertNumQueries(5):
+            response = self.submit([0, 1, 0, 0])
+
+        self.assertEqual(response.json()["score"], 2)
+        self.assertEqual(response.json()["title"], "Moyen")
+        self.assertEqual(QuizResult.objects.get().percentage, 50.0)
+
+    def test_thresholds(self):
+        for answers, title in (([3, 3, 3, 0], "Débutant"), ([0, 1, 2, 0], "Moyen"), ([0, 1, 2, 3], "Parfait")):
+            with self.subTest(title=title):
+                self.assertEqual(self.submit(answers).json()["title"], title)
+
+    def test_other_workers_score_with_the_new_answer_key(self):
+        worker = quiz.QuizBundleCache(quiz.bundle_cache.version_path)
+        self.assertEqual(quiz.score_answers([0, 1, 2, 3], worker.get())[0], 4)
+
+        # Edited in another process: this worker received no signal
+        QuizQuestion.objects.filter(order=0).update(correct_answer=3)
+        with self.assertNumQueries(0):
+            self.assertEqual(quiz.score_answers([0, 1, 2, 3], worker.get())[0], 4)
+
+        quiz.bundle_cache.bump()
+        with self.assertNumQueries(4):
+            self.assertEqual(quiz.score_answers([3, 1, 2, 3], worker.get())[0], 4)
+
+    def test_answer_key_follows_edits(self):
+        question = QuizQuestion.objects.get(order=0)
+        question.correct_answer = 3
+        question.save()
+
+        self.assertEqual(self.submit([3, 1, 2, 3]).json()["score"], 4)
+
+
+@override_settings(QUIZ_RESULT_WRITE_BEHIND=True)
+class QuizResultWriteBehindTests(TestCase):
+    def setUp(self):
+        QuizQuestion.objects.create(question="Q", options=["a", "b"], correct_answer=1)
+        self.user = User.objects.create_user(username="player", password="password123")  # nosec B106
+        # Flushed explicitly by the test instead of the background thread
+        self.writer = BatchedWriter(quiz._write_results)
+        patcher = patch.object(quiz, "get_result_writer", return_value=self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_results_answered_then_saved_in_batch(self):
+        self.client.login(username="player", password="password123")  # nosec B106
+        for answer in (1, 0, 1):
+            response = self.client.post(
+                reverse("api_quiz_submit"), json.dumps({"answers": [answer]}), content_type="application/json"
+            )
+            self.assertEqual(response.json()["score"], answer)
+        self.assertEqual(QuizResult.objects.count(), 0)
+
+        # One insert for the batch, plus its counters
+        with self.assertNumQueries(5):
+            self.assertEqual(self.writer.flush(), 3)
+
+        self.assertEqual(
+            list(QuizResult.objects.order_by("id").values_list("user__username", "score")),
+            [("player", 1), ("player", 0), ("player", 1)],
+        )
+
+
+class QuizAnalyticsTests(TestCase):
+    def setUp(self):
+        self.first = QuizQuestion.objects.create(question="Q1", options=["a", "b", "c"], correct_answer=1, order=1)
+        self.second = QuizQuestion.objects.create(question="Q2", options=["a", "b"], correct_answer=0, order=2)
+        for answers in ([1, 0], [1, 1], [2, 0], [1], [7, "b"]):
+            response = self.client.post(
+                reverse("api_quiz_submit"), json.dumps({"answers": answers}), content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 200)
+        User.objects.create_user(username="analyst", password="password123")  # nosec B106
+
+    def test_answer_vectors_are_stored(self):
+        vectors = [bytes(vector) for vector in QuizResult.objects.order_by("id").values_list("answers", flat=True)]
+
+        self.assertEqual(vectors, [b"\x01\x00", b"\x01\x01", b"\x02\x00", b"\x01", b"\xff\xff"])
+
+    def test_analytics_endpoint(self):
+        self.assertEqual(self.client.get(reverse("api_quiz_analytics")).status_code, 401)
+        self.client.login(username="analyst", password="password123")  # nosec B106
+
+        data = self.client.get(reverse("api_quiz_analytics")).json()
+
+        self.assertEqual(data["submissions"], 5)
+        first, second = data["questions"]
+        self.assertEqual((first["answered"], first["correct"], first["incorrect"], first["invalid"]), (5, 3, 2, 1))
+        self.assertEqual([option["count"] for option in first["options"]], [0, 3, 1])
+        self.assertEqual(first["correct_rate"], 60.0)
+        self.assertEqual((second["answered"], second["correct"], second["invalid"]), (4, 2, 1))
+        self.assertEqual(
+            data["scores"],
+            [
+                {"total_questions": 2, "score": 0, "count": 1},
+                {"total_questions": 2, "score": 1, "count": 3},
+                {"total_questions": 2, "score": 2, "count": 1},
+            ],
+        )
+
+    def test_admin_reads_counters(self):
+        User.objects.create_superuser(username="admin", password="password123")  # nosec B106
+        self.client.login(username="admin", password="password123")  # nosec B106
+
+        response = self.client.get(reverse("admin:iot_quizquestion_changelist"))
+
+        self.assertContains(response, "60.0%")
+        self.assertContains(response, "50.0%")
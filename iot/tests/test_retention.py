@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from iot import aggregates, ingestion
+from iot.models import IoTAggregate, IoTData, IoTDataCompacted, IoTRollup, SensorState
+
+NOW = datetime(2026, 6, 10, 12, 30, tzinfo=dt_timezone.utc)
+OLD = datetime(2026, 6, 1, 8, 0, tzinfo=dt_timezone.utc)
+
+
+def ingest_at(moment, **values):
+    with patch("django.utils.timezone.now", return_value=moment):
+        return ingestion.persist_readings([ingestion.build_iot_data(values)])[0]
+
+
+def compact(*args):
+    out = StringIO()
+    with patch("django.utils.timezone.now", return_value=NOW):
+        call_command("compact_iotdata", "--days", "7", *args, stdout=out)
+    return out.getvalue()
+
+
+class CompactionTests(TestCase):
+    def setUp(self):
+        for minute, cpu in ((0, 10), (20, 30), (70, 50)):
+            ingest_at(OLD + timedelta(minutes=minute), hardware_sensor_id="ESP32_A", cpu_usage=cpu)
+        ingest_at(OLD + timedelta(minutes=5), hardware_sensor_id="ESP32_B", cpu_usage=90)
+        self.recent = ingest_at(NOW, hardware_sensor_id="ESP32_A", cpu_usage=70)
+
+    def aggregate_state(self):
+        return list(IoTAggregate.objects.values_list("field", "count", "total", "sum_squares", "minimum", "maximum"))
+
+    def test_old_rows_compacted_in_chunks(self):
+        before = self.aggregate_state()
+
+        output = compact("--chunk-size", "2")
+
+        self.assertEqual(list(IoTData.objects.values_list("id", flat=True)), [self.recent.id])
+        first_hour = IoTDataCompacted.objects.get(sensor_id="ESP32_A", bucket=OLD)
+        self.assertEqual((first_hour.resolution, first_hour.count), ("hour", 2))
+        self.assertEqual(first_hour.stats["cpu_usage"], {"total": 40, "sum_squares": 1000, "min": 10, "max": 30})
+        self.assertEqual(IoTDataCompacted.objects.get(sensor_id="ESP32_A", bucket=OLD + timedelta(hours=1)).count, 1)
+        self.assertEqual(IoTDataCompacted.objects.get(sensor_id="ESP32_B").count, 1)
+        self.assertIn("4 rows compacted into 3 buckets", output)
+        self.assertIn("4/4 rows (100.0%)", output)
+        # Running aggregates are untouched and can still be rebuilt
+        self.assertEqual(self.aggregate_state(), before)
+        aggregates.rebuild_aggregates()
+        self.assertEqual(self.aggregate_state(), before)
+        # Sensor state survives its readings
+        self.assertIsNone(SensorState.objects.get(sensor_id="ESP32_B").reading_id)
+
+    def test_dry_run_changes_nothing(self):
+        output = compact("--dry-run", "--bucket", "day")
+
+        self.assertIn("4 rows from 2 sensors would become 2 compacted buckets", output)
+        self.assertEqual(IoTData.objects.count(), 5)
+        self.assertFalse(IoTDataCompacted.objects.exists())
+
+    def test_rollup_backfill_keeps_compacted_periods(self):
+        compact()
+        old_hour = IoTRollup.objects.get(resolution="hour", field="cpu_usage", bucket=OLD)
+
+        call_command("backfill_rollups", stdout=StringIO())
+
+        self.assertEqual(IoTRollup.objects.get(resolution="hour", field="cpu_usage", bucket=OLD).count, old_hour.count)
+        self.assertTrue(IoTRollup.objects.filter(resolution="minute", bucket=NOW.replace(second=0)).exists())
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from iot import ingestion, rollups
+from iot.models import IoTRollup
+
+BASE = datetime(2026, 1, 5, 10, 0, tzinfo=dt_timezone.utc)
+
+
+def ingest_at(moment, **values):
+    """Ingests one reading as if it was received at `moment`"""
+    with patch("django.utils.timezone.now", return_value=moment):
+        return ingestion.persist_readings([ingestion.build_iot_data(values)])[0]
+
+
+class RollupMaintenanceTests(TestCase):
+    def test_readings_update_every_resolution(self):
+        ingest_at(BASE + timedelta(seconds=5), cpu_usage=10)
+        ingest_at(BASE + timedelta(seconds=50), cpu_usage=30)
+        ingest_at(BASE + timedelta(minutes=1, seconds=1), cpu_usage=20)
+
+        minute = IoTRollup.objects.get(resolution="minute", field="cpu_usage", bucket=BASE)
+        self.assertEqual((minute.count, minute.total, minute.minimum, minute.maximum, minute.last), (2, 40, 10, 30, 30))
+
+        hour = IoTRollup.objects.get(resolution="hour", field="cpu_usage", bucket=BASE)
+        self.assertEqual((hour.count, hour.total, hour.minimum, hour.maximum, hour.last), (3, 60, 10, 30, 20))
+        self.assertEqual(IoTRollup.objects.filter(resolution="day").count(), len(rollups.NUMERIC_FIELDS))
+
+    def test_late_reading_does_not_replace_last(self):
+        ingest_at(BASE + timedelta(seconds=30), cpu_usage=30)
+        ingest_at(BASE + timedelta(seconds=10), cpu_usage=10)
+
+        minute = IoTRollup.objects.get(resolution="minute", field="cpu_usage", bucket=BASE)
+        self.assertEqual((minute.count, minute.minimum, minute.last), (2, 10, 30))
+
+    def test_backfill_matches_incremental_rollups(self):
+        for i in range(40):
+            ingest_at(BASE + timedelta(seconds=47 * i), cpu_usage=i % 17, ram_usage=i)
+        incremental = set(IoTRollup.objects.values_list("resolution", "bucket", "field", "count", "total", "minimum", "last"))
+
+        IoTRollup.objects.all().delete()
+        out = StringIO()
+        call_command("backfill_rollups", stdout=out)
+
+        self.assertEqual(
+            set(IoTRollup.objects.values_list("resolution", "bucket", "field", "count", "total", "minimum", "last")),
+            incremental,
+        )
+        minute_buckets = IoTRollup.objects.filter(resolution="minute").values("bucket").distinct().count()
+        self.assertIn(f"minute: {minute_buckets} buckets rebuilt", out.getvalue())
+
+
+class SeriesApiTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        for i in range(6):
+            ingest_at(BASE + timedelta(minutes=20 * i), cpu_usage=10 * i)
+
+    def get_series(self, **params):
+        return self.client.get(reverse("api_series"), {"fields": "cpu_usage", **params})
+
+    def test_resolution_follows_point_budget(self):
+        params = {"start": BASE.isoformat(), "end": (BASE + timedelta(hours=2)).isoformat()}
+
+        minute = self.get_series(points=500, **params).json()
+        self.assertEqual(minute["resolution"], "minute")
+        self.assertEqual(minute["series"]["cpu_usage"]["avg"], [0, 10, 20, 30, 40, 50])
+
+        hour = self.get_series(points=10, **params).json()
+        self.assertEqual(hour["resolution"], "hour")
+        self.assertEqual(hour["counts"], [3, 3])
+        self.assertEqual(hour["series"]["cpu_usage"]["avg"], [10, 40])
+        self.assertEqual(hour["series"]["cpu_usage"]["max"], [20, 50])
+        self.assertEqual(hour["series"]["cpu_usage"]["last"], [20, 50])
+
+    def test_month_range_reads_rollups_only(self):
+        end = BASE + timedelta(days=20)
+        with self.assertNumQueries(1):
+            response = self.get_series(start=(end - timedelta(days=30)).isoformat(), end=end.isoformat(), points=100)
+
+        self.assertEqual(response.json()["resolution"], "day")
+        self.assertEqual(response.json()["buckets"], ["2026-01-05T00:00:00+00:00"])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get_series(fields="os").status_code, 400)
+        self.assertEqual(self.get_series(start="yesterday").status_code, 400)
+        self.assertEqual(self.get_series(start=BASE.isoformat(), end=BASE.isoformat()).status_code, 400)
+        self.assertEqual(self.get_series(resolution="week").status_code, 400)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from iot import ingestion
+from iot.models import SensorState
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+def ingest_at(moment, **values):
+    with patch("django.utils.timezone.now", return_value=moment):
+        return ingestion.persist_readings([ingestion.build_iot_data(values)])[0]
+
+
+class SensorStateTests(TestCase):
+    def test_latest_reading_per_sensor(self):
+        ingest_at(NOW - timedelta(minutes=2), hardware_sensor_id="ESP32_A", cpu_usage=10)
+        ingest_at(NOW - timedelta(minutes=1), hardware_sensor_id="ESP32_B", cpu_usage=20, energy_sensor_id="PZEM_1")
+        latest = ingest_at(NOW, hardware_sensor_id="ESP32_A", cpu_usage=30)
+
+        state = SensorState.objects.get(kind="hardware", sensor_id="ESP32_A")
+        self.assertEqual((state.reading_id, state.readings, state.last_seen), (latest.id, 2, NOW))
+        self.assertEqual(state.data["cpu_usage"], 30)
+        # Sensors without an id are not tracked
+        self.assertEqual(
+            set(SensorState.objects.values_list("kind", "sensor_id")),
+            {
+                ("hardware", "ESP32_A"),
+                ("hardware", "ESP32_B"),
+                ("energy", "PZEM_1"),
+            },
+        )
+
+    def test_late_reading_only_counts(self):
+        ingest_at(NOW, hardware_sensor_id="ESP32_A", cpu_usage=30)
+        ingest_at(NOW - timedelta(minutes=5), hardware_sensor_id="ESP32_A", cpu_usage=10)
+
+        state = SensorState.objects.get(sensor_id="ESP32_A")
+        self.assertEqual((state.readings, state.last_seen, state.data["cpu_usage"]), (2, NOW, 30))
+
+    def test_rebuild_matches_incremental_state(self):
+        for minute in range(5):
+            ingest_at(NOW + timedelta(minutes=minute), hardware_sensor_id=f"ESP32_{minute % 2}", cpu_usage=minute)
+        expected = set(SensorState.objects.values_list("kind", "sensor_id", "reading_id", "readings", "last_seen"))
+
+        SensorState.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_sensor_states", stdout=out)
+
+        self.assertIn("2 sensor states rebuilt", out.getvalue())
+        self.assertEqual(
+            set(SensorState.objects.values_list("kind", "sensor_id", "reading_id", "readings", "last_seen")), expected
+        )
+
+
+class SensorsApiTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        ingest_at(NOW - timedelta(hours=1), hardware_sensor_id="ESP32_OLD", cpu_usage=10)
+        ingest_at(NOW - timedelta(seconds=30), hardware_sensor_id="ESP32_NEW", cpu_usage=20, network_sensor_id="NET_1")
+
+    def get_sensors(self, **params):
+        with patch("django.utils.timezone.now", return_value=NOW):
+            return self.client.get(reverse("api_sensors"), params)
+
+    def test_lists_states_with_staleness(self):
+        data = self.get_sensors(kind="hardware", sort="-last_seen").json()
+
+        self.assertEqual(data["count"], 2)
+        self.assertEqual([s["sensor_id"] for s in data["sensors"]], ["ESP32_NEW", "ESP32_OLD"])
+        self.assertEqual([s["stale"] for s in data["sensors"]], [False, True])
+        self.assertEqual(data["sensors"][1]["staleness_seconds"], 3600)
+
+    def test_filters_without_raw_table(self):
+        with self.assertNumQueries(1):
+            data = self.get_sensors(stale="false", q="new").json()
+
+        self.assertEqual([s["sensor_id"] for s in data["sensors"]], ["ESP32_NEW"])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get_sensors(kind="scores").status_code, 400)
+        self.assertEqual(self.get_sensors(sort="data").status_code, 400)
+        self.assertEqual(self.get_sensors(stale="maybe").status_code, 400)
@@ -0,0 +1,73 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from iot import ingestion, snapshots
+from iot.snapshots import SnapshotCache
+
+
+class SnapshotCacheTests(TestCase):
+    def setUp(self):
+        self.builder = Mock(side_effect=lambda: {"built": self.builder.call_count})
+        self.cache = SnapshotCache({"page": self.builder})
+
+    def test_reused_until_new_reading(self):
+        ingestion.persist_readings([ingestion.build_iot_data({"cpu_usage": 10})])
+
+        first = self.cache.get("page")
+        self.assertIs(self.cache.get("page"), first)
+        self.assertEqual(self.builder.call_count, 1)
+
+        ingestion.persist_readings([ingestion.build_iot_data({"cpu_usage": 20})])
+
+        self.assertEqual(self.cache.get("page"), {"built": 2})
+        self.assertEqual(self.builder.call_count, 2)
+
+    def test_invalidate(self):
+        self.cache.get("page")
+        self.cache.invalidate("page")
+        self.cache.get("page")
+
+        self.assertEqual(self.builder.call_count, 2)
+
+    def test_pages_share_one_computation_per_version(self):
+        """Page view, JSON API and WebSocket snapshot read the same cached dict"""
+        User.objects.create_user(username="viewer", password="password123")  # nosec B106
+        client = Client()
+        client.login(username="viewer", password="password123")  # nosec B106
+        snapshots.cache.invalidate()
+
+        with patch.dict(snapshots.cache.builders, {"hardware": Mock(wraps=snapshots.PAGE_BUILDERS["hardware"])}):
+            builder = snapshots.cache.builders["hardware"]
+            self.assertEqual(client.get(reverse("hardware")).status_code, 200)
+            self.assertEqual(client.get(reverse("api_hardware")).status_code, 200)
+            snapshots.get_snapshot("hardware")
+
+        self.assertEqual(builder.call_count, 1)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_misses_build_once(self):
+        calls = []
+
+        def slow_builder():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"ok": True}
+
+        cache = SnapshotCache({"page": slow_builder})
+        results = []
+
+        with patch.object(cache, "current_version", return_value=(1, None)):
+            threads = [threading.Thread(target=lambda: results.append(cache.get("page"))) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"ok": True}] * 10)
@@ -0,0 +1,74 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from iot import system_settings
+from iot.models import SystemSetting
+from iot.system_settings import SettingsRegistry
+
+
+class SystemSettingsRegistryTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.version_path = str(Path(directory.name) / "settings.version")
+        patcher = patch.object(system_settings.registry, "version_path", self.version_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_defaults_and_casting(self):
+        SystemSetting.objects.create(key="cpu_threshold", value="90")
+        SystemSetting.objects.create(key="ram_threshold", value="lots")
+
+        with self.assertLogs("iot.system_settings", "WARNING"):
+            self.assertEqual(system_settings.get("cpu_threshold"), 90)
+            self.assertEqual(system_settings.get("ram_threshold"), 85)
+        self.assertEqual(system_settings.get("eco_threshold"), 50)
+
+    def test_endpoint_reads_memory(self):
+        client = Client()
+        client.get(reverse("api_settings"))
+
+        with self.assertNumQueries(0):
+            response = client.get(reverse("api_settings"))
+
+        self.assertEqual(
+            response.json(),
+            {"cpu_threshold": 80, "ram_threshold": 85, "power_threshold": 250, "co2_threshold": 150, "eco_threshold": 50},
+        )
+
+    def test_save_and_delete_reload(self):
+        self.assertEqual(system_settings.get("co2_threshold"), 150)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            setting = SystemSetting.objects.create(key="co2_threshold", value="120")
+        self.assertEqual(system_settings.get("co2_threshold"), 120)
+        self.assertTrue(Path(self.version_path).exists())
+
+        setting.delete()
+        self.assertEqual(system_settings.get("co2_threshold"), 150)
+
+    def test_other_workers_reload_on_version_change(self):
+        worker = SettingsRegistry(system_settings.DEFINITIONS, self.version_path)
+        self.assertEqual(worker.get("power_threshold"), 250)
+
+        # Saved in another process: this worker received no signal
+        SystemSetting.objects.create(key="power_threshold", value="300")
+        with self.assertNumQueries(0):
+            self.assertEqual(worker.get("power_threshold"), 250)
+
+        system_settings.registry.bump()
+        with self.assertNumQueries(1):
+            self.assertEqual(worker.get("power_threshold"), 300)
+
+    def test_loaded_values_never_query(self):
+        self.assertIsNone(system_settings.registry.loaded_values(["cpu_threshold"]))
+        system_settings.get("cpu_threshold")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(system_settings.registry.loaded_values(["cpu_threshold"]), {"cpu_threshold": 80})
+            system_settings.registry.bump()
+            self.assertIsNone(system_settings.registry.loaded_values(["cpu_threshold"]))
@@ -0,0 +1,190 @@
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from django.db import IntegrityError, OperationalError
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from iot import ingestion
+from iot.models import IoTData
+from iot.write_behind import BatchedWriter, JournaledWriter
+
+
+class BatchedWriterTests(SimpleTestCase):
+    def test_flushes_when_max_items_reached(self):
+        flushed = threading.Event()
+        batches = []
+        writer = BatchedWriter(lambda items: (batches.append(items), flushed.set()), interval=60, max_items=3)
+        writer.start()
+
+        writer.submit([1, 2])
+        writer.submit([3])
+
+        self.assertTrue(flushed.wait(5))
+        writer.close()
+        self.assertEqual(batches, [[1, 2, 3]])
+
+    def test_failed_batch_is_retried_in_order(self):
+        flush = Mock(side_effect=[OperationalError("database is locked"), None])
+        writer = BatchedWriter(flush)
+        writer.submit([1, 2])
+
+        with self.assertRaises(OperationalError):
+            writer.flush()
+        writer.submit([3])
+
+        self.assertEqual(writer.flush(), 3)
+        flush.assert_called_with([1, 2, 3])
+
+    def test_rejected_items_do_not_block_the_queue(self):
+        def flush(items):
+            if 2 in items:
+                raise IntegrityError("FOREIGN KEY constraint failed")
+
+        writer = BatchedWriter(Mock(side_effect=flush))
+        writer.submit([1, 2, 3])
+
+        with self.assertLogs("iot.write_behind", "ERROR") as logs:
+            self.assertEqual(writer.flush(), 2)
+
+        self.assertEqual([call.args[0] for call in writer.flush_func.call_args_list], [[1, 2, 3], [1], [2], [3]])
+        self.assertIn("dropped 1 rejected items: [2]", logs.output[-1])
+        self.assertEqual(writer.pending(), 0)
+
+
+class JournaledWriterTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name)
+
+    def journals(self):
+        return sorted(self.directory.glob("journal-*.jsonl"))
+
+    def test_journal_deleted_once_written(self):
+        flush = Mock()
+        writer = JournaledWriter(flush, self.directory)
+        writer.submit([{"cpu_usage": 1}, {"cpu_usage": 2}])
+
+        [journal] = self.journals()
+        self.assertEqual(journal.read_text().splitlines(), ['{"cpu_usage":1}', '{"cpu_usage":2}'])
+
+        writer.flush()
+        flush.assert_called_once_with([{"cpu_usage": 1}, {"cpu_usage": 2}])
+        self.assertEqual(self.journals(), [])
+
+    def test_concurrent_submits_share_fsyncs(self):
+        writer = JournaledWriter(Mock(), self.directory)
+        fsyncs = []
+
+        def slow_fsync(descriptor):
+            fsyncs.append(descriptor)
+            time.sleep(0.05)
+
+        with patch("iot.write_behind.os.fsync", side_effect=slow_fsync):
+            threads = [threading.Thread(target=writer.submit, args=([{"cpu_usage": i}],)) for i in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # Every submit returned after an fsync covering it, most of them without their own
+        self.assertEqual(writer.pending(), 20)
+        self.assertEqual(writer._synced, 20)
+        self.assertLess(len(fsyncs), 10)
+
+    def test_new_segments_are_synced_in_their_directory(self):
+        writer = JournaledWriter(Mock(), self.directory)
+
+        with patch("iot.write_behind._fsync_directory") as fsync_directory:
+            writer.submit([{"cpu_usage": 1}])
+            writer.submit([{"cpu_usage": 2}])
+            fsync_directory.assert_called_once_with(self.directory)
+
+            # Rotation: the next submit opens a new segment
+            writer.flush()
+            writer.submit([{"cpu_usage": 3}])
+        self.assertEqual(fsync_directory.call_count, 2)
+
+    def test_failed_flush_keeps_journal(self):
+        writer = JournaledWriter(Mock(side_effect=OperationalError("database or disk is full")), self.directory)
+        writer.submit([{"cpu_usage": 1}])
+
+        with self.assertRaises(OperationalError):
+            writer.flush()
+
+        self.assertEqual(len(self.journals()), 1)
+        writer.flush_func = Mock()
+        writer.flush()
+        self.assertEqual(self.journals(), [])
+
+    def test_rejected_items_moved_to_dead_letters(self):
+        def flush(items):
+            if {"cpu_usage": "high"} in items:
+                raise ValueError("invalid cpu_usage")
+
+        writer = JournaledWriter(flush, self.directory)
+        writer.submit([{"cpu_usage": 1}, {"cpu_usage": "high"}])
+
+        with self.assertLogs("iot.write_behind", "ERROR"):
+            self.assertEqual(writer.flush(), 1)
+
+        self.assertEqual(self.journals(), [])
+        [dead_letters] = self.directory.glob("dead-letter-*.jsonl")
+        self.assertEqual(dead_letters.read_text(), '{"cpu_usage":"high"}\n')
+
+    def test_crashed_journal_replayed_on_start(self):
+        crashed = JournaledWriter(Mock(), self.directory)
+        crashed.submit([{"cpu_usage": 1}, {"cpu_usage": 2}])
+        # Journal of a live writer is left alone
+        self.assertEqual(JournaledWriter(Mock(), self.directory).replay(), 0)
+
+        # Process dies: the lock goes away with the file handle, a torn last line remains
+        crashed._segment.write('{"cpu_')
+        crashed._segment.close()
+
+        flush = Mock()
+        restarted = JournaledWriter(flush, self.directory, max_items=1)
+        self.assertEqual(restarted.replay(), 2)
+
+        self.assertEqual(flush.call_args_list[0].args, ([{"cpu_usage": 1}],))
+        self.assertEqual(flush.call_args_list[1].args, ([{"cpu_usage": 2}],))
+        self.assertEqual(self.journals(), [])
+
+
+@override_settings(IOT_WRITE_BEHIND=True)
+class WriteBehindIngestionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # Flushed explicitly by the test instead of the background thread
+        self.writer = JournaledWriter(ingestion._write_payloads, tmp.name, fsync=False)
+        patcher = patch.object(ingestion, "get_write_behind", return_value=self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, payload):
+        return self.client.post(reverse("iot_data_post"), json.dumps(payload), content_type="application/json")
+
+    def test_reading_acknowledged_then_saved_in_batch(self):
+        for cpu in (10, 20, 30):
+            response = self.post({"hardware_sensor_id": "ESP32_WB", "cpu_usage": cpu})
+            self.assertEqual(response.status_code, 202)
+        self.assertEqual(IoTData.objects.count(), 0)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.assertEqual(self.writer.flush(), 3)
+
+        self.assertEqual(list(IoTData.objects.order_by("id").values_list("cpu_usage", flat=True)), [10, 20, 30])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_invalid_reading_rejected_before_journaling(self):
+        response = self.post({"cpu_usage": "high"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.writer.pending(), 0)
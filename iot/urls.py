@@ -4,6 +4,9 @@ from . import views
 
 urlpatterns = [
     path("iot-data/", views.iot_data_post, name="iot_data_post"),
+    path("iot-data/bulk/", views.iot_data_bulk_post, name="iot_data_bulk_post"),
+    path("iot-data/async/", views.iot_data_post_async, name="iot_data_post_async"),
+    path("devices/register/", views.register_device, name="api_register_device"),
     path("", views.login_view, name="login"),
     path("login/", views.login_view, name="login"),
     path("logout/", views.logout_view, name="logout"),
@@ -20,6 +23,9 @@ urlpatterns = [
     path("api/network/", views.get_network_data, name="api_network"),
     path("api/scores/", views.get_scores_data, name="api_scores"),
     path("history/", views.get_history_data, name="api_history"),
+    path("series/", views.get_series_data, name="api_series"),
+    path("sensors/", views.get_sensors_data, name="api_sensors"),
+    path("export/", views.export_iot_data, name="api_export"),
     # Session management APIs
     path("api/session-info/", views.get_session_info, name="api_session_info"),
     path("api/extend-session/", views.extend_session, name="api_extend_session"),
@@ -29,4 +35,5 @@ urlpatterns = [
     # Quiz API endpoints
     path("quiz/questions/", views.get_quiz_questions, name="api_quiz_questions"),
     path("quiz/submit/", views.submit_quiz_result, name="api_quiz_submit"),
+    path("quiz/analytics/", views.get_quiz_analytics, name="api_quiz_analytics"),
 ]
@@ -0,0 +1,33 @@
+"""
+Cross-process version files
+A process-local cache (settings registry, quiz bundle) is tied to a small file that is
+atomically replaced when the cached data changes. Other workers of the host compare
+the file's inode/mtime (one stat call) on each read and reload when it changed.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def read(path):
+    """Version of the file at path (None while it was never bumped)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def bump(path):
+    """Gives the file a new version: atomically replaces it (a new inode even within the mtime resolution)"""
+    try:
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}-")
+        with os.fdopen(descriptor, "w") as handle:
+            handle.write(str(time.time_ns()))
+        os.replace(temporary, path)
+    except OSError as e:
+        logger.error(f"Could not update {path}, other workers keep their cached data: {e}")
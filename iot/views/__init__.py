@@ -5,6 +5,7 @@ Organized view modules using data_utils.py as single source of truth
 
 from .api_views import (
     chatbot_proxy,
+    export_iot_data,
     extend_session,
     get_dashboard_data,
     get_energy_data,
@@ -12,11 +13,18 @@ from .api_views import (
     get_history_data,
     get_latest_data,
     get_network_data,
+    get_quiz_analytics,
     get_quiz_questions,
     get_scores_data,
+    get_sensors_data,
+    get_series_data,
     get_session_info,
     get_system_settings,
+    iot_data_bulk_post,
     iot_data_post,
+    iot_data_post_async,
+    metrics_view,
+    register_device,
     submit_quiz_result,
 )
 
@@ -37,6 +45,9 @@ __all__ = [
     "quiz_view",
     # API Views
     "iot_data_post",
+    "iot_data_post_async",
+    "iot_data_bulk_post",
+    "register_device",
     "get_latest_data",
     "get_dashboard_data",
     "get_hardware_data",
@@ -44,10 +55,16 @@ __all__ = [
     "get_network_data",
     "get_scores_data",
     "get_history_data",
+    "get_series_data",
+    "get_sensors_data",
+    "export_iot_data",
     "get_session_info",
     "extend_session",
     "chatbot_proxy",
     "get_system_settings",
     "get_quiz_questions",
+    "get_quiz_analytics",
     "submit_quiz_result",
+    # Monitoring
+    "metrics_view",
 ]
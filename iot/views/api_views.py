@@ -1,92 +1,208 @@
+import hmac
 import json
 import logging
+import math
 import time
+from datetime import timedelta
 
-import requests
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from decouple import config
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
-
-from .. import data_utils
-from ..models import IoTData, QuizFact, QuizMood, QuizQuestion, QuizResult, QuizResultMessage, SystemSetting
+from django.views.decorators.http import condition, require_http_methods
+
+from .. import (
+    aggregates,
+    binary_format,
+    chatbot,
+    chatbot_cache,
+    data_utils,
+    export,
+    ingestion,
+    metrics,
+    quiz,
+    quiz_analytics,
+    rollups,
+    sensors,
+    snapshots,
+    system_settings,
+)
+from ..models import IoTData
+from ..query_stats import query_budget
 
 logger = logging.getLogger(__name__)
 
 
+def _queue_reading(data, started, endpoint):
+    """Write-behind mode: validates and journals the reading, the flusher saves it shortly after"""
+    _, error = ingestion.validate_item(data)
+    metrics.INGEST_PARSE_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+    ingestion.enqueue_readings([data])
+    return JsonResponse({"message": "IoT data accepted", "queued": True}, status=202)
+
+
+def _read_single(request):
+    """Payload of a single-reading request (JSON or one binary record) and the function building its IoTData"""
+    if request.content_type == binary_format.CONTENT_TYPE:
+        payloads = binary_format.decode(request.body)
+        if len(payloads) != 1:
+            raise binary_format.BinaryFormatError("Expected one record (batches go to /api/iot-data/bulk/)")
+        return payloads[0], binary_format.build_instance
+    return json.loads(request.body), ingestion.build_iot_data
+
+
+# +1 query: device lookup of binary records, once per device and process
+@query_budget(13)
 @csrf_exempt
 @require_http_methods(["POST"])
 def iot_data_post(request):
     try:
-        data = json.loads(request.body)
-        hardware_data = data.get("hardware", data)
-        energy_data = data.get("energy", data)
-        network_data = data.get("network", data)
-        scores_data = data.get("scores", data)
-
-        iot_data = IoTData.objects.create(
-            # Hardware fields - try nested first, then root
-            hardware_sensor_id=hardware_data.get("sensor_id", data.get("hardware_sensor_id", "unknown")),
-            hardware_timestamp=hardware_data.get("timestamp", data.get("hardware_timestamp", 0)),
-            age_years=hardware_data.get("age_years", data.get("age_years", 0)),
-            cpu_usage=hardware_data.get("cpu_usage", data.get("cpu_usage", 0)),
-            ram_usage=hardware_data.get("ram_usage", data.get("ram_usage", 0)),
-            battery_health=hardware_data.get("battery_health", data.get("battery_health", 0)),
-            os=hardware_data.get("os", data.get("os", "unknown")),
-            win11_compat=hardware_data.get("win11_compat", data.get("win11_compat", False)),
-            # Energy fields
-            energy_sensor_id=energy_data.get("sensor_id", data.get("energy_sensor_id", "unknown")),
-            energy_timestamp=energy_data.get("timestamp", data.get("energy_timestamp", 0)),
-            power_watts=energy_data.get("power_watts", data.get("power_watts", 0)),
-            active_devices=energy_data.get("active_devices", data.get("active_devices", 0)),
-            overheating=energy_data.get("overheating", data.get("overheating", 0)),
-            co2_equiv_g=energy_data.get("co2_equiv_g", data.get("co2_equiv_g", 0)),
-            # Network fields
-            network_sensor_id=network_data.get("sensor_id", data.get("network_sensor_id", "unknown")),
-            network_timestamp=network_data.get("timestamp", data.get("network_timestamp", 0)),
-            network_load_mbps=network_data.get("network_load_mbps", data.get("network_load_mbps", 0)),
-            requests_per_min=network_data.get("requests_per_min", data.get("requests_per_min", 0)),
-            cloud_dependency_score=network_data.get("cloud_dependency_score", data.get("cloud_dependency_score", 0)),
-            # Scores from nested object or root
-            eco_score=scores_data.get("eco_score", 0),
-            obsolescence_score=scores_data.get("obsolescence_score", 0),
-            bigtech_dependency=scores_data.get("bigtech_dependency", 0),
-            co2_savings_kg_year=scores_data.get("co2_savings_kg_year", 0),
-            recommendations=scores_data.get("recommendations", {}),
-        )
+        started = time.perf_counter()
+        data, build = _read_single(request)
+        if settings.IOT_WRITE_BEHIND:
+            return _queue_reading(data, started, "single")
 
-        channel_layer = get_channel_layer()
+        iot_data = build(data)
+        metrics.INGEST_PARSE_SECONDS.observe(time.perf_counter() - started, endpoint="single")
+        ingestion.persist_readings([iot_data])
 
-        # Define groups and their data functions
-        groups = ["dashboard_updates", "hardware_updates", "energy_updates", "network_updates", "scores_updates"]
+        ingestion.broadcast_updates()
+
+        return JsonResponse({"message": "IoT data created successfully", "id": iot_data.id}, status=201)
 
-        data_functions = {
-            "dashboard_updates": data_utils.get_dashboard_data_dict,
-            "hardware_updates": data_utils.get_hardware_data_dict,
-            "energy_updates": data_utils.get_energy_data_dict,
-            "network_updates": data_utils.get_network_data_dict,
-            "scores_updates": data_utils.get_scores_data_dict,
-        }
+    except KeyError as e:
+        return JsonResponse({"error": f"Missing field: {str(e)}"}, status=400)
+    except binary_format.BinaryFormatError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
 
-        # Send data to each WebSocket group
-        for group in groups:
-            try:
-                data_dict = data_functions[group]()
-                async_to_sync(channel_layer.group_send)(group, {"type": "data_update", "data": data_dict})
-            except Exception as e:
-                logger.error(f"Error sending WebSocket to group {group}: {e}")
+
+@query_budget(13)
+@csrf_exempt
+@require_http_methods(["POST"])
+async def iot_data_post_async(request):
+    """
+    Async variant of iot_data_post for ASGI servers (Daphne).
+    Waiting requests do not hold a worker thread; only the insert itself hops to the sync thread.
+    """
+    try:
+        started = time.perf_counter()
+        if request.content_type == binary_format.CONTENT_TYPE:
+            # Unknown device ids are looked up in the database
+            data, build = await sync_to_async(_read_single)(request)
+        else:
+            data, build = _read_single(request)
+        if settings.IOT_WRITE_BEHIND:
+            # Journal fsync off the event loop
+            return await sync_to_async(_queue_reading, thread_sensitive=False)(data, started, "async")
+
+        iot_data = build(data)
+        metrics.INGEST_PARSE_SECONDS.observe(time.perf_counter() - started, endpoint="async")
+        await ingestion.apersist_readings([iot_data])
 
         return JsonResponse({"message": "IoT data created successfully", "id": iot_data.id}, status=201)
 
     except KeyError as e:
         return JsonResponse({"error": f"Missing field: {str(e)}"}, status=400)
+    except binary_format.BinaryFormatError as e:
+        return JsonResponse({"error": str(e)}, status=400)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+def _read_batch(request):
+    """(items, None) for a JSON, NDJSON or binary batch body, (None, error message) otherwise"""
+    try:
+        if request.content_type == binary_format.CONTENT_TYPE:
+            return [(payload, None) for payload in binary_format.decode(request.body)], None
+        return ingestion.parse_batch(request.body, request.content_type or ""), None
+    except binary_format.BinaryFormatError as e:
+        return None, str(e)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, "Invalid JSON or NDJSON body"
+
+
+@query_budget(13)
+@csrf_exempt
+@require_http_methods(["POST"])
+def iot_data_bulk_post(request):
+    """
+    Batch ingestion: accepts a JSON array, newline-delimited JSON or binary records.
+    Valid items are saved in one transaction, invalid ones are reported per index.
+    """
+    started = time.perf_counter()
+    items, error = _read_batch(request)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    if not items:
+        return JsonResponse({"error": "Empty batch"}, status=400)
+    if len(items) > settings.IOT_BULK_MAX_ITEMS:
+        return JsonResponse({"error": f"Batch too large (max {settings.IOT_BULK_MAX_ITEMS} items)"}, status=413)
+
+    try:
+        instances, results = ingestion.validate_batch(items)
+        metrics.INGEST_PARSE_SECONDS.observe(time.perf_counter() - started, endpoint="bulk")
+        ingestion.persist_readings(instances)
+
+        # One broadcast for the whole batch
+        if instances:
+            ingestion.broadcast_updates()
+
+        for result in results:
+            instance = result.pop("instance", None)
+            if instance is not None:
+                result["id"] = instance.id
+
+        created = len(instances)
+        failed = len(results) - created
+        status = 201 if not failed else (207 if created else 400)
+        return JsonResponse({"created": created, "failed": failed, "results": results}, status=status)
+
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@query_budget(4)
+@csrf_exempt
+@require_http_methods(["POST"])
+def register_device(request):
+    """
+    Registers a device identity (sensor ids and OS) and returns the short id its binary
+    readings carry instead of those strings. Registering the same identity again returns the same id.
+    """
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    if not isinstance(data, dict) or not data.get("hardware_sensor_id"):
+        return JsonResponse({"error": "Missing field: hardware_sensor_id"}, status=400)
+
+    identity = {field: str(data.get(field, "unknown")) for field in binary_format.DEVICE_FIELDS}
+    try:
+        device_id, created = binary_format.register_device(identity)
+    except ValidationError as e:
+        return JsonResponse({"error": "; ".join(f"{k}: {', '.join(v)}" for k, v in e.message_dict.items())}, status=400)
+
+    record, _ = binary_format.LAYOUTS[binary_format.CURRENT_VERSION]
+    return JsonResponse(
+        {
+            "device_id": device_id,
+            "content_type": binary_format.CONTENT_TYPE,
+            "version": binary_format.CURRENT_VERSION,
+            "record_size": record.size,
+        },
+        status=201 if created else 200,
+    )
+
+
+@query_budget(2)
 @require_http_methods(["GET"])
 def get_latest_data(request):
     try:
@@ -102,65 +218,215 @@ def get_latest_data(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@query_budget(5)
 @require_http_methods(["GET"])
 def get_dashboard_data(request):
     try:
-        data = data_utils.get_dashboard_data_dict()
+        data = snapshots.get_snapshot("dashboard")
         return JsonResponse(data, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@query_budget(5)
 @require_http_methods(["GET"])
 def get_hardware_data(request):
     try:
-        data = data_utils.get_hardware_data_dict()
+        data = snapshots.get_snapshot("hardware")
         return JsonResponse(data, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@query_budget(5)
 @require_http_methods(["GET"])
 def get_energy_data(request):
     try:
-        data = data_utils.get_energy_data_dict()
+        data = snapshots.get_snapshot("energy")
         return JsonResponse(data, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@query_budget(5)
 @require_http_methods(["GET"])
 def get_network_data(request):
     try:
-        data = data_utils.get_network_data_dict()
+        data = snapshots.get_snapshot("network")
         return JsonResponse(data, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@query_budget(5)
 @require_http_methods(["GET"])
 def get_scores_data(request):
     try:
-        data = data_utils.get_scores_data_dict()
+        data = snapshots.get_snapshot("scores")
         return JsonResponse(data, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@query_budget(4)
 @require_http_methods(["GET"])
 def get_history_data(request):
+    """
+    History table data.
+    ?pagination=cursor (or a ?cursor=...) switches to keyset pagination; ?total=exact adds COUNT(*).
+    """
     try:
-        page = int(request.GET.get("page", 1))
         limit = int(request.GET.get("limit", 8))
+        if limit < 1:
+            raise ValueError(limit)
+
+        if "cursor" in request.GET or request.GET.get("pagination") == "cursor":
+            data = data_utils.get_cursor_paginated_iot_data(
+                cursor=request.GET.get("cursor") or None,
+                limit=min(limit, settings.IOT_HISTORY_MAX_LIMIT),
+                include_total=request.GET.get("total") == "exact",
+            )
+            return JsonResponse(data, status=200)
+
+        page = int(request.GET.get("page", 1))
 
         data = data_utils.get_paginated_iot_data(page, limit)
         return JsonResponse(data, status=200)
     except ValueError:
-        return JsonResponse({"error": "Invalid page or limit parameter"}, status=400)
+        return JsonResponse({"error": "Invalid page, limit or cursor parameter"}, status=400)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+def _parse_time_param(request, name, default=None):
+    """Aware datetime from an ISO 8601 query parameter; raises ValueError"""
+    value = request.GET.get(name)
+    if not value:
+        return default
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f"{name} must be an ISO 8601 datetime")
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+
+
+def _parse_series_params(request):
+    """Reads fields, time range, point budget and resolution of a series request; raises ValueError"""
+    fields = [field for field in request.GET.get("fields", request.GET.get("field", "")).split(",") if field]
+    if not fields or any(field not in aggregates.NUMERIC_FIELDS for field in fields):
+        raise ValueError(f"fields must be a comma-separated list of: {', '.join(aggregates.NUMERIC_FIELDS)}")
+
+    end = _parse_time_param(request, "end", timezone.now())
+    start = _parse_time_param(request, "start", end - timedelta(days=1))
+    if start >= end:
+        raise ValueError("start must be before end")
+
+    points = int(request.GET.get("points", settings.IOT_SERIES_MAX_POINTS))
+    if points < 1:
+        raise ValueError("points must be positive")
+
+    resolution = request.GET.get("resolution") or None
+    if resolution is not None and resolution not in rollups.RESOLUTIONS:
+        raise ValueError(f"resolution must be one of: {', '.join(rollups.RESOLUTIONS)}")
+
+    return fields, start, end, min(points, settings.IOT_SERIES_MAX_POINTS), resolution
+
+
+@query_budget(3)
+@require_http_methods(["GET"])
+def get_series_data(request):
+    """
+    Downsampled time series from the rollup tables.
+    ?fields=cpu_usage,ram_usage&start=...&end=...&points=300 (last 24 hours by default)
+    """
+    try:
+        fields, start, end, points, resolution = _parse_series_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        return JsonResponse(rollups.get_series(fields, start, end, points, resolution), status=200)
+    except Exception as e:
+        logger.error(f"Series query failed: {e}")
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@query_budget(3)
+@require_http_methods(["GET"])
+def get_sensors_data(request):
+    """
+    Latest state of every sensor, read from SensorState only.
+    ?kind=hardware&stale=true&q=ESP32&sort=-last_seen
+    """
+    kind = request.GET.get("kind") or None
+    sort = request.GET.get("sort", "sensor_id")
+    stale = request.GET.get("stale")
+    if kind is not None and kind not in sensors.SENSOR_KINDS:
+        return JsonResponse({"error": f"kind must be one of: {', '.join(sensors.SENSOR_KINDS)}"}, status=400)
+    if sort.lstrip("-") not in sensors.SORT_FIELDS:
+        return JsonResponse({"error": f"sort must be one of: {', '.join(sorted(sensors.SORT_FIELDS))}"}, status=400)
+    if stale not in (None, "true", "false"):
+        return JsonResponse({"error": "stale must be true or false"}, status=400)
+
+    try:
+        states = sensors.list_sensors(
+            kind=kind,
+            stale=None if stale is None else stale == "true",
+            search=request.GET.get("q") or None,
+            sort=sort,
+            stale_after=settings.IOT_SENSOR_STALE_AFTER,
+        )
+        return JsonResponse(
+            {"count": len(states), "stale_after": settings.IOT_SENSOR_STALE_AFTER, "sensors": states}, status=200
+        )
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+def _parse_export_params(request):
+    """Reads format, columns, filters and compression of an export request; raises ValueError"""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in export.CONTENT_TYPES:
+        raise ValueError(f"format must be one of: {', '.join(export.CONTENT_TYPES)}")
+
+    columns = [column for column in request.GET.get("columns", "").split(",") if column] or None
+    unknown = set(columns or []) - set(export.EXPORT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+    return {
+        "fmt": fmt,
+        "columns": columns,
+        "compress": request.GET.get("compress") == "gzip",
+        "start": _parse_time_param(request, "start"),
+        "end": _parse_time_param(request, "end"),
+        "sensor": request.GET.get("sensor") or None,
+    }
+
+
+@require_http_methods(["GET"])
+async def export_iot_data(request):
+    """
+    Streams raw readings as CSV or JSON Lines (authenticated users only).
+    ?format=csv|jsonl&start=...&end=...&sensor=ESP32_01&columns=id,cpu_usage,created_at&compress=gzip
+    Async view: the response is sent while the rows are read, one keyset chunk at a time.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"error": "Not authenticated"}, status=401)
+
+    try:
+        params = _parse_export_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    stream = export.export_stream(chunk_size=settings.IOT_EXPORT_CHUNK_SIZE, **params)
+    filename = f"iot_data.{params['fmt']}" + (".gz" if params["compress"] else "")
+    content_type = "application/gzip" if params["compress"] else export.CONTENT_TYPES[params["fmt"]]
+    response = StreamingHttpResponse(export.aiter_pieces(stream), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 @require_http_methods(["GET"])
 def get_session_info(request):
     if not request.user.is_authenticated:
@@ -204,90 +470,100 @@ def extend_session(request):
     return JsonResponse({"message": "Session extended", "success": True}, status=200)
 
 
+async def _stream_reply(chunks, started):
+    """Relays the chatbot reply as it arrives; the proxy duration covers the whole body"""
+    outcome = "error"
+    try:
+        async for chunk in chunks:
+            yield chunk
+        outcome = "ok"
+    finally:
+        metrics.CHATBOT_PROXY_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
-def chatbot_proxy(request):
+async def chatbot_proxy(request):
+    """
+    Forwards the chat message to the chatbot service and streams its reply back.
+    Runs on the event loop: a slow service holds a connection and a concurrency slot, not a worker thread.
+    Repeated messages are answered from the reply cache, identical concurrent ones share one call.
+    """
+    started = time.perf_counter()
     try:
-        chatbot_url_default = config("CHATBOT_URL", default="http://37.59.116.54:8000/chat")
-        setting = SystemSetting.objects.filter(key="chatbot_url").first()
-        chatbot_url = setting.value if setting else chatbot_url_default
-
         data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
 
-        response = requests.post(chatbot_url, json=data, headers={"Content-Type": "application/json"}, timeout=10)
+    keys = ["chatbot_url", "chatbot_cache_size", "chatbot_cache_ttl"]
+    # Read on the event loop (one stat); a reload queries in a pool thread, not the thread of the sync views
+    config = system_settings.registry.loaded_values(keys)
+    if config is None:
+        config = await sync_to_async(system_settings.registry.values, thread_sensitive=False)(keys)
+    try:
+        reply = await chatbot_cache.ask(
+            config["chatbot_url"], request.body, data, config["chatbot_cache_size"], config["chatbot_cache_ttl"]
+        )
+    except chatbot.ChatbotError as e:
+        metrics.CHATBOT_PROXY_SECONDS.observe(time.perf_counter() - started, outcome=e.outcome)
+        response = JsonResponse({"error": e.message}, status=e.status)
+        if isinstance(e, chatbot.CircuitOpen):
+            response["Retry-After"] = str(math.ceil(e.retry_after))
+        return response
 
-        if response.ok:
-            return JsonResponse(response.json())
-        else:
-            return JsonResponse({"error": "Chatbot service error"}, status=502)
+    if isinstance(reply, chatbot_cache.Reply):
+        metrics.CHATBOT_PROXY_SECONDS.observe(time.perf_counter() - started, outcome="cached")
+        return HttpResponse(reply.body, content_type=reply.content_type, status=reply.status)
 
-    except requests.exceptions.ConnectionError:
-        return JsonResponse(
-            {"error": "La connexion au service IA a échoué. Veuillez vérifier si le serveur est en ligne."}, status=503
-        )
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+    if reply.status >= 400:
+        metrics.CHATBOT_PROXY_SECONDS.observe(time.perf_counter() - started, outcome="upstream_error")
+        return JsonResponse({"error": "Chatbot service error"}, status=502)
+
+    return StreamingHttpResponse(_stream_reply(reply.replay(), started), content_type=reply.content_type)
 
 
 @require_http_methods(["GET"])
-def get_system_settings(request):
-    safe_keys = ["cpu_threshold", "ram_threshold", "power_threshold", "co2_threshold", "eco_threshold"]
+def metrics_view(request):
+    """Prometheus scrape endpoint: bearer token METRICS_TOKEN, or staff users only when it is not set"""
+    token = settings.METRICS_TOKEN
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return JsonResponse({"error": "Not authenticated"}, status=401)
+    elif not request.user.is_authenticated:
+        return JsonResponse({"error": "Not authenticated"}, status=401)
+    elif not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    return HttpResponse(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
-    settings = SystemSetting.objects.filter(key__in=safe_keys)
-    settings_dict = {s.key: s.value for s in settings}
 
-    defaults = {
-        "cpu_threshold": "80",
-        "ram_threshold": "85",
-        "power_threshold": "250",
-        "co2_threshold": "150",
-        "eco_threshold": "50",
-    }
+# Settings are read from memory (one query when the registry is (re)loaded)
+@query_budget(1)
+@require_http_methods(["GET"])
+def get_system_settings(request):
+    """Public thresholds of the settings registry, typed (ints)"""
+    return JsonResponse(system_settings.registry.public_values())
 
-    for key, val in defaults.items():
-        if key not in settings_dict:
-            settings_dict[key] = val
 
-    return JsonResponse(settings_dict)
+def _quiz_etag(request):
+    # Kept on the request so the body matches the ETag even if the quiz changes in between
+    request.quiz_bundle = quiz.get_bundle()
+    return request.quiz_bundle.etag
 
 
+@query_budget(4)
 @require_http_methods(["GET"])
+@condition(etag_func=_quiz_etag)
 def get_quiz_questions(request):
-    questions = QuizQuestion.objects.filter(is_active=True).order_by("order")
-    facts = QuizFact.objects.filter(is_active=True)
-    moods = QuizMood.objects.all()
-    results = QuizResultMessage.objects.all()
-
-    data = {
-        "questions": [
-            {
-                "id": q.id,
-                "q": q.question,
-                "options": q.options,
-                "answer": q.correct_answer,
-                "reactions": {"correct": q.reactions_correct, "wrong": q.reactions_wrong},
-                "funFact": q.fun_fact,
-            }
-            for q in questions
-        ],
-        "facts": [f.text for f in facts],
-        "moods": [{"emoji": m.emoji, "text": m.text, "color": m.color, "min_percentage": m.min_percentage} for m in moods],
-        "results": [
-            {
-                "min_percentage": r.min_percentage,
-                "title": r.title,
-                "message": r.message,
-                "emoji": r.emoji,
-                "color_class": r.color_class,
-                "badge_text": r.badge_text,
-            }
-            for r in results
-        ],
-    }
-
-    return JsonResponse(data)
+    """Pre-encoded quiz bundle; clients revalidate with If-None-Match (304 when unchanged)"""
+    response = HttpResponse(request.quiz_bundle.body, content_type="application/json")
+    response["Cache-Control"] = "no-cache"
+    return response
 
 
+# Session, user, then the result insert and counter upserts in a transaction;
+# scoring reads the cached quiz (4 more queries when it is rebuilt)
+@query_budget(11)
 @csrf_exempt
 @require_http_methods(["POST"])
 def submit_quiz_result(request):
@@ -302,18 +578,10 @@ def submit_quiz_result(request):
         if not answers:
             return JsonResponse({"error": "No answers provided"}, status=400)
 
-        questions = QuizQuestion.objects.filter(is_active=True).order_by("order")
-
-        # Delegate score calculation to utility
-        score, total, percentage = data_utils.calculate_quiz_score(answers, questions)
-
         user = request.user if request.user.is_authenticated else None
 
-        # Save result
-        QuizResult.objects.create(user=user, score=score, total_questions=total, percentage=percentage)
-
-        # Get appropriate feedback message
-        result_msg = QuizResultMessage.objects.filter(min_percentage__lte=percentage).order_by("-min_percentage").first()
+        # Score and save the result with its answers (queued in write-behind mode)
+        score, total, percentage, result_msg = quiz.submit(user, answers)
 
         return JsonResponse(
             {
@@ -321,9 +589,9 @@ def submit_quiz_result(request):
                 "score": score,
                 "total": total,
                 "percentage": percentage,
-                "message": result_msg.message if result_msg else "Quiz completed",
-                "title": result_msg.title if result_msg else "Result",
-                "emoji": result_msg.emoji if result_msg else "📝",
+                "message": result_msg["message"] if result_msg else "Quiz completed",
+                "title": result_msg["title"] if result_msg else "Result",
+                "emoji": result_msg["emoji"] if result_msg else "📝",
             }
         )
 
@@ -331,3 +599,12 @@ def submit_quiz_result(request):
         return JsonResponse({"error": "Invalid JSON"}, status=400)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+
+@query_budget(5)
+@require_http_methods(["GET"])
+def get_quiz_analytics(request):
+    """Per-question answer counts and score histogram, read from counters (authenticated users only)"""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Not authenticated"}, status=401)
+    return JsonResponse(quiz_analytics.get_analytics())
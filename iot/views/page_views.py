@@ -1,55 +1,62 @@
 """
 Page views for rendering HTML templates
-Now using data_utils.py as single source of truth - no duplication!
+Page data comes from the shared snapshot cache (built by data_utils.py)
 """
 
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
-from .. import data_utils
+from .. import snapshots
+from ..query_stats import query_budget
 
 
+@query_budget(8)
 @login_required
 def dashboard(request):
     """Main dashboard view"""
-    # Get prepared data from centralized data_utils
-    context = data_utils.get_dashboard_data_dict()
+    # Shared snapshot (computed once per new reading)
+    context = snapshots.get_snapshot("dashboard")
 
     return render(request, "iot/dashboard.html", context)
 
 
+@query_budget(8)
 @login_required
 def hardware_view(request):
     """Hardware monitoring view"""
-    # Use centralized data preparation
-    context = data_utils.get_hardware_data_dict()
+    # Shared snapshot (computed once per new reading)
+    context = snapshots.get_snapshot("hardware")
     return render(request, "iot/hardware.html", context)
 
 
+@query_budget(8)
 @login_required
 def energy_view(request):
     """Energy monitoring view"""
-    # Use centralized data preparation
-    context = data_utils.get_energy_data_dict()
+    # Shared snapshot (computed once per new reading)
+    context = snapshots.get_snapshot("energy")
     return render(request, "iot/energy.html", context)
 
 
+@query_budget(8)
 @login_required
 def network_view(request):
     """Network monitoring view"""
-    # Use centralized data preparation
-    context = data_utils.get_network_data_dict()
+    # Shared snapshot (computed once per new reading)
+    context = snapshots.get_snapshot("network")
     return render(request, "iot/network.html", context)
 
 
+@query_budget(8)
 @login_required
 def scores_view(request):
     """Eco scores view"""
-    # Use centralized data preparation
-    context = data_utils.get_scores_data_dict()
+    # Shared snapshot (computed once per new reading)
+    context = snapshots.get_snapshot("scores")
     return render(request, "iot/scores.html", context)
 
 
+@query_budget(8)
 @login_required
 def quiz_view(request):
     """Quiz view"""
@@ -0,0 +1,329 @@
+"""
+Write-behind buffering
+Accepted items are kept in memory and written in batches by a background thread,
+turning many small commits into one group commit. A batch failing for another reason
+than the database being unavailable is written item by item, and the items it still
+rejects are set aside (dead letters) so they cannot block the queue. JournaledWriter also appends every
+item to a local journal before acknowledging it (one fsync shared by the submits that
+arrived meanwhile), and replays leftover journals on start.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.db import InterfaceError, OperationalError, connection
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: journals are not shared between processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# The database is unavailable (locked, down): worth retrying the whole batch later
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+class BatchedWriter:
+    """
+    Buffers items and hands them to flush_func(items) every `interval` seconds,
+    or as soon as `max_items` are waiting. Batches that fail because the database is
+    unavailable (OperationalError) are kept and retried; other failures are isolated per item.
+    """
+
+    def __init__(self, flush_func, interval=0.2, max_items=500, name="write-behind"):
+        self.flush_func = flush_func
+        self.interval = interval
+        self.max_items = max_items
+        self.name = name
+        self._items = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+
+    def start(self):
+        """Starts the background flusher (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def submit(self, items):
+        """Queues items; returns once they are accepted (journaled for JournaledWriter)"""
+        with self._lock:
+            position = self._append(items)
+            pending = len(self._items)
+        if pending >= self.max_items:
+            self._wakeup.set()
+        self._wait_durable(position)
+
+    def pending(self):
+        with self._lock:
+            return len(self._items)
+
+    def flush(self):
+        """Writes everything queued so far in one call to flush_func; returns the number of items written"""
+        with self._flush_lock:
+            with self._lock:
+                items, token = self._take()
+            if not items:
+                return 0
+            rejected, left, error = self._write(items)
+            if rejected:
+                self._dead_letter(rejected)
+            if left:
+                with self._lock:
+                    self._restore(left, token)
+                raise error
+            self._committed(token)
+            return len(items) - len(rejected)
+
+    def close(self):
+        """Stops the flusher and writes what is left"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"{self.name}: final flush failed, {self.pending()} items kept: {e}")
+
+    def _write(self, items):
+        """
+        Writes items in one flush_func call, or one by one when that fails for another reason
+        than the database being unavailable. Returns (rejected items, items left unwritten by
+        a transient error, that error).
+        """
+        try:
+            self.flush_func(items)
+            return [], [], None
+        except TRANSIENT_ERRORS as e:
+            return [], items, e
+        except Exception as e:
+            logger.warning(f"{self.name}: batch of {len(items)} items failed ({e}), writing them one by one")
+
+        rejected = []
+        for index, item in enumerate(items):
+            try:
+                self.flush_func([item])
+            except TRANSIENT_ERRORS as e:
+                return rejected, items[index:], e
+            except Exception as e:
+                logger.error(f"{self.name}: item rejected: {e}")
+                rejected.append(item)
+        return rejected, [], None
+
+    def _dead_letter(self, items):
+        """Items that cannot be written (in memory only: they are logged and dropped)"""
+        logger.error(f"{self.name}: dropped {len(items)} rejected items: {items!r:.2000}")
+
+    def _run(self):
+        try:
+            while not self._stopping.is_set():
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"{self.name}: flush failed, will retry: {e}")
+        finally:
+            connection.close()
+
+    # Hooks: _append, _take and _restore run with self._lock held
+
+    def _append(self, items):
+        """Queues items; returns what _wait_durable needs to wait for them"""
+        self._items.extend(items)
+
+    def _wait_durable(self, position):
+        pass
+
+    def _take(self):
+        items, self._items = self._items, []
+        return items, None
+
+    def _restore(self, items, token):
+        self._items[:0] = items
+
+    def _committed(self, token):
+        pass
+
+
+class JournaledWriter(BatchedWriter):
+    """
+    BatchedWriter whose items survive a crash: each submit is appended to a JSON lines
+    segment and fsync'ed before returning, and the segment is deleted once its batch is written.
+    Group commit: submits waiting for durability share one fsync instead of queueing one each.
+    Segments left by a dead process are replayed by replay(). Delivery is at-least-once:
+    a crash between the database commit and the deletion replays that batch again.
+    Rejected items are appended to dead-letter-*.jsonl segments, which are never replayed.
+    """
+
+    def __init__(self, flush_func, directory, fsync=True, **kwargs):
+        super().__init__(flush_func, **kwargs)
+        self.directory = Path(directory)
+        self.fsync = fsync
+        self._segment = None
+        self._segment_prefix = f"journal-{os.getpid()}-{time.time_ns()}"
+        self._segment_count = 0
+        self._pending_segments = []
+        # Submits appended / known durable so far, segments written since the last fsync, and
+        # whether a segment was created since (its directory entry needs an fsync of the directory)
+        self._appended = 0
+        self._synced = 0
+        self._unsynced = set()
+        self._new_segment = False
+        self._sync_lock = threading.Lock()
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            self.replay()
+        except Exception as e:
+            logger.error(f"{self.name}: journal replay failed, will retry on next start: {e}")
+        super().start()
+
+    def replay(self):
+        """Writes the items of journal segments no live process owns; returns the number of items replayed"""
+        replayed = 0
+        for path in sorted(self.directory.glob("journal-*.jsonl")):
+            handle = open(path, "r+", encoding="utf-8")
+            try:
+                if not _try_lock(handle):
+                    continue  # Owned by a running writer
+                items = _read_segment(handle, path)
+                for start in range(0, len(items), self.max_items):
+                    rejected, left, error = self._write(items[start : start + self.max_items])
+                    if rejected:
+                        self._dead_letter(rejected)
+                    if left:
+                        raise error
+                path.unlink()
+                replayed += len(items)
+            finally:
+                handle.close()
+        if replayed:
+            logger.warning(f"{self.name}: replayed {replayed} items from unflushed journals")
+        return replayed
+
+    def _dead_letter(self, items):
+        path = self.directory / f"dead-letter-{self._segment_prefix}.jsonl"
+        try:
+            created = not path.exists()
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write("".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items))
+                handle.flush()
+                os.fsync(handle.fileno())
+            if created:
+                _fsync_directory(self.directory)
+        except OSError as e:
+            logger.error(f"{self.name}: could not save {len(items)} rejected items to {path}: {e}")
+            super()._dead_letter(items)
+            return
+        logger.error(f"{self.name}: {len(items)} rejected items moved to {path}")
+
+    def _open_segment(self):
+        self._segment_count += 1
+        path = self.directory / f"{self._segment_prefix}-{self._segment_count:06d}.jsonl"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handle = open(path, "a", encoding="utf-8")
+        _try_lock(handle)
+        self._new_segment = True
+        return handle
+
+    def _append(self, items):
+        if self._segment is None:
+            self._segment = self._open_segment()
+        self._segment.write("".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items))
+        self._segment.flush()
+        super()._append(items)
+        self._unsynced.add(self._segment)
+        self._appended += 1
+        return self._appended
+
+    def _wait_durable(self, position):
+        """Returns once the submit at position is on disk; one fsync covers every submit appended before it"""
+        if not self.fsync:
+            return
+        with self._sync_lock:
+            if self._synced >= position:
+                return  # Synced by the submit that held the lock meanwhile
+            with self._lock:
+                segments, self._unsynced = self._unsynced, set()
+                new_segment, self._new_segment = self._new_segment, False
+                target = self._appended
+            for handle in segments:
+                os.fsync(handle.fileno())
+            if new_segment:
+                # Without it, a power loss can drop the file of an acknowledged submit
+                _fsync_directory(self.directory)
+            self._synced = target
+
+    def _take(self):
+        # Rotate: the detached segment holds exactly the items being flushed (plus earlier failed ones)
+        items, _ = super()._take()
+        segments, self._pending_segments = self._pending_segments, []
+        if self._segment is not None:
+            segments.append(self._segment)
+            self._segment = None
+        return items, segments
+
+    def _restore(self, items, token):
+        super()._restore(items, token)
+        self._pending_segments[:0] = token
+
+    def _committed(self, token):
+        # Its items are in the database: a segment still waiting for its fsync no longer needs it
+        with self._sync_lock:
+            with self._lock:
+                self._unsynced.difference_update(token)
+            for handle in token:
+                os.unlink(handle.name)
+                handle.close()
+
+
+def _fsync_directory(path):
+    """Makes the files created in a directory durable (their directory entries)"""
+    if not hasattr(os, "O_DIRECTORY"):  # pragma: no cover - Windows cannot open directories
+        return
+    descriptor = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _try_lock(handle):
+    """Non-blocking exclusive lock, released when the handle is closed"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _read_segment(handle, path):
+    """Items of a journal segment; a torn last line (crash during the write) is skipped"""
+    items = []
+    for number, line in enumerate(handle, start=1):
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping unreadable line {number} of {path}")
+    return items
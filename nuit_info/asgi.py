@@ -7,9 +7,12 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import logging
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from django.db import DatabaseError
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "nuit_info.settings")
 
@@ -21,9 +24,26 @@ from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
 
 import iot.routing  # noqa: E402
 
-application = ProtocolTypeRouter(
-    {
-        "http": django_asgi_app,
-        "websocket": URLRouter(iot.routing.websocket_urlpatterns),
-    }
+from iot import broadcast, system_settings  # noqa: E402
+
+# Loads the SystemSetting registry before the first request
+try:
+    system_settings.registry.values([])
+except DatabaseError as e:
+    logging.getLogger(__name__).warning(f"System settings not loaded at startup: {e}")
+
+if settings.IOT_WRITE_BEHIND:
+    # Replays journals left by a previous run before serving requests
+    from iot import ingestion
+
+    ingestion.get_write_behind()
+
+# Broadcasts are flushed from the server event loop, attached by the first connection
+application = broadcast.SchedulerMiddleware(
+    ProtocolTypeRouter(
+        {
+            "http": django_asgi_app,
+            "websocket": URLRouter(iot.routing.websocket_urlpatterns),
+        }
+    )
 )
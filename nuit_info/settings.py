@@ -58,7 +58,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # ⭐ WhiteNoise right after SecurityMiddleware
+    "iot.static_files.AsyncWhiteNoiseMiddleware",  # ⭐ WhiteNoise right after SecurityMiddleware (async-capable)
+    "iot.query_stats.QueryStatsMiddleware",  # Query count / SQL time per request, Server-Timing header
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -155,11 +156,69 @@ LOGOUT_REDIRECT_URL = "/api/login/"
 LOGIN_URL = "/api/login/"
 
 # Channels configuration
+# InMemoryChannelLayer serves a single process; iot.channel_layer.SQLiteChannelLayer shares
+# groups between the workers of one host (scripts/run_workers.py) through CHANNEL_LAYER_PATH
+CHANNEL_LAYER_BACKEND = config("CHANNEL_LAYER_BACKEND", default="channels.layers.InMemoryChannelLayer")
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "BACKEND": CHANNEL_LAYER_BACKEND,
     },
 }
+if CHANNEL_LAYER_BACKEND == "iot.channel_layer.SQLiteChannelLayer":
+    CHANNEL_LAYERS["default"]["CONFIG"] = {
+        "path": config("CHANNEL_LAYER_PATH", default=str(BASE_DIR / "channels.sqlite3")),
+        "poll_interval": config("CHANNEL_LAYER_POLL_INTERVAL", default=0.01, cast=float),
+    }
+
+# IoT ingestion
+IOT_BULK_MAX_ITEMS = config("IOT_BULK_MAX_ITEMS", default=5000, cast=int)
+IOT_BULK_CHUNK_SIZE = config("IOT_BULK_CHUNK_SIZE", default=500, cast=int)
+IOT_HISTORY_MAX_LIMIT = config("IOT_HISTORY_MAX_LIMIT", default=500, cast=int)
+# Default and maximum number of points returned by /api/series/
+IOT_SERIES_MAX_POINTS = config("IOT_SERIES_MAX_POINTS", default=500, cast=int)
+# Seconds without a reading after which a sensor is reported as stale by /api/sensors/
+IOT_SENSOR_STALE_AFTER = config("IOT_SENSOR_STALE_AFTER", default=300, cast=int)
+# Raw readings older than this are compacted by `manage.py compact_iotdata`
+IOT_RETENTION_DAYS = config("IOT_RETENTION_DAYS", default=30, cast=int)
+# Rows fetched per query by the streaming export
+IOT_EXPORT_CHUNK_SIZE = config("IOT_EXPORT_CHUNK_SIZE", default=2000, cast=int)
+# Write-behind ingestion: readings are journaled, acknowledged with 202 and saved in batches
+IOT_WRITE_BEHIND = config("IOT_WRITE_BEHIND", default=False, cast=bool)
+IOT_WRITE_BEHIND_DIR = config("IOT_WRITE_BEHIND_DIR", default=str(BASE_DIR / "journal"))
+IOT_WRITE_BEHIND_INTERVAL = config("IOT_WRITE_BEHIND_INTERVAL", default=0.2, cast=float)
+IOT_WRITE_BEHIND_MAX_ROWS = config("IOT_WRITE_BEHIND_MAX_ROWS", default=500, cast=int)
+IOT_WRITE_BEHIND_FSYNC = config("IOT_WRITE_BEHIND_FSYNC", default=True, cast=bool)
+# Quiz results saved in batches by a background thread (flushed at shutdown, not journaled)
+QUIZ_RESULT_WRITE_BEHIND = config("QUIZ_RESULT_WRITE_BEHIND", default=False, cast=bool)
+QUIZ_RESULT_FLUSH_INTERVAL = config("QUIZ_RESULT_FLUSH_INTERVAL", default=0.5, cast=float)
+QUIZ_RESULT_BATCH_SIZE = config("QUIZ_RESULT_BATCH_SIZE", default=500, cast=int)
+# Minimum delay (seconds) between two WebSocket refreshes of the same group
+IOT_BROADCAST_INTERVAL = config("IOT_BROADCAST_INTERVAL", default=0.5, cast=float)
+
+# SQL instrumentation (iot.query_stats): slow query log threshold, query budgets, Server-Timing header
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=100, cast=float)
+QUERY_BUDGET_ENFORCE = config("QUERY_BUDGET_ENFORCE", default=False, cast=bool)
+SERVER_TIMING_HEADER = config("SERVER_TIMING_HEADER", default=True, cast=bool)
+
+# Default of the chatbot_url SystemSetting (external AI service)
+CHATBOT_URL = config("CHATBOT_URL", default="http://37.59.116.54:8000/chat")
+# Chatbot proxy: timeout (connect, reply headers, each body read), requests in flight and how long a
+# request waits for a slot, idle keep-alive connections, consecutive failures opening the circuit breaker
+# and seconds before it lets a trial request through
+CHATBOT_TIMEOUT = config("CHATBOT_TIMEOUT", default=10.0, cast=float)
+CHATBOT_MAX_CONCURRENCY = config("CHATBOT_MAX_CONCURRENCY", default=20, cast=int)
+CHATBOT_QUEUE_TIMEOUT = config("CHATBOT_QUEUE_TIMEOUT", default=2.0, cast=float)
+CHATBOT_POOL_SIZE = config("CHATBOT_POOL_SIZE", default=10, cast=int)
+CHATBOT_BREAKER_FAILURES = config("CHATBOT_BREAKER_FAILURES", default=5, cast=int)
+CHATBOT_BREAKER_RESET = config("CHATBOT_BREAKER_RESET", default=30.0, cast=float)
+# Replaced when a SystemSetting changes; workers of the host reload their settings when it does
+SYSTEM_SETTINGS_VERSION_FILE = config("SYSTEM_SETTINGS_VERSION_FILE", default=str(BASE_DIR / "settings.version"))
+# Same for the quiz content (questions, answer key, result messages)
+QUIZ_VERSION_FILE = config("QUIZ_VERSION_FILE", default=str(BASE_DIR / "quiz.version"))
+
+# Prometheus /metrics endpoint: when set, scrapers must send "Authorization: Bearer <token>";
+# when empty, only logged-in staff users can read it
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
 
 # Ensure logs directory exists
 import os  # noqa: E402
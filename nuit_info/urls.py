@@ -21,10 +21,13 @@ from django.contrib import admin
 from django.shortcuts import redirect
 from django.urls import include, path
 
+from iot.views import metrics_view
+
 urlpatterns = [
     path("", lambda request: redirect("/api/login/")),
     path("admin/", admin.site.urls),
     path("api/", include("iot.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 # Serve static files in development mode (even when using Daphne)
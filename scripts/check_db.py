@@ -7,9 +7,9 @@ cursor.execute("SELECT COUNT(*) FROM iot_iotdata")
 count = cursor.fetchone()[0]
 print("Nombre d'entrées IoTData:", count)
 
+# Itère sur le curseur (mémoire constante) ; pour un export complet : manage.py export_iotdata
 cursor.execute("SELECT id, hardware_sensor_id, created_at FROM iot_iotdata")
-rows = cursor.fetchall()
-for row in rows:
+for row in cursor:
     print("Entrée:", row)
 
 conn.close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Lance un worker Daphne par cœur sur un même port (socket d'écoute partagé).
+Les diffusions WebSocket n'atteignent tous les workers qu'avec la couche de channels
+partagée : CHANNEL_LAYER_BACKEND=iot.channel_layer.SQLiteChannelLayer
+
+Usage:
+    python scripts/run_workers.py --port 8000 --workers 4
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess  # nosec B404
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workers Daphne multiples sur un port partagé")
+    parser.add_argument("--host", default="0.0.0.0", help="Adresse d'écoute (défaut: 0.0.0.0)")  # nosec B104
+    parser.add_argument("--port", type=int, default=8000, help="Port d'écoute (défaut: 8000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de workers (défaut: nb de cœurs)")
+    parser.add_argument("--application", default="nuit_info.asgi:application", help="Application ASGI")
+    args = parser.parse_args()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(1024)
+    fd = listener.fileno()
+
+    # The kernel spreads incoming connections over the workers accepting on the socket
+    workers = [
+        subprocess.Popen([sys.executable, "-m", "daphne", "--fd", str(fd), args.application], pass_fds=[fd])  # nosec B603
+        for _ in range(args.workers)
+    ]
+    print(f"{args.workers} workers Daphne sur {args.host}:{args.port}")
+
+    def stop(signum, frame):
+        for worker in workers:
+            worker.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    codes = [worker.wait() for worker in workers]
+    listener.close()
+    return max(codes, default=0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())